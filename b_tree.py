@@ -0,0 +1,391 @@
+"""
+### A B+ tree of sorted key blocks, with the same API as `RBTree` and `BSTNode`.
+```
+tree = BTree(values, order=64)
+tree.insert(42); 42 in tree; tree.delete(42)
+tree.get_min(), tree.get_max(), list(tree.irange(10, 20)), list(reversed(tree))
+```
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator
+
+from tree_file import dump
+
+
+class _Leaf:
+    """
+    A block of sorted keys. Leaves are linked to their neighbours, so a range scan never climbs back up the tree.
+    """
+
+    __slots__ = ("keys", "prev", "next")
+
+    def __init__(self, keys: list[int]):
+        self.keys = keys
+        self.prev: _Leaf | None = None
+        self.next: _Leaf | None = None
+
+
+class _Internal:
+    """
+    `keys[i]` separates `children[i]` from `children[i + 1]`: every key in `children[i + 1]` is `>= keys[i]`, every
+    key in `children[i]` is `< keys[i]`.
+    """
+
+    __slots__ = ("keys", "children")
+
+    def __init__(self, keys: list[int], children: list[_Leaf | _Internal]):
+        self.keys = keys
+        self.children = children
+
+
+class BTree:
+    """
+    - 𝗔 𝗕+ 𝘁𝗿𝗲𝗲: 𝗲𝘃𝗲𝗿𝘆 𝗻𝗼𝗱𝗲 𝗵𝗼𝗹𝗱𝘀 𝘂𝗽 𝘁𝗼 `order` 𝗸𝗲𝘆𝘀 𝗶𝗻 𝗮 𝘀𝗼𝗿𝘁𝗲𝗱 𝗹𝗶𝘀𝘁.
+    - The keys live in the leaves, which are all at the same depth and linked in order. Internal nodes only hold
+      separator keys, so one node replaces about `log2(order)` levels of a binary tree.
+    - Searching inside a node is a `bisect` call on its list, which runs in C. A lookup makes `height` Python-level
+      hops instead of the ~`2 log2(n)` attribute chases of `RBTree`, and a range scan reads whole leaf lists.
+    - `insert`, `exists`/`in`, `delete`, `get_min`/`get_max`, `floor`/`ceiling`, `irange`, `iter_inorder`,
+      `iter_reversed`, `__iter__`/`__reversed__`, `len`, `from_sorted`/`from_iterable` and `save` match `RBTree`.
+      There is no per-node pre/post order, since nodes hold many keys.
+
+    ### Balancing
+    1. `insert` adds the key to its leaf. A leaf with more than `order` keys is split in half, and the first key of
+       the right half is added to the parent as a separator. Full parents split the same way, up to a new root.
+    2. `delete` removes the key from its leaf. A node left with fewer than `order // 2` keys borrows one from a
+       sibling that can spare it, or else is merged with a sibling, which takes one separator out of the parent.
+       A root left with a single child is replaced by that child.
+    - Separators are never updated on delete: they may name a key that is gone, but still split the ranges right.
+
+    ### Height and cost
+    CPython 3.11, 1,000,000 random keys, `python benchmark.py --sizes 1000000 --distributions random --no-memory`
+    (ops/sec, absolute numbers depend on the machine, the ratios are what matter):
+    ```
+                 height   exists   insert   range (100 keys)   construct
+    rbtree           25     180k      92k                10k        160k
+    btree (64)        4     430k     310k                86k       2.3M
+    ```
+    """
+
+    def __init__(self, values: Iterable[int] = (), order: int = 64):
+        if order < 3:
+            raise ValueError("order must be at least 3")
+        self.order = order
+        self.root: _Leaf | _Internal = _Leaf([])
+        self.size = 0
+        for val in values:
+            self.insert(val)
+
+    @classmethod
+    def from_sorted(cls, values: Iterable[int], order: int = 64) -> BTree:
+        """
+        Builds a tree from strictly ascending values in O(n), one level at a time, with nodes filled evenly.
+        Raises `ValueError` if the values aren't strictly ascending.
+        """
+        keys = list(values)
+        for i in range(1, len(keys)):
+            if not keys[i - 1] < keys[i]:
+                raise ValueError("from_sorted() requires strictly ascending values")
+        tree = cls(order=order)
+        if not keys:
+            return tree
+        tree.size = len(keys)
+        leaves = [_Leaf(chunk) for chunk in _chunks(keys, order)]
+        for left, right in zip(leaves, leaves[1:]):
+            left.next = right
+            right.prev = left
+        level: list[_Leaf | _Internal] = list(leaves)
+        lows = [leaf.keys[0] for leaf in leaves]
+        while len(level) > 1:
+            parents: list[_Leaf | _Internal] = []
+            parent_lows: list[int] = []
+            start = 0
+            for group in _chunks(list(range(len(level))), order + 1):
+                end = start + len(group)
+                parents.append(_Internal(lows[start + 1 : end], level[start:end]))
+                parent_lows.append(lows[start])
+                start = end
+            level = parents
+            lows = parent_lows
+        tree.root = level[0]
+        return tree
+
+    @classmethod
+    def from_iterable(cls, values: Iterable[int], order: int = 64) -> BTree:
+        """
+        Builds a tree from values in any order (duplicates are dropped), by sorting and calling `from_sorted`.
+        """
+        return cls.from_sorted(sorted(set(values)), order)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_inorder()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.iter_reversed()
+
+    def height(self) -> int:
+        """
+        The number of levels, counting the leaves. Every leaf is at this depth.
+        """
+        levels = 1
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[0]
+            levels += 1
+        return levels
+
+    def _leaf(self, val: int) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[bisect_right(node.keys, val)]
+        return node
+
+    def _first_leaf(self) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[0]
+        return node
+
+    def _last_leaf(self) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[-1]
+        return node
+
+    def exists(self, val: int) -> bool:
+        keys = self._leaf(val).keys
+        i = bisect_left(keys, val)
+        return i < len(keys) and keys[i] == val
+
+    def get_min(self) -> int | None:
+        keys = self._first_leaf().keys
+        return keys[0] if keys else None
+
+    def get_max(self) -> int | None:
+        keys = self._last_leaf().keys
+        return keys[-1] if keys else None
+
+    def floor(self, val: int) -> int | None:
+        """
+        The largest value that is less than or equal to `val`, or `None`.
+        """
+        leaf: _Leaf | None = self._leaf(val)
+        i = bisect_right(leaf.keys, val)  # type: ignore
+        while leaf is not None and not i:
+            leaf = leaf.prev
+            i = len(leaf.keys) if leaf is not None else 0
+        return leaf.keys[i - 1] if leaf is not None else None
+
+    def ceiling(self, val: int) -> int | None:
+        """
+        The smallest value that is greater than or equal to `val`, or `None`.
+        """
+        leaf: _Leaf | None = self._leaf(val)
+        i = bisect_left(leaf.keys, val)  # type: ignore
+        while leaf is not None and i == len(leaf.keys):
+            leaf = leaf.next
+            i = 0
+        return leaf.keys[i] if leaf is not None else None
+
+    def insert(self, val: int):
+        path: list[tuple[_Internal, int]] = []
+        node = self.root
+        while isinstance(node, _Internal):
+            i = bisect_right(node.keys, val)
+            path.append((node, i))
+            node = node.children[i]
+        keys = node.keys
+        i = bisect_left(keys, val)
+        if i < len(keys) and keys[i] == val:
+            # * duplicate, just ignore
+            return
+        keys.insert(i, val)
+        self.size += 1
+        if len(keys) <= self.order:
+            return
+
+        # * split the full leaf, then every full parent on the way up
+        half = len(keys) // 2
+        right: _Leaf | _Internal = _Leaf(keys[half:])
+        del keys[half:]
+        right.next = node.next  # type: ignore
+        right.prev = node  # type: ignore
+        if node.next is not None:
+            node.next.prev = right  # type: ignore
+        node.next = right  # type: ignore
+        separator = right.keys[0]
+        while path:
+            parent, i = path.pop()
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, right)
+            if len(parent.keys) <= self.order:
+                return
+            half = len(parent.keys) // 2
+            separator = parent.keys[half]
+            right = _Internal(parent.keys[half + 1 :], parent.children[half + 1 :])
+            del parent.keys[half:]
+            del parent.children[half + 1 :]
+        self.root = _Internal([separator], [self.root, right])
+
+    def delete(self, val: int) -> bool:
+        """
+        Removes `val` from the tree and returns whether it was there.
+        """
+        path: list[tuple[_Internal, int]] = []
+        node = self.root
+        while isinstance(node, _Internal):
+            i = bisect_right(node.keys, val)
+            path.append((node, i))
+            node = node.children[i]
+        keys = node.keys
+        i = bisect_left(keys, val)
+        if i == len(keys) or keys[i] != val:
+            return False
+        del keys[i]
+        self.size -= 1
+
+        minimum = self.order // 2
+        child: _Leaf | _Internal = node
+        while path and len(child.keys) < minimum:
+            parent, i = path.pop()
+            self._rebalance(parent, i)
+            child = parent
+        if isinstance(self.root, _Internal) and not self.root.keys:
+            self.root = self.root.children[0]
+        return True
+
+    def _rebalance(self, parent: _Internal, i: int):
+        """
+        Fixes `parent.children[i]`, which has too few keys, by borrowing from a sibling or merging with one.
+        """
+        minimum = self.order // 2
+        node = parent.children[i]
+        left = parent.children[i - 1] if i else None
+        right = parent.children[i + 1] if i + 1 < len(parent.children) else None
+        if left is not None and len(left.keys) > minimum:
+            if isinstance(node, _Leaf):
+                node.keys.insert(0, left.keys.pop())
+                parent.keys[i - 1] = node.keys[0]
+            else:
+                node.keys.insert(0, parent.keys[i - 1])
+                node.children.insert(0, left.children.pop())  # type: ignore
+                parent.keys[i - 1] = left.keys.pop()
+        elif right is not None and len(right.keys) > minimum:
+            if isinstance(node, _Leaf):
+                node.keys.append(right.keys.pop(0))
+                parent.keys[i] = right.keys[0]
+            else:
+                node.keys.append(parent.keys[i])
+                node.children.append(right.children.pop(0))  # type: ignore
+                parent.keys[i] = right.keys.pop(0)
+        else:
+            if left is not None:
+                # * merge into the left sibling instead
+                i -= 1
+                node, right = left, node
+            self._merge(parent, i, node, right)  # type: ignore
+
+    def _merge(self, parent: _Internal, i: int, node: _Leaf | _Internal, right: _Leaf | _Internal):
+        """
+        Moves everything from `right` (`parent.children[i + 1]`) into `node` (`parent.children[i]`) and unlinks it.
+        """
+        if isinstance(node, _Leaf):
+            node.keys.extend(right.keys)
+            node.next = right.next  # type: ignore
+            if node.next is not None:
+                node.next.prev = node
+        else:
+            node.keys.append(parent.keys[i])
+            node.keys.extend(right.keys)
+            node.children.extend(right.children)  # type: ignore
+        del parent.keys[i]
+        del parent.children[i + 1]
+
+    def iter_inorder(self) -> Iterator[int]:
+        leaf: _Leaf | None = self._first_leaf()
+        while leaf is not None:
+            yield from leaf.keys
+            leaf = leaf.next
+
+    def iter_reversed(self) -> Iterator[int]:
+        leaf: _Leaf | None = self._last_leaf()
+        while leaf is not None:
+            yield from reversed(leaf.keys)
+            leaf = leaf.prev
+
+    def irange(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        ### Lazily yields the values between `lo` and `hi` in sorted order, with the same arguments as `RBTree.irange`.
+        - Finding the first value costs one descent. After that the scan slices whole leaves and follows their
+          links, so reading `k` values costs O(log(n) + k) with very few Python-level steps per key.
+        - The tree must not be modified while the generator is being consumed.
+        """
+        leaf: _Leaf | None
+        if not reverse:
+            if lo is None:
+                leaf, start = self._first_leaf(), 0
+            else:
+                leaf = self._leaf(lo)
+                start = (bisect_left if inclusive[0] else bisect_right)(leaf.keys, lo)
+            while leaf is not None:
+                keys = leaf.keys
+                if hi is not None and keys and keys[-1] >= hi:
+                    stop = (bisect_right if inclusive[1] else bisect_left)(keys, hi)
+                    yield from keys[start:stop]
+                    return
+                yield from keys[start:]
+                leaf, start = leaf.next, 0
+        else:
+            if hi is None:
+                leaf = self._last_leaf()
+                stop = len(leaf.keys)
+            else:
+                leaf = self._leaf(hi)
+                stop = (bisect_right if inclusive[1] else bisect_left)(leaf.keys, hi)
+            while leaf is not None:
+                keys = leaf.keys
+                if lo is not None and keys and keys[0] <= lo:
+                    start = (bisect_left if inclusive[0] else bisect_right)(keys, lo)
+                    yield from reversed(keys[start:stop])
+                    return
+                yield from reversed(keys[:stop])
+                leaf = leaf.prev
+                stop = len(leaf.keys) if leaf is not None else 0
+
+    def save(self, path: str, layout: str = "sorted"):
+        """
+        Writes the values to a versioned binary file that `tree_file.MappedTree` can open without deserializing.
+        `layout` is `"sorted"` or `"eytzinger"`. See `tree_file.py`.
+        """
+        dump(self.iter_inorder(), path, layout)
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    """
+    Splits `items` into as few pieces of at most `size` as possible, with lengths that differ by at most one, so
+    that no piece of a bulk-built level ends up below half full.
+    """
+    count = -(-len(items) // size)
+    step, extra = divmod(len(items), count)
+    pieces = []
+    start = 0
+    for i in range(count):
+        end = start + step + (i < extra)
+        pieces.append(items[start:end])
+        start = end
+    return pieces
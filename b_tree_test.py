@@ -0,0 +1,98 @@
+from __future__ import annotations
+from b_tree import BTree, _Internal, _Leaf
+import random
+import pytest
+
+
+def check_btree(tree: BTree):
+    """
+    Asserts the B+ tree invariants: node sizes, separator bounds, equal leaf depth, leaf links and `size`.
+    """
+    leaves: list[_Leaf] = []
+    depths: set[int] = set()
+    stack: list[tuple[_Leaf | _Internal, int, int | None, int | None]] = [(tree.root, 1, None, None)]
+    while stack:
+        node, depth, low, high = stack.pop()
+        assert node.keys == sorted(set(node.keys))
+        assert len(node.keys) <= tree.order
+        if node is not tree.root:
+            assert len(node.keys) >= tree.order // 2
+        for key in node.keys if isinstance(node, _Leaf) else ():
+            assert (low is None or key >= low) and (high is None or key < high)
+        if isinstance(node, _Leaf):
+            depths.add(depth)
+            leaves.append(node)
+            continue
+        assert len(node.children) == len(node.keys) + 1
+        bounds = [low, *node.keys, high]
+        for i in reversed(range(len(node.children))):
+            stack.append((node.children[i], depth + 1, bounds[i], bounds[i + 1]))
+    assert len(depths) == 1 and depths == {tree.height()}
+    for left, right in zip(leaves, leaves[1:]):
+        assert left.next is right and right.prev is left
+    assert leaves[0].prev is None and leaves[-1].next is None
+    assert sum(len(leaf.keys) for leaf in leaves) == len(tree)
+
+
+# ===================Helper functions above===============
+
+
+@pytest.mark.parametrize("order", [3, 4, 5, 16])
+def test_btree_matches_set(order: int):
+    random.seed(order)
+    tree = BTree(order=order)
+    expected: set[int] = set()
+    for step in range(6000):
+        val = random.randint(0, 1500)
+        if random.random() < 0.55:
+            tree.insert(val)
+            expected.add(val)
+        else:
+            assert tree.delete(val) == (val in expected)
+            expected.discard(val)
+        if step % 500 == 0:
+            check_btree(tree)
+    check_btree(tree)
+    assert list(tree) == sorted(expected)
+    assert list(reversed(tree)) == sorted(expected, reverse=True)
+    for val in list(expected):
+        assert tree.delete(val)
+    check_btree(tree)
+    assert len(tree) == 0 and list(tree) == [] and tree.get_min() is None and tree.get_max() is None
+
+
+def test_btree_sorted_input_and_height():
+    tree = BTree(range(100_000), order=32)
+    check_btree(tree)
+    assert tree.height() <= 5
+    assert tree.get_min() == 0 and tree.get_max() == 99_999
+    assert 500 in tree and -1 not in tree and 100_000 not in tree
+
+    bulk = BTree.from_sorted(range(100_000), order=32)
+    check_btree(bulk)
+    assert list(bulk) == list(tree)
+    for n in (0, 1, 32, 33, 1089, 1090):
+        check_btree(BTree.from_sorted(range(n), order=32))
+    assert list(BTree.from_iterable([5, 1, 5, 3], order=3)) == [1, 3, 5]
+    with pytest.raises(ValueError):
+        BTree.from_sorted([1, 1])
+    with pytest.raises(ValueError):
+        BTree(order=2)
+
+
+def test_btree_irange_floor_ceiling():
+    values = list(range(0, 1000, 3))
+    tree = BTree(values, order=4)
+    for lo, hi in [(None, None), (10, 20), (9, 21), (-5, 4), (995, 2000), (500, 400), (None, 30), (900, None)]:
+        for inclusive in [(True, True), (False, False), (True, False), (False, True)]:
+            want = [
+                v
+                for v in values
+                if (lo is None or v > lo or (inclusive[0] and v == lo))
+                and (hi is None or v < hi or (inclusive[1] and v == hi))
+            ]
+            assert list(tree.irange(lo, hi, inclusive)) == want
+            assert list(tree.irange(lo, hi, inclusive, reverse=True)) == want[::-1]
+    assert tree.floor(10) == 9 and tree.floor(9) == 9 and tree.floor(-1) is None
+    assert tree.ceiling(10) == 12 and tree.ceiling(999) == 999 and tree.ceiling(1000) is None
+    assert list(BTree().irange(1, 5)) == [] and BTree().floor(3) is None
@@ -0,0 +1,509 @@
+"""
+### Benchmarks for the trees in this repo.
+Runs every backend in `BACKENDS` over every size and key distribution, times each operation, and writes the results
+as JSON. When given a stored baseline, it exits with status 1 if any operation got slower than the allowed threshold.
+
+```
+python benchmark.py --sizes 1000 10000 100000 --output bench.json
+python benchmark.py --baseline bench.json --threshold 0.25
+python benchmark.py --sizes 10000000 --structures rbtree sorted_list --ops construct exists
+```
+- Operations: `insert` (one key at a time into an empty tree), `exists`, `range` (scans of ~100 keys each),
+  `traverse` (one full in-order pass) and `construct` (the fastest way each backend has to build from a list).
+- Results are ops/sec, where one op is one key inserted, one lookup, one range scan, one key traversed, or one key
+  of bulk construction, together with the peak memory (`tracemalloc`) of building the structure and its height.
+- `--threads 4:1 8:2` also runs `ConcurrentRBTree` with that many reader:writer threads and adds reads/sec and
+  writes/sec per ratio under `"concurrency"`, noting whether the GIL was enabled (free-threaded builds).
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from itertools import accumulate
+from typing import Any, Callable, Iterable
+
+from b_tree import BTree
+from binary_tree import BSTNode
+from concurrent_rb_tree import ConcurrentRBTree
+from rb_tree import RBTree
+
+DISTRIBUTIONS = ("random", "sorted", "reverse", "zipfian", "clustered")
+OPERATIONS = ("insert", "exists", "range", "traverse", "construct")
+RANGE_WIDTH = 100
+
+
+class Skip(Exception):
+    """
+    Raised by a backend for an operation that would take unreasonably long at this size.
+    """
+
+
+class Backend(ABC):
+    """
+    The interface the benchmark drives. A new structure is benchmarked by subclassing this, implementing every
+    abstract method, and adding it to `BACKENDS`. `construct` defaults to `insert_all`.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def insert_all(self, keys: list[int]):
+        """
+        Inserts `keys` one at a time, in the given order.
+        """
+
+    def construct(self, keys: list[int]):
+        self.insert_all(keys)
+
+    @abstractmethod
+    def exists(self, key: int) -> bool:
+        """
+        Whether `key` is in the structure.
+        """
+
+    @abstractmethod
+    def range_scan(self, lo: int, hi: int) -> int:
+        """
+        The number of keys in `[lo, hi]`, found by actually visiting them.
+        """
+
+    @abstractmethod
+    def traverse(self) -> int:
+        """
+        The number of keys, found by one full in-order pass.
+        """
+
+    @abstractmethod
+    def height(self) -> int:
+        """
+        The number of levels, or an equivalent depth measure for flat structures.
+        """
+
+
+class BSTBackend(Backend):
+    name = "bstnode"
+
+    def __init__(self):
+        self.root = BSTNode()
+
+    def insert_all(self, keys: list[int]):
+        insert = self.root.insert
+        for key in keys:
+            insert(key)
+
+    def exists(self, key: int) -> bool:
+        return self.root.exists(key)
+
+    def range_scan(self, lo: int, hi: int) -> int:
+        return len(self.root.search_range(lo, hi))
+
+    def traverse(self) -> int:
+        return sum(1 for _ in self.root.iter_inorder())
+
+    def height(self) -> int:
+        if self.root.val is None:
+            return 0
+        deepest = 0
+        stack: list[tuple[BSTNode, int]] = [(self.root, 1)]
+        while stack:
+            node, depth = stack.pop()
+            deepest = max(deepest, depth)
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return deepest
+
+
+class RBTreeBackend(Backend):
+    name = "rbtree"
+
+    def __init__(self):
+        self.tree = RBTree()
+
+    def insert_all(self, keys: list[int]):
+        insert = self.tree.insert
+        for key in keys:
+            insert(key)
+
+    def construct(self, keys: list[int]):
+        self.tree = RBTree.from_iterable(keys)
+
+    def exists(self, key: int) -> bool:
+        return self.tree.exists(key)
+
+    def range_scan(self, lo: int, hi: int) -> int:
+        return sum(1 for _ in self.tree.irange(lo, hi))
+
+    def traverse(self) -> int:
+        return sum(1 for _ in self.tree)
+
+    def height(self) -> int:
+        return self.tree.validate(max_errors=0).height
+
+
+class BTreeBackend(Backend):
+    name = "btree"
+
+    def __init__(self):
+        self.tree = BTree()
+
+    def insert_all(self, keys: list[int]):
+        insert = self.tree.insert
+        for key in keys:
+            insert(key)
+
+    def construct(self, keys: list[int]):
+        self.tree = BTree.from_iterable(keys)
+
+    def exists(self, key: int) -> bool:
+        return self.tree.exists(key)
+
+    def range_scan(self, lo: int, hi: int) -> int:
+        return sum(1 for _ in self.tree.irange(lo, hi))
+
+    def traverse(self) -> int:
+        return sum(1 for _ in self.tree)
+
+    def height(self) -> int:
+        return self.tree.height()
+
+
+class SortedListBackend(Backend):
+    """
+    The baseline: a plain sorted `list` searched with `bisect`. Inserting is O(n) per key, so `insert` is skipped
+    once the list gets large.
+    """
+
+    name = "sorted_list"
+    max_insert_size = 200_000
+
+    def __init__(self):
+        self.keys: list[int] = []
+
+    def insert_all(self, keys: list[int]):
+        if len(keys) > self.max_insert_size:
+            raise Skip(f"insort is O(n) per key above {self.max_insert_size} keys")
+        items = self.keys
+        for key in keys:
+            i = bisect.bisect_left(items, key)
+            if i == len(items) or items[i] != key:
+                items.insert(i, key)
+
+    def construct(self, keys: list[int]):
+        self.keys = sorted(set(keys))
+
+    def exists(self, key: int) -> bool:
+        items = self.keys
+        i = bisect.bisect_left(items, key)
+        return i < len(items) and items[i] == key
+
+    def range_scan(self, lo: int, hi: int) -> int:
+        items = self.keys
+        return len(items[bisect.bisect_left(items, lo) : bisect.bisect_right(items, hi)])
+
+    def traverse(self) -> int:
+        return sum(1 for _ in self.keys)
+
+    def height(self) -> int:
+        return 1
+
+
+BACKENDS: dict[str, Callable[[], Backend]] = {
+    backend.name: backend for backend in (BSTBackend, RBTreeBackend, BTreeBackend, SortedListBackend)
+}
+
+
+def make_keys(distribution: str, size: int, rng: random.Random) -> list[int]:
+    """
+    Returns `size` keys in insertion order. Keys are spread over a range wider than `size` so lookups can miss.
+    - `zipfian` repeats a few hot keys many times (exponent 1.1), so it has far fewer distinct keys than `size`.
+    - `clustered` is made of runs of consecutive keys around random starting points, inserted in random order.
+    """
+    if distribution == "random":
+        return rng.sample(range(size * 4), size)
+    if distribution == "sorted":
+        return list(range(0, size * 2, 2))
+    if distribution == "reverse":
+        return list(range(size * 2 - 2, -1, -2))
+    if distribution == "zipfian":
+        ranks = rng.sample(range(size * 4), size)
+        weights = list(accumulate(1.0 / (k**1.1) for k in range(1, size + 1)))
+        return rng.choices(ranks, cum_weights=weights, k=size)
+    if distribution == "clustered":
+        run = max(1, int(size**0.5))
+        keys: list[int] = []
+        while len(keys) < size:
+            start = rng.randrange(size * 100)
+            keys.extend(range(start, start + min(run, size - len(keys))))
+        rng.shuffle(keys)
+        return keys
+    raise ValueError(f"unknown distribution {distribution!r}")
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _peak_memory(build: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        kept = build()  # noqa: F841 - keep the structure alive until the peak is read
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(
+    name: str,
+    distribution: str,
+    size: int,
+    ops: Iterable[str],
+    repeat: int,
+    seed: int,
+    memory: bool,
+) -> list[dict[str, Any]]:
+    """
+    Benchmarks one backend on one distribution and size, and returns one result row per operation.
+    """
+    rng = random.Random(seed)
+    keys = make_keys(distribution, size, rng)
+    present = sorted(set(keys))
+    probe_count = min(size, 200_000)
+    probes = [rng.choice(present) for _ in range(probe_count // 2)]
+    probes += [rng.randrange(-size, size * 5) for _ in range(probe_count - len(probes))]
+    rng.shuffle(probes)
+    scans = []
+    for _ in range(min(1000, len(present))):
+        i = rng.randrange(len(present))
+        scans.append((present[i], present[min(i + RANGE_WIDTH - 1, len(present) - 1)]))
+
+    factory = BACKENDS[name]
+    rows: list[dict[str, Any]] = []
+    built: Backend | None = None
+    height: int | None = None
+    peak: int | None = None
+    for op in ops:
+        row: dict[str, Any] = {
+            "structure": name,
+            "distribution": distribution,
+            "size": size,
+            "op": op,
+        }
+        rows.append(row)
+        try:
+            best = float("inf")
+            for _ in range(repeat):
+                if op in ("insert", "construct"):
+                    backend = factory()
+                    method = backend.insert_all if op == "insert" else backend.construct
+                    best = min(best, _timed(lambda: method(keys)))
+                    count = size
+                    if op == "insert" or built is None:
+                        built = backend
+                else:
+                    if built is None:
+                        backend = factory()
+                        backend.construct(keys)
+                        built = backend
+                    backend = built
+                    if op == "exists":
+                        best = min(best, _timed(lambda: [backend.exists(k) for k in probes]))
+                        count = len(probes)
+                    elif op == "range":
+                        best = min(
+                            best, _timed(lambda: [backend.range_scan(lo, hi) for lo, hi in scans])
+                        )
+                        count = len(scans)
+                    elif op == "traverse":
+                        best = min(best, _timed(backend.traverse))
+                        count = len(present)
+                    else:
+                        raise ValueError(f"unknown operation {op!r}")
+            row["seconds"] = best
+            row["ops_per_sec"] = count / best if best > 0 else float("inf")
+        except Skip as skip:
+            row["skipped"] = str(skip)
+        except RecursionError:
+            row["error"] = "RecursionError"
+    if built is not None:
+        try:
+            height = built.height()
+            if memory:
+                def build() -> Backend:
+                    backend = factory()
+                    backend.construct(keys)
+                    return backend
+
+                peak = _peak_memory(build)
+        except (Skip, RecursionError):
+            pass
+    for row in rows:
+        row["height"] = height
+        row["peak_memory_bytes"] = peak
+    return rows
+
+
+def run_suite(
+    sizes: Iterable[int],
+    distributions: Iterable[str] = DISTRIBUTIONS,
+    structures: Iterable[str] = tuple(BACKENDS),
+    ops: Iterable[str] = OPERATIONS,
+    repeat: int = 1,
+    seed: int = 10,
+    memory: bool = True,
+) -> dict[str, Any]:
+    ops = tuple(ops)
+    results: list[dict[str, Any]] = []
+    for size in sizes:
+        for distribution in distributions:
+            for name in structures:
+                results.extend(bench_case(name, distribution, size, ops, repeat, seed, memory))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def bench_threads(
+    readers: int, writers: int, size: int, ops_per_thread: int = 20_000, seed: int = 10
+) -> dict[str, Any]:
+    """
+    Starts `readers` threads doing `exists` and `writers` threads doing `insert` on one `ConcurrentRBTree` that
+    already holds `size` keys, all released at once, and measures the combined throughput of each kind.
+    """
+    rng = random.Random(seed)
+    tree = ConcurrentRBTree(rng.sample(range(size * 4), size))
+    start = threading.Barrier(readers + writers + 1)
+    elapsed: dict[str, list[float]] = {"read": [], "write": []}
+
+    def reader(probes: list[int]):
+        start.wait()
+        began = time.perf_counter()
+        for key in probes:
+            tree.exists(key)
+        elapsed["read"].append(time.perf_counter() - began)
+
+    def writer(keys: list[int]):
+        start.wait()
+        began = time.perf_counter()
+        for key in keys:
+            tree.insert(key)
+        elapsed["write"].append(time.perf_counter() - began)
+
+    threads = [
+        threading.Thread(target=reader, args=([rng.randrange(size * 4) for _ in range(ops_per_thread)],))
+        for _ in range(readers)
+    ]
+    threads += [
+        threading.Thread(target=writer, args=([rng.randrange(size * 4, size * 8) for _ in range(ops_per_thread)],))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    return {
+        "readers": readers,
+        "writers": writers,
+        "size": size,
+        "reads_per_sec": readers * ops_per_thread / max(elapsed["read"]) if readers else 0.0,
+        "writes_per_sec": writers * ops_per_thread / max(elapsed["write"]) if writers else 0.0,
+        "write_batches": tree.batches,
+        "gil_enabled": is_gil_enabled(),
+    }
+
+
+def find_regressions(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """
+    Compares rows with the same structure, distribution, size and op. A row regressed if its ops/sec dropped by more
+    than `threshold` (0.2 = 20%) compared to the baseline. Rows missing from either side are ignored.
+    """
+    def key(row: dict[str, Any]) -> tuple[Any, ...]:
+        return (row["structure"], row["distribution"], row["size"], row["op"])
+
+    old = {key(row): row for row in baseline["results"] if "ops_per_sec" in row}
+    regressions: list[str] = []
+    for row in current["results"]:
+        before = old.get(key(row))
+        if before is None or "ops_per_sec" not in row:
+            continue
+        if row["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                "{} {} n={} {}: {:.0f} ops/sec, baseline {:.0f}".format(
+                    *key(row), row["ops_per_sec"], before["ops_per_sec"]
+                )
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS))
+    parser.add_argument("--structures", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=1, help="best of N timings per operation")
+    parser.add_argument("--seed", type=int, default=10)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--threads", nargs="+", default=[], help="reader:writer thread counts, e.g. 4:1")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        args.sizes,
+        args.distributions,
+        args.structures,
+        args.ops,
+        repeat=args.repeat,
+        seed=args.seed,
+        memory=not args.no_memory,
+    )
+    if args.threads:
+        results["concurrency"] = [
+            bench_threads(*map(int, ratio.split(":")), size=args.sizes[-1], seed=args.seed)
+            for ratio in args.threads
+        ]
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
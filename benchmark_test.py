@@ -0,0 +1,56 @@
+from __future__ import annotations
+import benchmark
+import json
+import pytest
+
+
+def test_run_suite_rows():
+    results = benchmark.run_suite([300], repeat=1, seed=1)
+    json.dumps(results)
+    rows = results["results"]
+    assert len(rows) == len(benchmark.BACKENDS) * len(benchmark.DISTRIBUTIONS) * len(
+        benchmark.OPERATIONS
+    )
+    for row in rows:
+        assert row["ops_per_sec"] > 0
+        assert row["height"] >= 1 and row["peak_memory_bytes"] > 0
+    rb_heights = {row["height"] for row in rows if row["structure"] == "rbtree"}
+    assert max(rb_heights) <= 2 * 9
+
+
+def test_distributions():
+    import random
+
+    for distribution in benchmark.DISTRIBUTIONS:
+        keys = benchmark.make_keys(distribution, 1000, random.Random(3))
+        assert len(keys) == 1000
+    assert benchmark.make_keys("sorted", 5, random.Random(3)) == [0, 2, 4, 6, 8]
+
+
+def test_regressions_against_baseline(tmp_path):
+    baseline = benchmark.run_suite([200], ["random"], ["rbtree"], ["exists"], memory=False)
+    slower = json.loads(json.dumps(baseline))
+    slower["results"][0]["ops_per_sec"] = baseline["results"][0]["ops_per_sec"] * 0.5
+    assert benchmark.find_regressions(baseline, baseline, 0.2) == []
+    assert len(benchmark.find_regressions(slower, baseline, 0.2)) == 1
+
+    path = tmp_path / "baseline.json"
+    faster = json.loads(json.dumps(baseline))
+    faster["results"][0]["ops_per_sec"] = float("1e30")
+    path.write_text(json.dumps(faster))
+    args = ["--sizes", "200", "--distributions", "random", "--structures", "rbtree"]
+    args += ["--ops", "exists", "--no-memory", "--output", str(tmp_path / "out.json")]
+    assert benchmark.main(args + ["--baseline", str(path)]) == 1
+    assert benchmark.main(args) == 0
+
+
+def test_backend_interface_is_abstract():
+    class Incomplete(benchmark.Backend):
+        name = "incomplete"
+
+        def insert_all(self, keys):
+            pass
+
+    with pytest.raises(TypeError, match="exists"):
+        Incomplete()
+    assert all(backend() for backend in benchmark.BACKENDS.values())
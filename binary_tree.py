@@ -1,5 +1,12 @@
 from __future__ import annotations
-from typing import List, Any
+import math
+from typing import TYPE_CHECKING, Any, ContextManager, Iterable, Iterator, List
+
+from tree_file import dump
+from tree_stats import TreeStats, instrument
+
+if TYPE_CHECKING:
+    from frozen_tree import FrozenTree
 # from dataclasses import dataclass, field
 
 
@@ -18,18 +25,321 @@ class BinarySearchTree:
     - An ordered binary tree, that is deeper than it is wide, will be O(n) for operations performed on it.
     - - The BSTNode class is a normal BST, and allows for this to occur.
     - - See RBTree below for an alternative type of BST.
+    - - This class is a third option: it keeps a `BSTNode` tree balanced, scapegoat style.
+
+    ### Scapegoat balancing
+    Nodes stay plain `BSTNode`s with no extra fields. The tree only tracks its `size`, and `max_size`, the largest
+    size since the last full rebuild. `alpha` (between 0.5 and 1) sets how lopsided a subtree may get.
+    1. `insert` walks down with a loop and remembers the path. If the new node is deeper than `log(size)` in base
+       `1/alpha`, some ancestor on the path (the scapegoat) must have a child holding more than `alpha` of its nodes.
+       Walking back up the path and counting subtree sizes finds it, and its subtree is rebuilt perfectly balanced
+       in linear time.
+    2. `delete` is a loop too. Once `size` drops below `alpha * max_size`, the whole tree is rebuilt.
+    - Rebuilds are rare enough that every operation costs amortized O(log(n)) on any input order, and nothing
+      recurses deeper than the (balanced) tree.
+    """
+
+    node_class: type[BSTNode]
+
+    def __init__(self, values: Iterable[int] = (), alpha: float = 2 / 3):
+        if not 0.5 < alpha < 1:
+            raise ValueError("alpha must be between 0.5 and 1")
+        self.alpha = alpha
+        self.root: BSTNode | None = None
+        self.size = 0
+        self.max_size = 0
+        for val in values:
+            self.insert(val)
+
+    @classmethod
+    def from_sorted(cls, iterable: Iterable[int], alpha: float = 2 / 3) -> BinarySearchTree:
+        """
+        Builds a perfectly balanced tree from strictly ascending values in O(n), with the same `_build` as a rebuild.
+        Raises `ValueError` if the values are not strictly ascending.
+        """
+        tree = cls(alpha=alpha)
+        nodes = [tree.node_class(val) for val in iterable]
+        for i in range(1, len(nodes)):
+            if not nodes[i - 1].val < nodes[i].val:  # type: ignore
+                raise ValueError("from_sorted() requires strictly ascending values")
+        tree.root = _build(nodes, 0, len(nodes))
+        tree.size = tree.max_size = len(nodes)
+        return tree
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_inorder()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.iter_reversed()
+
+    def _depth_limit(self) -> int:
+        """
+        The deepest a node may be (counting edges from the root) before the tree counts as unbalanced.
+        """
+        return int(math.log(self.size) / math.log(1 / self.alpha)) if self.size > 1 else 0
+
+    def insert(self, val: int) -> BSTNode:
+        """
+        Adds `val` and returns the node holding it. A duplicate is not added again, its existing node is returned.
+        """
+        if self.root is None:
+            self.root = self.node_class(val)
+            self.size = self.max_size = 1
+            return self.root
+        path: list[BSTNode] = []
+        node = self.root
+        while True:
+            path.append(node)
+            if val == node.val:
+                return node
+            if val < node.val:  # type: ignore
+                if node.left is None:
+                    new_node = node.left = self.node_class(val)
+                    break
+                node = node.left
+            else:
+                if node.right is None:
+                    new_node = node.right = self.node_class(val)
+                    break
+                node = node.right
+        self.size += 1
+        self.max_size = max(self.max_size, self.size)
+        if len(path) > self._depth_limit():
+            self._rebuild_scapegoat(path, new_node)
+        return new_node
+
+    def _rebuild_scapegoat(self, path: list[BSTNode], new_node: BSTNode):
+        """
+        Walks back up `path` from `new_node`, counting subtree sizes, and rebuilds the subtree of the first ancestor
+        whose child on the path holds more than `alpha` of its nodes.
+        """
+        child = new_node
+        child_size = 1
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            sibling = node.right if node.left is child else node.left
+            size = child_size + 1 + _count(sibling)
+            if child_size > self.alpha * size:
+                self._rebuild(node, path[i - 1] if i else None)
+                return
+            child = node
+            child_size = size
+
+    def _rebuild(self, node: BSTNode, parent: BSTNode | None):
+        """
+        Replaces the subtree under `node` with a perfectly balanced one made of the same nodes, in linear time.
+        """
+        nodes = _flatten(node)
+        balanced = _build(nodes, 0, len(nodes))
+        if parent is None:
+            self.root = balanced
+        elif parent.left is node:
+            parent.left = balanced
+        else:
+            parent.right = balanced
+
+    def _find(self, val: int) -> BSTNode | None:
+        node = self.root
+        while node is not None:
+            if val == node.val:
+                return node
+            node = node.left if val < node.val else node.right  # type: ignore
+        return None
+
+    def exists(self, val: int) -> bool:
+        return self._find(val) is not None
+
+    def delete(self, val: int) -> bool:
+        """
+        Removes `val` and returns whether it was found. Uses the same cases as `BSTNode.delete`, but with a loop:
+        a node with two children takes the value of its successor, and the successor node is unlinked instead.
+        """
+        parent: BSTNode | None = None
+        node = self.root
+        while node is not None and node.val != val:
+            parent = node
+            node = node.left if val < node.val else node.right  # type: ignore
+        if node is None:
+            return False
+        if node.left is not None and node.right is not None:
+            successor_parent = node
+            successor = node.right
+            while successor.left is not None:
+                successor_parent = successor
+                successor = successor.left
+            self._move_entry(node, successor)
+            if successor_parent is node:
+                successor_parent.right = successor.right
+            else:
+                successor_parent.left = successor.right
+        else:
+            child = node.left if node.left is not None else node.right
+            if parent is None:
+                self.root = child
+            elif parent.left is node:
+                parent.left = child
+            else:
+                parent.right = child
+        self.size -= 1
+        if self.size <= self.alpha * self.max_size:
+            if self.root is not None:
+                self._rebuild(self.root, None)
+            self.max_size = self.size
+        return True
+
+    def _move_entry(self, node: BSTNode, source: BSTNode):
+        """
+        Copies what `source` holds into `node`, before `delete` unlinks `source`. Subclasses with more than a value
+        per node (see `sorted_map.py`) copy that too.
+        """
+        node.val = source.val
+
+    def get_min(self) -> int | None:
+        return self.root.get_min() if self.root is not None else None
+
+    def get_max(self) -> int | None:
+        return self.root.get_max() if self.root is not None else None
+
+    def height(self) -> int:
+        """
+        The number of levels in the tree, counted with a stack rather than recursion.
+        """
+        deepest = 0
+        stack: list[tuple[BSTNode, int]] = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            deepest = max(deepest, depth)
+            if node.left is not None:
+                stack.append((node.left, depth + 1))
+            if node.right is not None:
+                stack.append((node.right, depth + 1))
+        return deepest
+
+    def search_range(self, lower_bound: int, upper_bound: int) -> List[int]:
+        return self.root.search_range(lower_bound, upper_bound) if self.root is not None else []
+
+    def irange(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Lazily yields the values between `lo` and `hi` in sorted order, with the same arguments as `RBTree.irange`.
+        """
+        for node in self._irange_nodes(lo, hi, inclusive, reverse):
+            yield node.val  # type: ignore
+
+    def _irange_nodes(
+        self,
+        lo: Any = None,
+        hi: Any = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[BSTNode]:
+        """
+        An in-order walk with a stack that never enters a subtree lying wholly outside the range, so O(log(n) + k).
+        """
+
+        def below(val: Any) -> bool:
+            return lo is not None and (val < lo or (val == lo and not inclusive[0]))
+
+        def above(val: Any) -> bool:
+            return hi is not None and (val > hi or (val == hi and not inclusive[1]))
+
+        # * walking in reverse is the same walk with the roles of the two children and the two bounds swapped
+        first, second = ("right", "left") if reverse else ("left", "right")
+        skip_first, stop = (above, below) if reverse else (below, above)
+        stack: list[BSTNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                if skip_first(node.val):
+                    node = getattr(node, second)
+                else:
+                    stack.append(node)
+                    node = getattr(node, first)
+            if not stack:
+                return
+            node = stack.pop()
+            if stop(node.val):
+                return
+            yield node
+            node = getattr(node, second)
+
+    def iter_inorder(self) -> Iterator[int]:
+        return self.root.iter_inorder() if self.root is not None else iter(())
+
+    def iter_reversed(self) -> Iterator[int]:
+        return self.root.iter_reversed() if self.root is not None else iter(())
+
+    def iter_preorder(self) -> Iterator[int]:
+        return self.root.iter_preorder() if self.root is not None else iter(())
+
+    def iter_postorder(self) -> Iterator[int]:
+        return self.root.iter_postorder() if self.root is not None else iter(())
+
+
+def _count(node: BSTNode | None) -> int:
+    count = 0
+    stack = [node] if node is not None else []
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.left is not None:
+            stack.append(node.left)
+        if node.right is not None:
+            stack.append(node.right)
+    return count
+
+
+def _flatten(node: BSTNode) -> list[BSTNode]:
     """
+    The nodes of a subtree in ascending order, collected with a stack.
+    """
+    nodes: list[BSTNode] = []
+    stack: list[BSTNode] = []
+    current: BSTNode | None = node
+    while stack or current is not None:
+        while current is not None:
+            stack.append(current)
+            current = current.left
+        current = stack.pop()
+        nodes.append(current)
+        current = current.right
+    return nodes
+
 
-    pass
+def _build(nodes: list[BSTNode], lo: int, hi: int) -> BSTNode | None:
+    """
+    Relinks `nodes[lo:hi]` (ascending) into a perfectly balanced subtree around the middle node, and returns its root.
+    """
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _build(nodes, lo, mid)
+    node.right = _build(nodes, mid + 1, hi)
+    return node
 
 
 class BSTNode:
     """
     The building blocks of a BST are Nodes. In our implementation, we will only use a single class, the `BSTNode` class.
     Any `BSTNode` is technically also a full Binary Search Tree, with itself as the root node. Each method that traverses
-    the tree will do so recursively.
+    the tree will do so recursively, except for the `iter_*` generators, which keep their own stack so that they work on
+    trees of any depth.
     """
 
+    _stats: TreeStats | None = None
+
     def __init__(self, val: int | None = None):  # type: ignore
         self.left: BSTNode | None = None
         self.right: BSTNode | None = None
@@ -54,6 +364,19 @@ class BSTNode:
             self.right.insert(val)
             return
 
+    def instrument(self) -> ContextManager[TreeStats]:
+        """
+        Returns a context manager that counts the length and comparisons of every `insert`/`exists` descent started
+        from this node while it is active. See `tree_stats.py`.
+        """
+        return instrument(self)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        A snapshot of the counters from the current or most recent `instrument()` block (all zero if there was none).
+        """
+        return (self._stats or TreeStats()).snapshot()
+
     def get_min(self: BSTNode) -> int | None:
         current: BSTNode = self
         while current.left is not None:
@@ -118,42 +441,129 @@ class BSTNode:
             self.right = self.right.delete(min_larger_node.val)  # type: ignore
         return self
 
-    def preorder(self, visited: List[Any] = []) -> List[Any]:
+    def preorder(self, visited: List[Any] | None = None) -> List[Any]:
         """
         Starting from any node in the tree, this will traverse the tree and will return a list of values in the order in
         which a node was visited, from the top down.
         """
-        visited.append(self.val)
-        if self.left:
-            self.left.preorder(visited)
-        if self.right:
-            self.right.preorder(visited)
+        if visited is None:
+            visited = []
+        visited.extend(self.iter_preorder())
         return visited
 
-    def postorder(self, visited: List[Any] = []) -> List[Any]:
+    def postorder(self, visited: List[Any] | None = None) -> List[Any]:
         """
         Starting from any node in the tree, this will traverse the tree and will return a list of values in the order in
         which a node was visited, from the bottom up.
         """
-        if self.left:
-            self.left.postorder(visited)
-        if self.right:
-            self.right.postorder(visited)
-        visited.append(self.val)
+        if visited is None:
+            visited = []
+        visited.extend(self.iter_postorder())
         return visited
 
-    def inorder(self, visited: List[Any] = []) -> List[Any]:
+    def inorder(self, visited: List[Any] | None = None) -> List[Any]:
         """
         Starting from any node in the tree, this will traverse the tree and will append the values on the left side of
         every subtree, and return a list ordered from highest to lowest by value rather than position.
         """
-        if self.left:
-            self.left.inorder(visited)
-        visited.append(self.val)
-        if self.right:
-            self.right.inorder(visited)
+        if visited is None:
+            visited = []
+        visited.extend(self.iter_inorder())
         return visited
 
+    def iter_preorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from the top down. The stack holds at most one pending right child per level.
+        """
+        if self.val is None:
+            return
+        stack: list[BSTNode] = [self]
+        while stack:
+            node = stack.pop()
+            yield node.val  # type: ignore
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def iter_inorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from lowest to highest.
+        1. Push the current node and go left until there is no left child.
+        2. Pop a node, yield it, and continue from its right child.
+        """
+        if self.val is None:
+            return
+        stack: list[BSTNode] = []
+        node: BSTNode | None = self
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.val  # type: ignore
+            node = node.right
+
+    def iter_reversed(self) -> Iterator[int]:
+        """
+        Lazily yields the values from highest to lowest, the mirror image of `iter_inorder`.
+        """
+        if self.val is None:
+            return
+        stack: list[BSTNode] = []
+        node: BSTNode | None = self
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.val  # type: ignore
+            node = node.left
+
+    def iter_postorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from the bottom up. A node on top of the stack is only yielded once its right
+        subtree has been finished, which is the case when that subtree's root was the last node yielded.
+        """
+        if self.val is None:
+            return
+        stack: list[BSTNode] = []
+        node: BSTNode | None = self
+        last: BSTNode | None = None
+        while stack or node:
+            if node:
+                stack.append(node)
+                node = node.left
+                continue
+            top = stack[-1]
+            if top.right and top.right is not last:
+                node = top.right
+            else:
+                yield top.val  # type: ignore
+                last = stack.pop()
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_inorder()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.iter_reversed()
+
+    def freeze(self) -> FrozenTree:
+        """
+        Returns an immutable NumPy snapshot of the values below this node for vectorized batch lookups.
+        See `frozen_tree.py`. Requires `numpy`.
+        """
+        from frozen_tree import FrozenTree
+
+        return FrozenTree.from_sorted(list(self.iter_inorder()))
+
+    def save(self, path: str, layout: str = "sorted"):
+        """
+        Writes the values to a versioned binary file that `tree_file.MappedTree` can open without deserializing.
+        `layout` is `"sorted"` or `"eytzinger"`. See `tree_file.py`.
+        """
+        dump(self.iter_inorder(), path, layout)
+
     def exists(self: BSTNode, val: int) -> bool:
         """
         Given a value, this method will search the tree in O(log(n)) for the node that has the input value and returns whether it exists.
@@ -183,3 +593,147 @@ class BSTNode:
         if self.right and self.val < upper_bound:
             result.extend(self.right.search_range(lower_bound, upper_bound))
         return result
+
+
+# * assigned here because `BSTNode` is defined below `BinarySearchTree`
+BinarySearchTree.node_class = BSTNode
+
+
+class TombstoneNode(BSTNode):
+    """
+    A `BSTNode` that can be marked `dead` instead of being unlinked. The default is a class attribute, so live nodes
+    take no extra memory.
+    """
+
+    dead: bool = False
+
+
+class LazyBinarySearchTree(BinarySearchTree):
+    """
+    - 𝗔 `𝗕𝗶𝗻𝗮𝗿𝘆𝗦𝗲𝗮𝗿𝗰𝗵𝗧𝗿𝗲𝗲` 𝘁𝗵𝗮𝘁 𝗱𝗲𝗹𝗲𝘁𝗲𝘀 𝗹𝗮𝘇𝗶𝗹𝘆: `𝗱𝗲𝗹𝗲𝘁𝗲` 𝗼𝗻𝗹𝘆 𝗺𝗮𝗿𝗸𝘀 𝘁𝗵𝗲 𝗻𝗼𝗱𝗲 𝗮𝘀 𝗮 𝘁𝗼𝗺𝗯𝘀𝘁𝗼𝗻𝗲.
+    - A delete is one walk down, O(depth), that changes no pointers: no successor search, no relinking.
+    - Dead nodes still guide searches, but are skipped by everything that reports values: `exists`/`in`,
+      `search_range`, `get_min`/`get_max`, `irange`, the `iter_*` traversals and `len`.
+    - `insert` of a value whose node is dead just brings the node back.
+    - Once more than `max_dead_ratio` of the nodes are dead, `compact` collects the live nodes in order and relinks
+      them into a perfectly balanced tree, in one linear pass. A burst of deletes costs one rebuild instead of one
+      restructuring each.
+    - `size` counts every node, dead or alive, because the scapegoat depth limit is about the shape of the tree.
+      `dead` is the number of tombstones, and `len` is `size - dead`.
+    """
+
+    node_class = TombstoneNode
+
+    def __init__(self, values: Iterable[int] = (), alpha: float = 2 / 3, max_dead_ratio: float = 0.25):
+        if not 0 < max_dead_ratio < 1:
+            raise ValueError("max_dead_ratio must be between 0 and 1")
+        self.max_dead_ratio = max_dead_ratio
+        self.dead = 0
+        super().__init__(values, alpha)
+
+    def __len__(self) -> int:
+        return self.size - self.dead
+
+    def insert(self, val: int) -> TombstoneNode:
+        node: TombstoneNode = super().insert(val)  # type: ignore
+        if node.dead:
+            node.dead = False
+            self.dead -= 1
+        return node
+
+    def exists(self, val: int) -> bool:
+        node: TombstoneNode | None = self._find(val)  # type: ignore
+        return node is not None and not node.dead
+
+    def delete(self, val: int) -> bool:
+        """
+        Marks `val` as dead and returns whether it was there (and alive). Compacts the tree if that pushed the share
+        of dead nodes over `max_dead_ratio`.
+        """
+        node: TombstoneNode | None = self._find(val)  # type: ignore
+        if node is None or node.dead:
+            return False
+        node.dead = True
+        self.dead += 1
+        if self.dead > self.max_dead_ratio * self.size:
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        Drops every dead node and rebuilds the rest perfectly balanced. O(n)
+        """
+        nodes = [node for node in _flatten(self.root) if not node.dead] if self.root is not None else []  # type: ignore
+        self.root = _build(nodes, 0, len(nodes))
+        self.size = self.max_size = len(nodes)
+        self.dead = 0
+
+    def get_min(self) -> int | None:
+        return next(self.irange(), None)
+
+    def get_max(self) -> int | None:
+        return next(self.irange(reverse=True), None)
+
+    def search_range(self, lower_bound: int, upper_bound: int) -> List[int]:
+        """
+        The live values in `[lower_bound, upper_bound]`, in preorder like `BSTNode.search_range`, but with a stack.
+        """
+        result: list[int] = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node: TombstoneNode = stack.pop()  # type: ignore
+            if lower_bound <= node.val <= upper_bound and not node.dead:  # type: ignore
+                result.append(node.val)  # type: ignore
+            if node.right is not None and node.val < upper_bound:  # type: ignore
+                stack.append(node.right)
+            if node.left is not None and node.val > lower_bound:  # type: ignore
+                stack.append(node.left)
+        return result
+
+    def _irange_nodes(
+        self,
+        lo: Any = None,
+        hi: Any = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[BSTNode]:
+        for node in super()._irange_nodes(lo, hi, inclusive, reverse):
+            if not node.dead:  # type: ignore
+                yield node
+
+    def iter_inorder(self) -> Iterator[int]:
+        return self.irange()
+
+    def iter_reversed(self) -> Iterator[int]:
+        return self.irange(reverse=True)
+
+    def iter_preorder(self) -> Iterator[int]:
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node: TombstoneNode = stack.pop()  # type: ignore
+            if not node.dead:
+                yield node.val  # type: ignore
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
+    def iter_postorder(self) -> Iterator[int]:
+        """
+        The same walk as `BSTNode.iter_postorder`, skipping dead nodes.
+        """
+        stack: list[TombstoneNode] = []
+        node: TombstoneNode | None = self.root  # type: ignore
+        last: BSTNode | None = None
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left  # type: ignore
+                continue
+            top = stack[-1]
+            if top.right is not None and top.right is not last:
+                node = top.right  # type: ignore
+            else:
+                if not top.dead:
+                    yield top.val  # type: ignore
+                last = stack.pop()
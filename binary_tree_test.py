@@ -0,0 +1,135 @@
+from __future__ import annotations
+from binary_tree import BinarySearchTree, BSTNode, LazyBinarySearchTree
+import math
+import random
+
+
+def chain(values: list[int]) -> BSTNode:
+    """
+    Builds the right-leaning linked list that `BSTNode.insert` produces from ascending input, without recursing.
+    """
+    root = BSTNode(values[0])
+    node = root
+    for val in values[1:]:
+        node.right = BSTNode(val)
+        node = node.right
+    return root
+
+
+# ===================Helper functions above===============
+
+
+def test_traversals():
+    random.seed(10)
+    values = random.sample(range(1000), 200)
+    root = BSTNode()
+    for val in values:
+        root.insert(val)
+    assert list(root) == sorted(values)
+    assert list(reversed(root)) == sorted(values, reverse=True)
+    assert root.inorder() == sorted(values)
+    assert root.preorder()[0] == values[0]
+    assert root.postorder()[-1] == values[0]
+    assert sorted(root.preorder()) == sorted(root.postorder()) == sorted(values)
+    # * repeated calls no longer share a default list
+    assert root.inorder() == root.inorder()
+
+
+def test_traversals_on_deep_tree():
+    values = list(range(10_000))
+    root = chain(values)
+    assert list(root.iter_inorder()) == values
+    assert list(root.iter_preorder()) == values
+    assert list(root.iter_postorder()) == values[::-1]
+    assert list(reversed(root)) == values[::-1]
+
+
+def test_empty_tree():
+    root = BSTNode()
+    assert list(root) == []
+    assert root.preorder() == []
+
+
+def test_balanced_mode_on_sorted_input():
+    tree = BinarySearchTree(range(100_000))
+    assert len(tree) == 100_000
+    assert tree.height() <= math.log(100_000, 1.5) + 2
+    assert tree.exists(99_999) and not tree.exists(100_000)
+    assert list(tree.iter_inorder()) == list(range(100_000))
+    assert tree.get_min() == 0 and tree.get_max() == 99_999
+    for val in range(0, 100_000, 2):
+        assert tree.delete(val)
+    assert not tree.delete(0)
+    assert len(tree) == 50_000
+    assert tree.height() <= math.log(50_000, 1.5) + 2
+    assert list(tree) == list(range(1, 100_000, 2))
+
+
+def test_balanced_mode_matches_set():
+    random.seed(8)
+    tree = BinarySearchTree(alpha=0.75)
+    expected: set[int] = set()
+    for _ in range(20_000):
+        val = random.randint(0, 3000)
+        if random.random() < 0.6:
+            tree.insert(val)
+            expected.add(val)
+        else:
+            assert tree.delete(val) == (val in expected)
+            expected.discard(val)
+    assert list(tree) == sorted(expected) and len(tree) == len(expected)
+    assert sorted(tree.search_range(100, 200)) == sorted(v for v in expected if 100 <= v <= 200)
+    for val in list(expected):
+        tree.delete(val)
+    assert tree.root is None and list(tree) == [] and tree.get_min() is None
+
+
+def test_lazy_delete_matches_set():
+    random.seed(9)
+    tree = LazyBinarySearchTree(max_dead_ratio=0.3)
+    expected: set[int] = set()
+    compactions = 0
+    for _ in range(20_000):
+        val = random.randint(0, 3000)
+        if random.random() < 0.5:
+            tree.insert(val)
+            expected.add(val)
+        else:
+            dead_before = tree.dead
+            assert tree.delete(val) == (val in expected)
+            expected.discard(val)
+            compactions += tree.dead < dead_before
+        assert tree.dead <= 0.3 * tree.size
+    assert compactions > 0
+    assert list(tree) == sorted(expected) and len(tree) == len(expected)
+    assert list(reversed(tree)) == sorted(expected, reverse=True)
+    assert all(tree.exists(val) == (val in expected) for val in range(-5, 3005))
+    assert tree.get_min() == min(expected) and tree.get_max() == max(expected)
+    assert sorted(tree.search_range(100, 200)) == sorted(v for v in expected if 100 <= v <= 200)
+    assert list(tree.irange(100, 200, (False, True))) == sorted(v for v in expected if 100 < v <= 200)
+    assert sorted(tree.iter_preorder()) == sorted(tree.iter_postorder()) == sorted(expected)
+
+
+def test_lazy_delete_tombstones_and_compaction():
+    tree = LazyBinarySearchTree(range(100), max_dead_ratio=0.5)
+    root = tree.root
+    for val in range(0, 100, 3):
+        assert tree.delete(val)
+    assert not tree.delete(0)
+    # * tombstones only: the shape is untouched, so the root is the same node
+    assert tree.root is root and tree.size == 100 and tree.dead == 34 and len(tree) == 66
+    assert tree.get_min() == 1 and tree.get_max() == 98
+    assert 3 not in tree and 4 in tree
+    tree.insert(3)
+    assert 3 in tree and tree.dead == 33 and tree.size == 100
+    for val in range(1, 100, 3):
+        tree.delete(val)
+    # * the 51st tombstone crossed the ratio: everything dead up to then was dropped in one rebuild
+    assert len(tree) == 34 and tree.size == 49 and tree.dead == 15
+    assert list(tree) == sorted([3] + list(range(2, 100, 3)))
+    tree.compact()
+    assert tree.dead == 0 and tree.size == len(tree) == 34
+    assert tree.height() <= math.ceil(math.log2(len(tree) + 1))
+    for val in list(tree):
+        tree.delete(val)
+    assert tree.root is None and len(tree) == 0 and tree.get_min() is None and tree.get_max() is None
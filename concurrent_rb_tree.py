@@ -0,0 +1,265 @@
+"""
+### A thread-safe wrapper around `RBTree`: many readers at once, one writer at a time, with writes batched.
+```
+tree = ConcurrentRBTree(values)
+# any number of threads:
+tree.exists(42), list(tree.irange(10, 20)), list(tree)
+# ingestion threads:
+tree.insert(42); tree.delete(7); tree.update(batch)
+```
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from rb_tree import RBNode, RBTree
+
+
+class RWLock:
+    """
+    - 𝗔 𝗿𝗲𝗮𝗱𝗲𝗿-𝘄𝗿𝗶𝘁𝗲𝗿 𝗹𝗼𝗰𝗸: 𝗮𝗻𝘆 𝗻𝘂𝗺𝗯𝗲𝗿 𝗼𝗳 𝗿𝗲𝗮𝗱𝗲𝗿𝘀, 𝗼𝗿 𝗲𝘅𝗮𝗰𝘁𝗹𝘆 𝗼𝗻𝗲 𝘄𝗿𝗶𝘁𝗲𝗿.
+    - Writers have priority: once a writer is waiting, new readers wait too, so a steady stream of readers can't
+      starve the writers. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class _Write:
+    __slots__ = ("insert", "val", "result", "error")
+
+    def __init__(self, insert: bool, val: int):
+        self.insert = insert
+        self.val = val
+        self.result = False
+        self.error: BaseException | None = None
+
+
+class _SizedRBTree(RBTree):
+    """
+    An `RBTree` that counts its nodes in `_link` and `delete_node`, so the combiner learns from `size` whether an
+    `insert` added a node, without a second descent. Only `insert`, `delete` and `pop_*` keep `size` right, which is
+    all `ConcurrentRBTree` uses.
+    """
+
+    size = 0
+
+    def _link(self, parent: RBNode | None, val: int, left: bool) -> RBNode:
+        self.size += 1
+        return super()._link(parent, val, left)
+
+    def delete_node(self, node: RBNode):
+        self.size -= 1
+        super().delete_node(node)
+
+
+class ConcurrentRBTree:
+    """
+    - 𝗔𝗻 `𝗥𝗕𝗧𝗿𝗲𝗲` 𝘁𝗵𝗮𝘁 𝗰𝗮𝗻 𝗯𝗲 𝘀𝗵𝗮𝗿𝗲𝗱 𝗯𝗲𝘁𝘄𝗲𝗲𝗻 𝘁𝗵𝗿𝗲𝗮𝗱𝘀.
+    - `fix_insert` and the rotations relink several nodes one assignment at a time, so a reader walking the tree in
+      the middle of one can skip or repeat values. Every read here holds the `RWLock` for reading, and every change
+      holds it for writing, so readers only ever see the tree between two writes. Readers don't block each other.
+    - Range scans and iteration collect their values into a list under the read lock and return that list, so no
+      lock is held while the caller consumes it.
+
+    ### Batched writes (flat combining)
+    `insert`, `delete` and `update` don't take the write lock for themselves. Each call appends its requests to a
+    shared queue. If no thread is combining, the caller becomes the combiner. It takes the write lock, applies
+    *everything* queued at that moment, releases the lock, signals the waiting writers, and repeats until the queue is
+    empty. Every other writer just waits on `_queue_cond` until the combiner reports its last request applied, and
+    never touches the write lock. When many threads write at once, the lock changes hands once per batch instead of
+    once per value, and readers get in between batches.
+    - A request is always applied before the call that queued it returns, and requests are applied in the order
+      they were queued.
+    - An exception raised while applying a request (values that can't be compared, ...) is stored on the request
+      and raised in the thread that queued it. The rest of the batch is still applied.
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.tree: RBTree = _SizedRBTree.from_iterable(values)
+        self.tree.size = sum(1 for _ in self.tree)  # type: ignore
+        self.lock = RWLock()
+        self._queue: list[_Write] = []
+        # * guards the queue, the two counters below and `_combining`; waiting writers sleep on it
+        self._queue_cond = threading.Condition(threading.Lock())
+        self._queued = 0
+        self._applied = 0
+        self._combining = False
+        self.batches = 0
+
+    # * reads
+
+    def __len__(self) -> int:
+        return self.tree.size  # type: ignore
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def exists(self, val: int) -> bool:
+        with self.lock.read_locked():
+            return self.tree.exists(val)
+
+    def floor(self, val: int) -> int | None:
+        with self.lock.read_locked():
+            return self.tree.floor(val)
+
+    def ceiling(self, val: int) -> int | None:
+        with self.lock.read_locked():
+            return self.tree.ceiling(val)
+
+    def irange(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> list[int]:
+        """
+        The values between `lo` and `hi`, with the same arguments as `RBTree.irange`, read under one read lock.
+        """
+        with self.lock.read_locked():
+            return list(self.tree.irange(lo, hi, inclusive, reverse))
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterates over a copy of the values taken under one read lock, so it never sees a write half applied.
+        """
+        with self.lock.read_locked():
+            values = list(self.tree)
+        return iter(values)
+
+    @contextmanager
+    def reading(self) -> Iterator[RBTree]:
+        """
+        Holds the read lock for a block and yields the underlying tree, for several reads that must see the same
+        version. The tree must not be changed inside the block.
+        """
+        with self.lock.read_locked():
+            yield self.tree
+
+    # * writes
+
+    def insert(self, val: int):
+        self._submit([_Write(True, val)])
+
+    def delete(self, val: int) -> bool:
+        """
+        Removes `val` and returns whether it was there (when the request was applied, after earlier queued writes).
+        """
+        request = _Write(False, val)
+        self._submit([request])
+        return request.result
+
+    def update(self, values: Iterable[int]):
+        """
+        Inserts all of `values` as one batch, under a single write lock.
+        """
+        self._submit([_Write(True, val) for val in values])
+
+    def _submit(self, requests: list[_Write]):
+        if not requests:
+            return
+        with self._queue_cond:
+            self._queue.extend(requests)
+            self._queued += len(requests)
+            ticket = self._queued
+            combiner = not self._combining
+            if combiner:
+                self._combining = True
+            else:
+                # * the combiner will apply our requests: wait for it instead of for the write lock
+                while self._applied < ticket:
+                    if not self._combining:
+                        # * the combiner died before it took our requests from the queue: take over
+                        self._combining = combiner = True
+                        break
+                    self._queue_cond.wait()
+        if combiner:
+            self._combine()
+        for request in requests:
+            if request.error is not None:
+                raise request.error
+
+    def _combine(self):
+        """
+        Applies batches until the queue is empty, then hands the combiner role back. The check for an empty queue and
+        giving up the role happen under `_queue_cond`, so a request queued at any moment is either seen by this loop
+        or finds nobody combining and starts a new one.
+        - If the combiner dies (a `KeyboardInterrupt`, or an error taking the write lock), the requests of its batch
+          that were not applied get a `RuntimeError`, and the role is handed back all the same. A writer still waiting
+          for its requests then finds nobody combining and takes over.
+        """
+        batch: list[_Write] = []
+        done = 0
+        finished = False
+        try:
+            while True:
+                with self._queue_cond:
+                    batch, self._queue = self._queue, []
+                    done = 0
+                    if not batch:
+                        self._combining = False
+                        finished = True
+                        return
+                with self.lock.write_locked():
+                    self.batches += 1
+                    tree: _SizedRBTree = self.tree  # type: ignore
+                    for request in batch:
+                        try:
+                            if request.insert:
+                                before = tree.size
+                                tree.insert(request.val)
+                                request.result = tree.size != before
+                            else:
+                                request.result = tree.delete(request.val)
+                        except Exception as error:
+                            request.error = error
+                        done += 1
+                with self._queue_cond:
+                    self._applied += len(batch)
+                    batch = []
+                    self._queue_cond.notify_all()
+        finally:
+            if not finished:
+                with self._queue_cond:
+                    for request in batch[done:]:
+                        request.error = RuntimeError("the write was not applied: the combining writer was interrupted")
+                    self._applied += len(batch)
+                    self._combining = False
+                    self._queue_cond.notify_all()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+from concurrent_rb_tree import ConcurrentRBTree, RWLock
+import benchmark
+import pytest
+import random
+import sys
+import threading
+import time
+
+
+# ===================Helper functions above===============
+
+
+def test_concurrent_stress():
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # * switch threads as often as possible, to hit rotations half way
+    try:
+        tree = ConcurrentRBTree(range(0, 4000, 2))
+        errors: list[str] = []
+        stop = threading.Event()
+
+        def reader(seed: int):
+            rng = random.Random(seed)
+            while not stop.is_set():
+                # * even keys are never deleted, odd keys are only ever inserted by the writers
+                key = rng.randrange(0, 4000, 2)
+                if not tree.exists(key):
+                    errors.append(f"lost {key}")
+                values = tree.irange(key, key + 50)
+                if values != sorted(values) or key not in values:
+                    errors.append(f"bad range at {key}")
+
+        def writer(seed: int):
+            rng = random.Random(seed)
+            mine = list(range(seed, 4000, 8))
+            for _ in range(3):
+                rng.shuffle(mine)
+                for key in mine:
+                    tree.insert(key)
+                for key in mine[::2]:
+                    if not tree.delete(key):
+                        errors.append(f"delete {key} missed")
+                tree.update(mine[::2])
+
+        readers = [threading.Thread(target=reader, args=(i,)) for i in range(4)]
+        writers = [threading.Thread(target=writer, args=(seed,)) for seed in (1, 3, 5, 7)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch)
+
+    assert errors == []
+    assert tree.tree.validate().valid
+    assert list(tree) == list(range(4000)) and len(tree) == 4000
+    assert tree.batches <= 4 * 3 * (500 + 250 + 1)
+
+
+def test_rwlock_excludes_writers():
+    lock = RWLock()
+    inside: list[str] = []
+    with lock.read_locked(), lock.read_locked():
+        def write():
+            with lock.write_locked():
+                inside.append("w")
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(0.05)
+        assert inside == [] and writer.is_alive()
+    writer.join()
+    assert inside == ["w"]
+
+
+def test_thread_benchmark():
+    row = benchmark.bench_threads(2, 1, 1000, ops_per_thread=500)
+    assert row["reads_per_sec"] > 0 and row["writes_per_sec"] > 0
+    assert 1 <= row["write_batches"] <= 500
+
+
+def test_waiting_writers_are_combined():
+    tree = ConcurrentRBTree()
+    acquisitions: list[int] = []
+    write_locked = tree.lock.write_locked
+
+    def counting_write_locked():
+        acquisitions.append(1)
+        return write_locked()
+
+    tree.lock.write_locked = counting_write_locked  # type: ignore
+    writers = [threading.Thread(target=tree.insert, args=(val,)) for val in range(16)]
+    with tree.lock.read_locked():
+        # * the first writer becomes the combiner and blocks on the write lock, the others queue up behind it
+        for thread in writers:
+            thread.start()
+        while tree._queued < 16:
+            time.sleep(0.001)
+    for thread in writers:
+        thread.join()
+    assert list(tree) == list(range(16)) and len(tree) == 16
+    assert len(acquisitions) == tree.batches <= 2
+
+    tree.update([])
+    assert not tree._combining
+    with pytest.raises(TypeError):
+        tree.insert("x")  # type: ignore
+    assert not tree.delete(99) and tree.delete(3) and len(tree) == 15
+
+
+def test_interrupted_combiner_hands_over():
+    class Interrupt(BaseException):
+        pass
+
+    tree = ConcurrentRBTree()
+    insert = tree.tree.insert
+
+    def interrupted_insert(val):
+        if val == 0:
+            raise Interrupt
+        return insert(val)
+
+    tree.tree.insert = interrupted_insert  # type: ignore
+    caught: list[BaseException] = []
+
+    def combiner():
+        try:
+            tree.insert(0)
+        except BaseException as error:
+            caught.append(error)
+
+    first = threading.Thread(target=combiner)
+    writers = [threading.Thread(target=tree.insert, args=(val,)) for val in range(1, 9)]
+    with tree.lock.read_locked():
+        first.start()
+        # * the first writer took its batch and is blocked on the write lock, so the others wait in the queue
+        while tree._queued < 1 or tree._queue:
+            time.sleep(0.001)
+        for thread in writers:
+            thread.start()
+        while tree._queued < 9:
+            time.sleep(0.001)
+    first.join()
+    for thread in writers:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert len(caught) == 1 and isinstance(caught[0], Interrupt)
+    assert list(tree) == list(range(1, 9)) and not tree._combining
+    tree.insert(20)
+    assert 20 in list(tree)
@@ -0,0 +1,238 @@
+"""
+### Crash-safe trees: a write-ahead log of inserts and deletes, plus periodic checkpoints of the sorted keys.
+```
+with DurableTree("data/keys") as tree:        # recovers whatever is in data/keys, or starts empty
+    tree.insert(42); tree.delete(7)
+    42 in tree, list(tree.tree.irange(10, 20))
+DurableTree("data/keys", factory=BinarySearchTree.from_sorted)  # BSTNodes instead of an RBTree
+```
+### Files in the directory
+- `checkpoint.rbt`: every key at the last checkpoint, in the `tree_file` format (sorted layout).
+- `wal.log`: every change since then, one 13 byte record each: `<BqI` = operation (1 insert, 2 delete), value,
+  and a CRC32 of the first 9 bytes.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import Any, Callable, Iterable, Iterator
+
+from rb_tree import RBTree
+from tree_file import MappedTree, dump
+
+INSERT = 1
+DELETE = 2
+HEAD = struct.Struct("<Bq")
+CRC = struct.Struct("<I")
+RECORD = struct.Struct("<BqI")
+SYNC_MODES = ("always", "batch", "never")
+
+
+def read_records(path: str) -> Iterator[tuple[int, int]]:
+    """
+    Yields `(operation, value)` for the records of the log at `path`, up to the first one that is short or corrupt.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    for offset in range(0, len(data) - RECORD.size + 1, RECORD.size):
+        op, val, crc = RECORD.unpack_from(data, offset)
+        if op not in (INSERT, DELETE) or crc != zlib.crc32(data[offset : offset + HEAD.size]):
+            return
+        yield op, val
+
+
+class WriteAheadLog:
+    """
+    - 𝗔𝗻 𝗮𝗽𝗽𝗲𝗻𝗱-𝗼𝗻𝗹𝘆 𝗹𝗼𝗴 𝗼𝗳 𝗳𝗶𝘅𝗲𝗱-𝘀𝗶𝘇𝗲 𝗿𝗲𝗰𝗼𝗿𝗱𝘀.
+    - `sync` decides when a record is safe from a crash:
+    - - `"always"`: every `append` writes and `fsync`s its record before returning. Nothing acknowledged is lost.
+    - - `"batch"`: records are buffered and written with a single `fsync` every `batch_size` records, and on `flush`.
+        A crash loses at most the unflushed batch.
+    - - `"never"`: like `"batch"`, but leaves the `fsync` to the operating system. Survives the process crashing,
+        not the machine.
+    - A crash in the middle of a write leaves a torn last record. `records` stops at the first record that is short
+      or fails its CRC, and opening the log cuts the file back to the last good record before appending again.
+      A caller that already read the records (as `DurableTree` recovery does) passes their byte length as `good`,
+      so the log is not scanned a second time.
+    """
+
+    def __init__(self, path: str, sync: str = "batch", batch_size: int = 1024, good: int | None = None):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"unknown sync mode {sync!r}, expected one of {SYNC_MODES}")
+        self.path = path
+        self.sync = sync
+        self.batch_size = 1 if sync == "always" else batch_size
+        self.buffer: list[bytes] = []
+        if good is None:
+            good = sum(1 for _ in read_records(path)) * RECORD.size
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        self.file.truncate(good)
+        self.file.seek(good)
+
+    def records(self) -> Iterator[tuple[int, int]]:
+        """
+        Yields `(operation, value)` for every intact record on disk, in the order they were written.
+        """
+        return read_records(self.path)
+
+    def append(self, op: int, val: int):
+        head = HEAD.pack(op, val)
+        self.buffer.append(head + CRC.pack(zlib.crc32(head)))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records, and `fsync`s them unless `sync` is `"never"`.
+        """
+        if self.buffer:
+            self.file.write(b"".join(self.buffer))
+            self.buffer.clear()
+        self.file.flush()
+        if self.sync != "never":
+            os.fsync(self.file.fileno())
+
+    def reset(self):
+        """
+        Empties the log, after a checkpoint made its records unnecessary.
+        """
+        self.buffer.clear()
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class DurableTree:
+    """
+    - 𝗔 𝘁𝗿𝗲𝗲 𝘁𝗵𝗮𝘁 𝘀𝘂𝗿𝘃𝗶𝘃𝗲𝘀 𝗮 𝗰𝗿𝗮𝘀𝗵, 𝘄𝗶𝘁𝗵 𝗿𝗲𝗰𝗼𝘃𝗲𝗿𝘆 𝘁𝗶𝗺𝗲 𝗯𝗼𝘂𝗻𝗱𝗲𝗱 𝗯𝘆 𝘁𝗵𝗲 𝗰𝗵𝗲𝗰𝗸𝗽𝗼𝗶𝗻𝘁 𝗶𝗻𝘁𝗲𝗿𝘃𝗮𝗹.
+    - `insert` and `delete` append a record to the `WriteAheadLog` first, then change `tree`. Reads go straight to
+      `tree` (`exists`, `in`, iteration, or `tree.tree` for everything else).
+    - Every `checkpoint_every` changes, `checkpoint` dumps the sorted keys with `tree_file.dump` (written to a
+      temporary file and renamed, so the old checkpoint stays whole until the new one is complete) and then empties
+      the log.
+
+    ### Recovery
+    1. Open the checkpoint as a `MappedTree` and build the tree from its sorted keys with `factory`, O(n) for
+       `RBTree.from_sorted`, the default.
+    2. Replay the intact records of the log, at most `checkpoint_every` of them.
+    - A crash between writing a checkpoint and emptying the log leaves records that the checkpoint already contains.
+      Replaying them is harmless: the last insert or delete of each key decides whether it is there, whichever state
+      the replay starts from.
+    - `factory` is called with an iterable of ascending keys and must return a tree with `insert`, `delete`,
+      `exists` and in-order iteration: `RBTree.from_sorted`, `BinarySearchTree.from_sorted`, `OrderStatisticRBTree.from_sorted`...
+    - Keys must fit in a signed 64 bit integer.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        factory: Callable[[Iterable[int]], Any] = RBTree.from_sorted,
+        checkpoint_every: int = 100_000,
+        sync: str = "batch",
+        batch_size: int = 1024,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.checkpoint_path = os.path.join(directory, "checkpoint.rbt")
+        self.log_path = os.path.join(directory, "wal.log")
+        self.checkpoint_every = checkpoint_every
+        self.factory = factory
+        self.changes = 0
+        self.tree = self._recover()
+        self.log = WriteAheadLog(self.log_path, sync, batch_size, good=self.changes * RECORD.size)
+
+    def _recover(self) -> Any:
+        """
+        Builds the tree from the checkpoint and replays the log once. `changes` ends up as the number of intact records,
+        which tells the `WriteAheadLog` where to cut the file without reading it again.
+        """
+        if os.path.exists(self.checkpoint_path):
+            with MappedTree(self.checkpoint_path) as view:
+                tree = self.factory(view)
+        else:
+            tree = self.factory(())
+        for op, val in read_records(self.log_path):
+            if op == INSERT:
+                tree.insert(val)
+            else:
+                tree.delete(val)
+            self.changes += 1
+        return tree
+
+    def __enter__(self) -> DurableTree:
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+    def __contains__(self, val: int) -> bool:
+        return self.tree.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.tree)
+
+    def exists(self, val: int) -> bool:
+        return self.tree.exists(val)
+
+    def insert(self, val: int):
+        self.log.append(INSERT, val)
+        self.tree.insert(val)
+        self._changed()
+
+    def delete(self, val: int) -> bool:
+        """
+        Removes `val` and returns whether it was there. The delete is logged either way.
+        """
+        self.log.append(DELETE, val)
+        found = self.tree.delete(val)
+        self._changed()
+        return bool(found)
+
+    def _changed(self):
+        self.changes += 1
+        if self.changes >= self.checkpoint_every:
+            self.checkpoint()
+
+    def flush(self):
+        """
+        Makes every change so far durable, according to the log's `sync` mode.
+        """
+        self.log.flush()
+
+    def checkpoint(self):
+        """
+        Writes all keys to a new checkpoint, then empties the log.
+        """
+        self.log.flush()
+        dump(iter(self.tree), self.checkpoint_path)
+        _fsync_directory(self.directory)
+        self.log.reset()
+        self.changes = 0
+
+    def close(self):
+        self.log.close()
+
+
+def _fsync_directory(directory: str):
+    """
+    Makes the rename done by `dump` durable. Not every platform can open a directory, which is fine to skip.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from binary_tree import BinarySearchTree
+from durable_tree import DurableTree, WriteAheadLog, read_records, INSERT, DELETE, RECORD
+from tree_file import dump
+import durable_tree
+import os
+import pytest
+import random
+
+
+def apply_random_ops(tree, model: set, count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        val = rng.randint(-500, 500)
+        if rng.random() < 0.7:
+            tree.insert(val)
+            model.add(val)
+        else:
+            assert tree.delete(val) == (val in model)
+            model.discard(val)
+
+
+# ===================Helper functions above===============
+
+
+@pytest.mark.parametrize("sync", ["always", "batch", "never"])
+@pytest.mark.parametrize("factory", [None, BinarySearchTree.from_sorted])
+def test_recovers_after_crash(tmp_path, sync, factory):
+    kwargs = {} if factory is None else {"factory": factory}
+    model: set[int] = set()
+    tree = DurableTree(str(tmp_path), checkpoint_every=700, sync=sync, batch_size=64, **kwargs)
+    apply_random_ops(tree, model, 2000, seed=10)
+    tree.flush()
+    # * no close(): the process "crashes" here, and a new one recovers from the directory
+    assert os.path.exists(tmp_path / "checkpoint.rbt")
+    recovered = DurableTree(str(tmp_path), checkpoint_every=700, sync=sync, **kwargs)
+    assert list(recovered) == sorted(model)
+    assert recovered.changes == 2000 % 700
+    apply_random_ops(recovered, model, 500, seed=11)
+    recovered.close()
+    with DurableTree(str(tmp_path), **kwargs) as again:
+        assert list(again) == sorted(model)
+        assert all((val in again) == (val in model) for val in range(-510, 510))
+
+
+def test_torn_tail_and_unflushed_batch(tmp_path, monkeypatch):
+    tree = DurableTree(str(tmp_path), sync="batch", batch_size=1000)
+    for val in range(10):
+        tree.insert(val)
+    tree.flush()
+    for val in range(10, 20):
+        tree.insert(val)  # * still in the batch buffer when the process dies
+    log_path = tmp_path / "wal.log"
+    with open(log_path, "ab") as f:
+        f.write(RECORD.pack(INSERT, 99, 0)[:7])
+    assert list(read_records(str(log_path))) == [(INSERT, val) for val in range(10)]
+
+    scans = []
+    monkeypatch.setattr(durable_tree, "read_records", lambda path: scans.append(path) or read_records(path))
+    recovered = DurableTree(str(tmp_path))
+    assert list(recovered) == list(range(10))
+    assert len(scans) == 1  # * the replay finds the good length, the log is not read a second time
+    assert os.path.getsize(log_path) == 10 * RECORD.size
+    recovered.delete(3)
+    recovered.close()
+    assert list(DurableTree(str(tmp_path))) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+    with open(log_path, "r+b") as f:
+        f.seek(RECORD.size * 2 + 3)
+        f.write(b"\xff")
+    assert list(read_records(str(log_path))) == [(INSERT, 0), (INSERT, 1)]
+
+
+def test_replay_over_checkpoint_is_idempotent(tmp_path):
+    # * a crash after the checkpoint was renamed into place, but before the log was emptied
+    log = WriteAheadLog(str(tmp_path / "wal.log"), sync="always")
+    ops = [(INSERT, 1), (INSERT, 2), (DELETE, 1), (INSERT, 3), (DELETE, 5), (INSERT, 1), (DELETE, 2)]
+    for op, val in ops:
+        log.append(op, val)
+    log.close()
+    dump([1, 3, 4], str(tmp_path / "checkpoint.rbt"))
+    with DurableTree(str(tmp_path)) as tree:
+        assert list(tree) == [1, 3, 4]
+        tree.checkpoint()
+        assert os.path.getsize(tmp_path / "wal.log") == 0
+    with pytest.raises(ValueError):
+        WriteAheadLog(str(tmp_path / "other.log"), sync="sometimes")
+
+
+def test_binary_search_tree_from_sorted():
+    tree = BinarySearchTree.from_sorted(range(1000))
+    assert list(tree) == list(range(1000)) and len(tree) == 1000
+    assert tree.height() <= 10
+    tree.insert(5000)
+    assert tree.exists(5000) and not tree.exists(1000)
+    with pytest.raises(ValueError):
+        BinarySearchTree.from_sorted([1, 3, 2])
@@ -0,0 +1,130 @@
+"""
+### Immutable, NumPy-backed snapshots of a tree for batch lookups.
+`RBTree.freeze()` and `BSTNode.freeze()` copy the values of a tree into a `FrozenTree`. Requires `numpy`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+import numpy as np
+
+
+def eytzinger_ranks(n: int) -> np.ndarray:
+    """
+    Returns `ranks` with `ranks[k]` = the in-order position of node `k` of an implicit binary tree with `n` nodes,
+    where the children of node `k` are `2k` and `2k + 1` (1-indexed, so `ranks[0]` is unused and set to `n`).
+    1. In a perfect tree with `levels` levels, node `k` at depth `d` has rank `(2(k - 2^d) + 1) * 2^(levels-1-d) - 1`.
+    2. Our last level only holds its first `last` nodes. Those sit at the even ranks `0, 2, 4, ...` of the perfect
+       tree, so a node's rank drops by the number of missing last-level nodes that come before it.
+    """
+    ranks = np.empty(n + 1, dtype=np.int64)
+    ranks[0] = n
+    if n == 0:
+        return ranks
+    levels = n.bit_length()
+    k = np.arange(1, n + 1, dtype=np.int64)
+    depth = np.frexp(k.astype(np.float64))[1].astype(np.int64) - 1
+    perfect = (2 * (k - (1 << depth)) + 1) * (1 << (levels - 1 - depth)) - 1
+    last = n - ((1 << (levels - 1)) - 1)
+    ranks[1:] = perfect - np.maximum(0, (perfect + 1) // 2 - last)
+    return ranks
+
+
+class FrozenTree:
+    """
+    - 𝗔 𝗿𝗲𝗮𝗱-𝗼𝗻𝗹𝘆 𝘀𝗻𝗮𝗽𝘀𝗵𝗼𝘁 𝗼𝗳 𝗮 𝘁𝗿𝗲𝗲'𝘀 𝘃𝗮𝗹𝘂𝗲𝘀 𝗶𝗻 𝗘𝘆𝘁𝘇𝗶𝗻𝗴𝗲𝗿 (𝗕𝗙𝗦) 𝗼𝗿𝗱𝗲𝗿.
+    - `layout[1]` is the root, and the children of `layout[k]` are `layout[2k]` and `layout[2k + 1]`, so a search
+      needs no pointers at all. The top levels of the tree, which every search touches, share a few cache lines.
+    - Each `*_many` method takes a whole array of probes and walks all of them down the tree at once: one NumPy
+      step per level, `log2(n) + 1` steps in total, with no Python-level branch per probe.
+    ### Lower bound search
+    Every probe starts at `k = 1` and moves to `2k + (layout[k] < probe)`. Whenever it goes left, `layout[k]` is
+    the smallest value seen so far that is not less than the probe, so it is remembered. Probes that have fallen
+    off the bottom of the tree keep moving but stop being remembered.
+    """
+
+    def __init__(self, layout: np.ndarray, ranks: np.ndarray):
+        self.layout = layout
+        self.ranks = ranks
+        self.size = len(layout) - 1
+        self.levels = self.size.bit_length()
+        self.layout.flags.writeable = False
+        self.ranks.flags.writeable = False
+
+    @classmethod
+    def from_sorted(cls, keys: Any) -> FrozenTree:
+        """
+        Builds the snapshot from strictly ascending values (any 1-D array-like). Raises `ValueError` otherwise.
+        """
+        keys = np.asarray(keys)
+        if keys.ndim != 1:
+            raise ValueError("from_sorted() requires a 1-D sequence of values")
+        if len(keys) > 1 and not np.all(keys[1:] > keys[:-1]):
+            raise ValueError("from_sorted() requires strictly ascending values")
+        ranks = eytzinger_ranks(len(keys))
+        layout = np.empty(len(keys) + 1, dtype=keys.dtype)
+        if len(keys):
+            layout[0] = keys[0]
+            layout[1:] = keys[ranks[1:]]
+        return cls(layout, ranks)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, val: Any) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.sorted_keys().tolist())
+
+    def sorted_keys(self) -> np.ndarray:
+        """
+        The values in ascending order, as a new array.
+        """
+        keys = np.empty(self.size, dtype=self.layout.dtype)
+        keys[self.ranks[1:]] = self.layout[1:]
+        return keys
+
+    def _lower_bound(self, probes: np.ndarray, strict: bool = False) -> np.ndarray:
+        """
+        For every probe, the layout index of the smallest value `>= probe` (`> probe` when `strict`), or 0 if none.
+        """
+        layout, size = self.layout, self.size
+        k = np.ones(probes.shape, dtype=np.int64)
+        found = np.zeros(probes.shape, dtype=np.int64)
+        for _ in range(self.levels):
+            inside = k <= size
+            vals = layout[np.where(inside, k, 0)]
+            go_right = vals <= probes if strict else vals < probes
+            found = np.where(inside & ~go_right, k, found)
+            k = 2 * k + go_right
+        return found
+
+    def exists(self, val: Any) -> bool:
+        return bool(self.contains_many(np.asarray([val]))[0])
+
+    def contains_many(self, probes: Any) -> np.ndarray:
+        """
+        Returns a boolean array: whether each probe is one of the values.
+        """
+        probes = np.asarray(probes)
+        found = self._lower_bound(probes)
+        return (found > 0) & (self.layout[found] == probes)
+
+    def rank_many(self, probes: Any) -> np.ndarray:
+        """
+        Returns, for each probe, how many values are less than it (its `bisect_left` index in the sorted values).
+        """
+        probes = np.asarray(probes)
+        return self.ranks[self._lower_bound(probes)]
+
+    def range_count_many(self, lo: Any, hi: Any) -> np.ndarray:
+        """
+        Returns, for each pair `lo[i], hi[i]`, how many values are in `[lo[i], hi[i]]` (both included).
+        """
+        lo = np.asarray(lo)
+        hi = np.asarray(hi)
+        below_hi = self.ranks[self._lower_bound(hi, strict=True)]
+        below_lo = self.ranks[self._lower_bound(lo)]
+        return np.maximum(below_hi - below_lo, 0)
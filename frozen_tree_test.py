@@ -0,0 +1,66 @@
+from __future__ import annotations
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from binary_tree import BSTNode  # noqa: E402
+from frozen_tree import FrozenTree, eytzinger_ranks  # noqa: E402
+from rb_tree import RBTree  # noqa: E402
+
+
+def implicit_inorder(n: int) -> list[int]:
+    order: list[int] = []
+    stack: list[int] = []
+    k = 1
+    while stack or k <= n:
+        while k <= n:
+            stack.append(k)
+            k *= 2
+        k = stack.pop()
+        order.append(k)
+        k = 2 * k + 1
+    return order
+
+
+# ===================Helper functions above===============
+
+
+def test_eytzinger_ranks():
+    for n in range(0, 130):
+        ranks = eytzinger_ranks(n)
+        assert ranks[0] == n
+        assert [int(ranks[k]) for k in implicit_inorder(n)] == list(range(n))
+
+
+def test_batch_queries_match_bisect():
+    rng = np.random.default_rng(10)
+    keys = np.unique(rng.integers(0, 50_000, 5000))
+    frozen = FrozenTree.from_sorted(keys)
+    assert len(frozen) == len(keys)
+    assert np.array_equal(frozen.sorted_keys(), keys)
+    probes = rng.integers(-10, 50_010, 20_000)
+    assert np.array_equal(frozen.contains_many(probes), np.isin(probes, keys))
+    assert np.array_equal(frozen.rank_many(probes), np.searchsorted(keys, probes, "left"))
+    lo = rng.integers(-10, 50_010, 2000)
+    hi = lo + rng.integers(-100, 2000, 2000)
+    expected = np.maximum(
+        np.searchsorted(keys, hi, "right") - np.searchsorted(keys, lo, "left"), 0
+    )
+    assert np.array_equal(frozen.range_count_many(lo, hi), expected)
+    assert keys[3] in frozen and -1 not in frozen
+
+
+def test_freeze_trees():
+    t = RBTree.from_sorted(range(0, 200, 3))
+    frozen = t.freeze()
+    t.insert(1)
+    assert list(frozen) == list(range(0, 200, 3))
+    root = BSTNode()
+    for val in [5, 2, 9, 7]:
+        root.insert(val)
+    assert root.freeze().contains_many(np.array([7, 8])).tolist() == [True, False]
+    empty = RBTree().freeze()
+    assert len(empty) == 0 and not empty.contains_many(np.array([1])).any()
+    assert empty.rank_many(np.array([1])).tolist() == [0]
+    with pytest.raises(ValueError):
+        FrozenTree.from_sorted([2, 1])
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from rb_tree import RBNode, RBTree
+
+
+class IntervalNode(RBNode):
+    """
+    An `RBNode` whose `val` is an interval `(start, end)`, plus `max_end`, the largest `end` in its subtree.
+    The `nil` sentinel has `max_end = None` and is skipped when `max_end` is computed.
+    """
+
+    def __init__(
+        self: IntervalNode,
+        val: tuple[Any, Any] | None,
+        left: None | RBNode = None,
+        right: None | RBNode = None,
+        red: bool = False,
+    ):
+        super().__init__(val, left, right, red)  # type: ignore
+        self.max_end: Any = None if val is None else val[1]
+
+
+class IntervalTree(RBTree):
+    """
+    - 𝗔 𝗿𝗲𝗱-𝗯𝗹𝗮𝗰𝗸 𝘁𝗿𝗲𝗲 𝗼𝗳 𝗰𝗹𝗼𝘀𝗲𝗱 𝗶𝗻𝘁𝗲𝗿𝘃𝗮𝗹𝘀 `[𝘀𝘁𝗮𝗿𝘁, 𝗲𝗻𝗱]`, 𝗼𝗿𝗱𝗲𝗿𝗲𝗱 𝗯𝘆 `(𝘀𝘁𝗮𝗿𝘁, 𝗲𝗻𝗱)`.
+    - Each node is one interval, so intervals with the same start can coexist; the exact same interval is only
+      stored once. Iterating yields the `(start, end)` tuples in order.
+    - Every node also caches `max_end`, the latest end in its subtree, which lets a query skip any subtree whose
+      intervals all end before the query begins:
+    - - `stab(point)`: the intervals that contain `point`.
+    - - `overlaps(lo, hi)`: the intervals that share at least one point with `[lo, hi]`.
+    - Both are lazy generators that yield in `(start, end)` order and stop at the first start beyond `hi`.
+    - Cost: every node a query visits is an ancestor of (or is) a reported interval or the node where it stops, so it
+      visits the union of those root paths: O(log(n) + k log(n/k)) for `k` results, and O(log(n)) when nothing
+      matches. When the results are neighbours in `(start, end)` order that union is O(log(n) + k). It only grows to
+      O(k log(n/k)) when the results are scattered between intervals that end before the query. Guaranteeing
+      O(log(n) + k) for every query needs a different structure (a priority search tree, or a centered interval
+      tree), which this `RBTree` augmentation doesn't try to be.
+    ### Keeping `max_end` correct
+    The same hooks as `OrderStatisticRBTree`: `insert` and `delete_node` call `refresh_path` from the lowest changed
+    node up, and a rotation refreshes the two nodes it moves, lower one first.
+    """
+
+    node_class = IntervalNode
+
+    def refresh(self, node: IntervalNode):  # type: ignore
+        best = node.val[1]  # type: ignore
+        for child in (node.left, node.right):
+            if child is not self.nil and child.max_end > best:  # type: ignore
+                best = child.max_end  # type: ignore
+        node.max_end = best
+
+    def refresh_path(self, node: IntervalNode | None):  # type: ignore
+        nil = self.nil
+        while node is not None and node is not nil:
+            self.refresh(node)
+            node = node.parent  # type: ignore
+
+    def rotate_left(self, x: IntervalNode | None):  # type: ignore
+        y = x.right  # type: ignore
+        super().rotate_left(x)
+        if x.parent is y:  # type: ignore
+            self.refresh(x)  # type: ignore
+            self.refresh(y)  # type: ignore
+
+    def rotate_right(self, x: IntervalNode | None):  # type: ignore
+        y = x.left  # type: ignore
+        super().rotate_right(x)
+        if x.parent is y:  # type: ignore
+            self.refresh(x)  # type: ignore
+            self.refresh(y)  # type: ignore
+
+    def insert(self, start: Any, end: Any) -> IntervalNode:  # type: ignore
+        """
+        Adds the interval `[start, end]` and returns its node. Raises `ValueError` if `end < start`.
+        """
+        if end < start:
+            raise ValueError("an interval can't end before it starts")
+        return super().insert((start, end))  # type: ignore
+
+    def delete(self, start: Any, end: Any) -> bool:  # type: ignore
+        """
+        Removes the interval `[start, end]` and returns whether it was there.
+        """
+        return super().delete((start, end))  # type: ignore
+
+    def overlaps(self, lo: Any, hi: Any) -> Iterator[tuple[Any, Any]]:
+        """
+        ### Lazily yields the intervals that overlap `[lo, hi]`, i.e. `start <= hi` and `end >= lo`.
+        An in-order walk with a stack, with two cuts:
+        1. Never go down into a subtree whose `max_end` is before `lo`: nothing in it reaches the query.
+        2. Stop at the first node, in order, that starts after `hi`: every later interval starts even later.
+        - The tree must not be modified while the generator is being consumed.
+        """
+        nil = self.nil
+        stack: list[IntervalNode] = []
+        node: IntervalNode = self.root  # type: ignore
+        while stack or node is not nil:
+            while node is not nil and node.max_end >= lo:
+                stack.append(node)
+                node = node.left  # type: ignore
+            if not stack:
+                return
+            node = stack.pop()
+            start, end = node.val  # type: ignore
+            if start > hi:
+                return
+            if end >= lo:
+                yield start, end
+            node = node.right  # type: ignore
+
+    def stab(self, point: Any) -> Iterator[tuple[Any, Any]]:
+        """
+        Lazily yields the intervals that contain `point`, ends included.
+        """
+        return self.overlaps(point, point)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from interval_tree import IntervalNode, IntervalTree
+from rb_tree_test import check_rb
+import random
+import pytest
+
+
+def check_max_end(tree: IntervalTree, node: IntervalNode | None = None):
+    if node is None:
+        node = tree.root  # type: ignore
+    if node is tree.nil:
+        return None
+    ends = [node.val[1], check_max_end(tree, node.left), check_max_end(tree, node.right)]  # type: ignore
+    assert node.max_end == max(end for end in ends if end is not None)
+    return node.max_end
+
+
+# ===================Helper functions above===============
+
+
+def test_interval_queries_match_scan():
+    rng = random.Random(21)
+    tree = IntervalTree()
+    stored: set[tuple[int, int]] = set()
+    for _ in range(3000):
+        start = rng.randrange(10_000)
+        interval = (start, start + int(rng.expovariate(0.01)))
+        if rng.random() < 0.75:
+            tree.insert(*interval)
+            stored.add(interval)
+        elif stored:
+            victim = rng.choice(sorted(stored))
+            assert tree.delete(*victim)
+            stored.discard(victim)
+    check_rb(tree)
+    check_max_end(tree)
+    assert list(tree) == sorted(stored)
+    for _ in range(200):
+        lo = rng.randrange(-100, 10_200)
+        hi = lo + rng.choice((0, 0, 5, 300))
+        assert list(tree.overlaps(lo, hi)) == sorted(i for i in stored if i[0] <= hi and i[1] >= lo)
+        assert list(tree.stab(lo)) == sorted(i for i in stored if i[0] <= lo <= i[1])
+
+
+def test_interval_edges():
+    tree = IntervalTree()
+    assert list(tree.stab(3)) == []
+    tree.insert(1, 5)
+    tree.insert(1, 2)
+    tree.insert(5, 5)
+    assert list(tree.stab(5)) == [(1, 5), (5, 5)]
+    assert list(tree.stab(2)) == [(1, 2), (1, 5)]
+    assert list(tree.overlaps(6, 9)) == []
+    assert tree.insert(1, 5) is tree._find((1, 5))
+    assert not tree.delete(2, 3)
+    with pytest.raises(ValueError):
+        tree.insert(4, 3)
+    tree = IntervalTree.from_iterable([(i, i + 10) for i in range(100)])
+    check_max_end(tree)
+    assert len(list(tree.stab(50))) == 11
@@ -0,0 +1,347 @@
+"""
+### A persistent (path-copying) red-black tree: updates never change a node that a reader can see.
+```
+tree = PersistentRBTree.from_iterable(values)
+view = tree.snapshot()        # O(1), unaffected by anything the writer does later
+tree.insert(42)               # copies the O(log(n)) nodes on one path and swaps `tree.root`
+tree.delete(7)
+42 in tree, 42 in view        # True, False
+```
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Sequence
+
+
+class PNode:
+    """
+    An immutable red-black node. Empty subtrees are `None`, and there are no `parent` links, because a node can be
+    shared by many versions of the tree, each with a different path above it.
+    """
+
+    __slots__ = ("val", "left", "right", "red")
+
+    def __init__(self, red: bool, left: PNode | None, val: int, right: PNode | None):
+        self.red = red
+        self.left = left
+        self.val = val
+        self.right = right
+
+    def __repr__(self) -> str:
+        return f"PNode({self.val}, {'red' if self.red else 'black'})"
+
+
+class PersistentRBTree:
+    """
+    - 𝗔 𝗿𝗲𝗱-𝗯𝗹𝗮𝗰𝗸 𝘁𝗿𝗲𝗲 𝘄𝗵𝗼𝘀𝗲 𝗻𝗼𝗱𝗲𝘀 𝗮𝗿𝗲 𝗻𝗲𝘃𝗲𝗿 𝗺𝗼𝗱𝗶𝗳𝗶𝗲𝗱 𝗮𝗳𝘁𝗲𝗿 𝘁𝗵𝗲𝘆 𝗮𝗿𝗲 𝗰𝗿𝗲𝗮𝘁𝗲𝗱.
+    - `RBTree.insert`, `rotate_left` and `rotate_right` relink nodes in place, so a reader walking the tree during an
+      update can see it half rotated. Here, `insert` and `delete` build new copies of the nodes on the path from the
+      root to the change (O(log(n)) of them), share every other subtree with the old version, and finish by
+      assigning the new root to `self.root` in one step.
+    - `snapshot()` is therefore O(1): it is a new tree object pointing at the current root. A reader holding a
+      snapshot sees one consistent version for as long as it likes, without locks, while the writer moves on.
+      Old versions are freed by the garbage collector once nothing refers to them.
+    - `insert` and `delete` also return a snapshot of the version they produced.
+
+    ### Algorithm
+    Insertion is Okasaki's functional `balance`, which rewrites any black node with a red child and red grandchild
+    into a red node with two black children. Deletion is Kahrs' functional delete (`_del`, `_balance_left`,
+    `_balance_right`, `_append`), which keeps the black height equal on the way back up instead of using `parent`
+    links and a fix-up loop. Both recurse only as deep as the tree, so O(log(n)).
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.root: PNode | None = None
+        self.size = 0
+        for val in values:
+            self.insert(val)
+
+    @classmethod
+    def from_sorted(cls, iterable: Iterable[int]) -> PersistentRBTree:
+        """
+        Builds a tree from strictly ascending values in O(n), colored the same way as `RBTree.from_sorted`: every
+        level black except a deepest, incomplete level, which is red. Raises `ValueError` otherwise.
+        """
+        keys: list[int] = list(iterable)
+        for i in range(1, len(keys)):
+            if not keys[i - 1] < keys[i]:
+                raise ValueError("from_sorted() requires strictly ascending values")
+        tree = cls()
+        if keys:
+            tree.root = _build(keys, 0, len(keys), 0, len(keys).bit_length() - 1)
+            tree.size = len(keys)
+        return tree
+
+    @classmethod
+    def from_iterable(cls, iterable: Iterable[int]) -> PersistentRBTree:
+        """
+        Sorts the values, drops duplicates, and builds the tree with `from_sorted`.
+        """
+        return cls.from_sorted(sorted(set(iterable)))
+
+    def snapshot(self) -> PersistentRBTree:
+        """
+        Returns the current version as its own tree, in O(1). Updating either tree afterwards doesn't affect the other.
+        """
+        view = PersistentRBTree()
+        view.root, view.size = self.root, self.size
+        return view
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_inorder()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.iter_reversed()
+
+    def exists(self, val: int) -> bool:
+        node = self.root
+        while node is not None:
+            if val < node.val:
+                node = node.left
+            elif val > node.val:
+                node = node.right
+            else:
+                return True
+        return False
+
+    def get_min(self) -> int | None:
+        node = self.root
+        if node is None:
+            return None
+        while node.left is not None:
+            node = node.left
+        return node.val
+
+    def get_max(self) -> int | None:
+        node = self.root
+        if node is None:
+            return None
+        while node.right is not None:
+            node = node.right
+        return node.val
+
+    def insert(self, val: int) -> PersistentRBTree:
+        """
+        Adds `val` (duplicates are ignored) and returns a snapshot of the new version.
+        """
+        if not self.exists(val):
+            root = _ins(self.root, val)
+            self.root = PNode(False, root.left, root.val, root.right) if root.red else root
+            self.size += 1
+        return self.snapshot()
+
+    def delete(self, val: int) -> PersistentRBTree:
+        """
+        Removes `val` if it is there and returns a snapshot of the new version.
+        """
+        if self.exists(val):
+            root = _del(self.root, val)
+            if root is not None and root.red:
+                root = PNode(False, root.left, root.val, root.right)
+            self.root = root
+            self.size -= 1
+        return self.snapshot()
+
+    def iter_inorder(self) -> Iterator[int]:
+        """
+        Yields the values in ascending order. The walk only reads the version it started on.
+        """
+        stack: list[PNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.val
+            node = node.right
+
+    def iter_reversed(self) -> Iterator[int]:
+        stack: list[PNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.val
+            node = node.left
+
+    def irange(self, lo: int | None = None, hi: int | None = None) -> Iterator[int]:
+        """
+        Lazily yields the values in `[lo, hi]` in ascending order (`None` leaves that side open), skipping every
+        subtree that lies outside the range, so O(log(n) + k).
+        """
+        stack: list[PNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                if lo is not None and node.val < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if hi is not None and node.val > hi:
+                return
+            yield node.val
+            node = node.right
+
+
+def _build(keys: Sequence[int], lo: int, hi: int, depth: int, red_depth: int) -> PNode:
+    mid = (lo + hi) // 2
+    left = _build(keys, lo, mid, depth + 1, red_depth) if lo < mid else None
+    right = _build(keys, mid + 1, hi, depth + 1, red_depth) if mid + 1 < hi else None
+    return PNode(0 < depth == red_depth, left, keys[mid], right)
+
+
+def _is_red(node: PNode | None) -> bool:
+    return node is not None and node.red
+
+
+def _black(node: PNode) -> PNode:
+    return node if not node.red else PNode(False, node.left, node.val, node.right)
+
+
+def _balance(left: PNode | None, val: int, right: PNode | None) -> PNode:
+    """
+    Builds a black node over `left` and `right`. If one side is red with a red child, the three nodes involved are
+    rearranged into a red node with two black children instead.
+    """
+    if _is_red(left) and _is_red(right):
+        return PNode(True, _black(left), val, _black(right))  # type: ignore
+    if _is_red(left):
+        if _is_red(left.left):  # type: ignore
+            a = left.left  # type: ignore
+            return PNode(True, _black(a), left.val, PNode(False, left.right, val, right))  # type: ignore
+        if _is_red(left.right):  # type: ignore
+            b = left.right  # type: ignore
+            return PNode(  # type: ignore
+                True, PNode(False, left.left, left.val, b.left), b.val, PNode(False, b.right, val, right)  # type: ignore
+            )
+    if _is_red(right):
+        if _is_red(right.right):  # type: ignore
+            d = right.right  # type: ignore
+            return PNode(True, PNode(False, left, val, right.left), right.val, _black(d))  # type: ignore
+        if _is_red(right.left):  # type: ignore
+            c = right.left  # type: ignore
+            return PNode(  # type: ignore
+                True, PNode(False, left, val, c.left), c.val, PNode(False, c.right, right.val, right.right)  # type: ignore
+            )
+    return PNode(False, left, val, right)
+
+
+def _ins(node: PNode | None, val: int) -> PNode:
+    if node is None:
+        return PNode(True, None, val, None)
+    if val < node.val:
+        left = _ins(node.left, val)
+        return PNode(True, left, node.val, node.right) if node.red else _balance(left, node.val, node.right)
+    right = _ins(node.right, val)
+    return PNode(True, node.left, node.val, right) if node.red else _balance(node.left, node.val, right)
+
+
+def _redden(node: PNode) -> PNode:
+    """
+    Turns a black node red. Only called where the black height one level down is known to be one too high.
+    """
+    if node.red:
+        raise AssertionError("red-black invariant violated")
+    return PNode(True, node.left, node.val, node.right)
+
+
+def _balance_left(left: PNode | None, val: int, right: PNode) -> PNode:
+    """
+    `left` lost one black from its height. Rebuilds the node so both sides have the same black height again.
+    """
+    if _is_red(left):
+        return PNode(True, _black(left), val, right)  # type: ignore
+    if not right.red:
+        return _balance(left, val, PNode(True, right.left, right.val, right.right))
+    inner = right.left  # * black, since `right` is red
+    return PNode(
+        True,
+        PNode(False, left, val, inner.left),  # type: ignore
+        inner.val,  # type: ignore
+        _balance(inner.right, right.val, _redden(right.right)),  # type: ignore
+    )
+
+
+def _balance_right(left: PNode, val: int, right: PNode | None) -> PNode:
+    """
+    The mirror image of `_balance_left`, for when `right` lost one black from its height.
+    """
+    if _is_red(right):
+        return PNode(True, left, val, _black(right))  # type: ignore
+    if not left.red:
+        return _balance(PNode(True, left.left, left.val, left.right), val, right)
+    inner = left.right  # * black, since `left` is red
+    return PNode(
+        True,
+        _balance(_redden(left.left), left.val, inner.left),  # type: ignore
+        inner.val,  # type: ignore
+        PNode(False, inner.right, val, right),  # type: ignore
+    )
+
+
+def _append(left: PNode | None, right: PNode | None) -> PNode | None:
+    """
+    Joins two subtrees of equal black height, where every value in `left` is smaller than every value in `right`,
+    after the node between them was deleted.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.red and right.red:
+        middle = _append(left.right, right.left)
+        if _is_red(middle):
+            return PNode(
+                True,
+                PNode(True, left.left, left.val, middle.left),  # type: ignore
+                middle.val,  # type: ignore
+                PNode(True, middle.right, right.val, right.right),  # type: ignore
+            )
+        return PNode(True, left.left, left.val, PNode(True, middle, right.val, right.right))
+    if not left.red and not right.red:
+        middle = _append(left.right, right.left)
+        if _is_red(middle):
+            return PNode(
+                True,
+                PNode(False, left.left, left.val, middle.left),  # type: ignore
+                middle.val,  # type: ignore
+                PNode(False, middle.right, right.val, right.right),  # type: ignore
+            )
+        return _balance_left(left.left, left.val, PNode(False, middle, right.val, right.right))
+    if right.red:
+        return PNode(True, _append(left, right.left), right.val, right.right)
+    return PNode(True, left.left, left.val, _append(left.right, right))
+
+
+def _del(node: PNode | None, val: int) -> PNode | None:
+    """
+    Removes `val` from the subtree. If the subtree's root was black, the result has one less black on every path,
+    which the caller repairs with `_balance_left`/`_balance_right`.
+    """
+    if node is None:
+        return None
+    if val < node.val:
+        left = _del(node.left, val)
+        if _is_red(node.left) or node.left is None:
+            return PNode(True, left, node.val, node.right)
+        return _balance_left(left, node.val, node.right)  # type: ignore
+    if val > node.val:
+        right = _del(node.right, val)
+        if _is_red(node.right) or node.right is None:
+            return PNode(True, node.left, node.val, right)
+        return _balance_right(node.left, node.val, right)  # type: ignore
+    return _append(node.left, node.right)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from persistent_rb_tree import PersistentRBTree, PNode
+import random
+import pytest
+
+
+def check_prb(tree: PersistentRBTree) -> int:
+    """
+    Asserts the red-black rules and the value order of one version, and returns its black height.
+    """
+    assert not (tree.root is not None and tree.root.red)
+    count = 0
+
+    def walk(node: PNode | None, low: int | None, high: int | None) -> int:
+        nonlocal count
+        if node is None:
+            return 1
+        count += 1
+        assert (low is None or node.val > low) and (high is None or node.val < high)
+        if node.red:
+            assert not (node.left is not None and node.left.red)
+            assert not (node.right is not None and node.right.red)
+        left = walk(node.left, low, node.val)
+        right = walk(node.right, node.val, high)
+        assert left == right
+        return left + (not node.red)
+
+    black_height = walk(tree.root, None, None)
+    assert count == len(tree)
+    return black_height
+
+
+def nodes(tree: PersistentRBTree) -> set[int]:
+    found: set[int] = set()
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            found.add(id(node))
+            stack.extend((node.left, node.right))
+    return found
+
+
+# ===================Helper functions above===============
+
+
+def test_persistent_matches_set():
+    random.seed(15)
+    tree = PersistentRBTree()
+    expected: set[int] = set()
+    for step in range(5000):
+        val = random.randint(0, 800)
+        if random.random() < 0.55:
+            tree.insert(val)
+            expected.add(val)
+        else:
+            tree.delete(val)
+            expected.discard(val)
+        if step % 250 == 0:
+            check_prb(tree)
+    check_prb(tree)
+    assert list(tree) == sorted(expected)
+    assert list(reversed(tree)) == sorted(expected, reverse=True)
+    assert list(tree.irange(100, 200)) == [v for v in sorted(expected) if 100 <= v <= 200]
+    assert tree.get_min() == min(expected) and tree.get_max() == max(expected)
+    for val in list(expected):
+        tree.delete(val)
+        check_prb(tree)
+    assert tree.root is None and tree.get_min() is None
+
+
+def test_snapshots_are_isolated():
+    tree = PersistentRBTree.from_sorted(range(0, 2000, 2))
+    check_prb(tree)
+    versions = [(tree.snapshot(), list(tree))]
+    for val in (1, 999, 2001, -3):
+        versions.append((tree.insert(val), sorted(set(versions[-1][1]) | {val})))
+    for val in (0, 1000, 999, 5):
+        versions.append((tree.delete(val), sorted(set(versions[-1][1]) - {val})))
+    for version, expected in versions:
+        assert list(version) == expected and len(version) == len(expected)
+        check_prb(version)
+
+    branch = versions[0][0]
+    branch.insert(7)
+    assert 7 in branch and 7 not in tree
+
+
+def test_updates_copy_one_path():
+    tree = PersistentRBTree.from_iterable(random.Random(2).sample(range(10**6), 20_000))
+    before = tree.snapshot()
+    for val in (5, 10**6 + 1, tree.get_min()):
+        previous = tree.snapshot()  # * keeps the old nodes alive, so their ids can't be reused
+        old = nodes(previous)
+        copied = nodes(tree.insert(val) if val not in tree else tree.delete(val)) - old
+        assert 0 < len(copied) <= 4 * check_prb(tree) + 4
+    assert len(before) == 20_000
+    with pytest.raises(ValueError):
+        PersistentRBTree.from_sorted([2, 1])
@@ -0,0 +1,199 @@
+"""
+### Range aggregates over a sorted map: sum, count, min, max, or any other monoid, for keys in `[lo, hi]`.
+```
+weights = AggregateRBTree(SUM)
+weights["a"] = 3; weights["b"] = 4; weights["c"] = 5
+weights.aggregate("a", "b")                         # 7, in O(log(n)) whatever the size of the range
+stats = AggregateRBTree(Monoid.product(SUM, COUNT, MAX), items)
+total, count, biggest = stats.aggregate(lo, hi)
+```
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from sorted_map import MapNode, RBMap
+
+_PENDING: Any = object()
+
+
+def _value(key: Any, value: Any) -> Any:
+    return value
+
+
+def _one(key: Any, value: Any) -> int:
+    return 1
+
+
+def _min(a: Any, b: Any) -> Any:
+    return b if a is None else a if b is None or a <= b else b
+
+
+def _max(a: Any, b: Any) -> Any:
+    return b if a is None else a if b is None or a >= b else b
+
+
+@dataclass(frozen=True)
+class Monoid:
+    """
+    How to summarize entries:
+    - `measure(key, value)`: the summary of one entry.
+    - `combine(a, b)`: the summary of two neighbouring runs of entries, `a` before `b`. It must be associative, but
+      doesn't have to be commutative: runs are always combined in key order.
+    - `identity`: the summary of no entries, with `combine(identity, a) == combine(a, identity) == a`.
+    """
+
+    combine: Callable[[Any, Any], Any]
+    identity: Any
+    measure: Callable[[Any, Any], Any] = _value
+
+    @staticmethod
+    def product(*monoids: Monoid) -> Monoid:
+        """
+        Several monoids at once: summaries are tuples with one element per monoid.
+        """
+
+        def combine(a: tuple, b: tuple) -> tuple:
+            return tuple(monoid.combine(x, y) for monoid, x, y in zip(monoids, a, b))
+
+        def measure(key: Any, value: Any) -> tuple:
+            return tuple(monoid.measure(key, value) for monoid in monoids)
+
+        return Monoid(combine, tuple(monoid.identity for monoid in monoids), measure)
+
+
+SUM = Monoid(operator.add, 0)
+COUNT = Monoid(operator.add, 0, _one)
+# * `None` is the identity of min and max, so they work for any comparable values, not just numbers
+MIN = Monoid(_min, None)
+MAX = Monoid(_max, None)
+
+
+class AggregateNode(MapNode):
+    """
+    A `MapNode` that caches `agg`, the summary of its whole subtree. Until the map sets the node's payload, `value` is
+    a placeholder that measures as the identity.
+    """
+
+    value: Any = _PENDING
+    agg: Any = None
+
+
+class AggregateRBTree(RBMap):
+    """
+    - 𝗔 𝘀𝗼𝗿𝘁𝗲𝗱 𝗺𝗮𝗽 𝘁𝗵𝗮𝘁 𝗸𝗲𝗲𝗽𝘀 𝗮 `𝗠𝗼𝗻𝗼𝗶𝗱` 𝘀𝘂𝗺𝗺𝗮𝗿𝘆 𝗼𝗳 𝗲𝘃𝗲𝗿𝘆 𝘀𝘂𝗯𝘁𝗿𝗲𝗲.
+    - `aggregate(lo, hi)` combines the entries with keys in `[lo, hi]` in O(log(n)) without visiting them: it only
+      reads the cached summaries of the O(log(n)) subtrees that exactly cover the range.
+    - All of `RBMap` (and so `OrderStatisticRBTree`) still works. Assigning a key, `setdefault` and `insert` refresh
+      the summaries above the entry. A payload that is changed in place must be assigned again to be counted.
+
+    ### Keeping `agg` correct
+    `refresh(node)` computes `combine(combine(left.agg, measure(node)), right.agg)`. It is called through the same
+    hooks as the subtree sizes: `refresh_path` after inserts and deletes, and the rotations. The `nil` sentinel is
+    shared by every tree of a node class, so it can't hold this tree's identity; `refresh` skips `nil` children
+    instead of reading their `agg`.
+    """
+
+    node_class = AggregateNode
+
+    def __init__(self, monoid: Monoid = SUM, items: Any = (), key: Callable[[Any], Any] | None = None):
+        self.monoid = monoid
+        super().__init__(items, key)
+
+    def _own(self, node: AggregateNode) -> Any:
+        if node.value is _PENDING:
+            return self.monoid.identity
+        return self.monoid.measure(self._node_key(node), node.value)
+
+    def refresh(self, node: AggregateNode):  # type: ignore
+        super().refresh(node)
+        nil = self.nil
+        combine = self.monoid.combine
+        agg = self._own(node)
+        if node.left is not nil:
+            agg = combine(node.left.agg, agg)  # type: ignore
+        if node.right is not nil:
+            agg = combine(agg, node.right.agg)  # type: ignore
+        node.agg = agg
+
+    def refresh_path(self, node: AggregateNode | None):  # type: ignore
+        nil = self.nil
+        while node is not None and node is not nil:
+            self.refresh(node)
+            node = node.parent  # type: ignore
+
+    def insert(self, k: Any, value: Any = None) -> AggregateNode:
+        node: AggregateNode = super().insert(k, value)
+        self.refresh_path(node)
+        return node
+
+    def __setitem__(self, k: Any, value: Any):
+        self.insert(k, value)
+
+    def setdefault(self, k: Any, default: Any = None) -> Any:
+        node, created = self._store(k)
+        if created:
+            node.value = default
+            self.refresh_path(node)
+        return node.value
+
+    def total(self) -> Any:
+        """
+        The summary of every entry. O(1)
+        """
+        return self.monoid.identity if self.root is self.nil else self.root.agg  # type: ignore
+
+    def aggregate(self, lo: Any = None, hi: Any = None) -> Any:
+        """
+        ### The summary of the entries with keys in `[lo, hi]` (`None` leaves that side open), in key order.
+        1. Walk down from the root to the first node inside the range: the split node. Everything in the range is in
+           its subtree.
+        2. Left of it, walk down towards `lo`. Each node on the way that is `>= lo` is in the range together with its
+           whole right subtree, and comes after everything found further down, so it is combined on the front.
+        3. Right of it, walk down towards `hi` the same way, mirrored, combining on the back.
+        - Two walks down, each O(log(n)), reading one cached `agg` per step.
+        """
+        nil = self.nil
+        monoid = self.monoid
+        combine = monoid.combine
+        lo = None if lo is None else self._sort_key(lo)
+        hi = None if hi is None else self._sort_key(hi)
+        split: AggregateNode = self.root  # type: ignore
+        while split is not nil:
+            if hi is not None and split.val > hi:  # type: ignore
+                split = split.left  # type: ignore
+            elif lo is not None and split.val < lo:  # type: ignore
+                split = split.right  # type: ignore
+            else:
+                break
+        if split is nil:
+            return monoid.identity
+
+        front = monoid.identity
+        node: AggregateNode = split.left  # type: ignore
+        while node is not nil:
+            if lo is None or node.val >= lo:  # type: ignore
+                run = self._own(node)
+                if node.right is not nil:
+                    run = combine(run, node.right.agg)  # type: ignore
+                front = combine(run, front)
+                node = node.left  # type: ignore
+            else:
+                node = node.right  # type: ignore
+
+        back = monoid.identity
+        node = split.right  # type: ignore
+        while node is not nil:
+            if hi is None or node.val <= hi:  # type: ignore
+                run = self._own(node)
+                if node.left is not nil:
+                    run = combine(node.left.agg, run)  # type: ignore
+                back = combine(back, run)
+                node = node.right  # type: ignore
+            else:
+                node = node.left  # type: ignore
+
+        return combine(combine(front, self._own(split)), back)
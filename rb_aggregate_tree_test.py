@@ -0,0 +1,51 @@
+from __future__ import annotations
+from rb_aggregate_tree import COUNT, MAX, MIN, SUM, AggregateRBTree, Monoid
+from rb_tree_test import check_rb
+import random
+
+
+def brute(entries: dict, lo, hi, monoid: Monoid):
+    agg = monoid.identity
+    for k in sorted(entries):
+        if (lo is None or k >= lo) and (hi is None or k <= hi):
+            agg = monoid.combine(agg, monoid.measure(k, entries[k]))
+    return agg
+
+
+# ===================Helper functions above===============
+
+
+def test_aggregate_matches_brute_force():
+    rng = random.Random(22)
+    monoid = Monoid.product(SUM, COUNT, MIN, MAX)
+    tree = AggregateRBTree(monoid)
+    entries: dict[int, int] = {}
+    for _ in range(3000):
+        k = rng.randrange(1000)
+        if rng.random() < 0.7:
+            tree[k] = entries[k] = rng.randrange(-50, 50)
+        else:
+            tree.pop(k, None)
+            entries.pop(k, None)
+    check_rb(tree)
+    assert tree.total() == brute(entries, None, None, monoid)
+    for _ in range(300):
+        lo = rng.choice((None, rng.randrange(-10, 1010)))
+        hi = rng.choice((None, rng.randrange(-10, 1010)))
+        assert tree.aggregate(lo, hi) == brute(entries, lo, hi, monoid)
+    assert tree.aggregate(500, 400) == monoid.identity
+
+
+def test_aggregate_is_ordered_and_keyed():
+    # * string concatenation is associative but not commutative, so this checks the combining order
+    concat = Monoid(lambda a, b: a + b, "", lambda k, v: v)
+    tree = AggregateRBTree(concat, {i: chr(97 + i) for i in range(26)})
+    assert tree.aggregate(3, 9) == "defghij" and tree.total() == "abcdefghijklmnopqrstuvwxyz"
+    tree.setdefault(3, "?")
+    tree.setdefault(30, "!")
+    tree.insert(4, "E")
+    assert tree.aggregate(3, None) == "dEfghijklmnopqrstuvwxyz!"
+
+    by_name = AggregateRBTree(Monoid(max, 0, lambda k, v: len(k)), {"Bob": 1, "alice": 2}, key=str.lower)
+    assert by_name.aggregate("A", "B") == 5 and by_name.aggregate("b", "z") == 3
+    assert AggregateRBTree(COUNT).total() == 0
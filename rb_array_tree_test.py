@@ -0,0 +1,97 @@
+from __future__ import annotations
+from rb_array_tree import ArrayRBTree
+import pickle
+import pytest
+import random
+
+
+def check_array_rb(tree: ArrayRBTree, node: int | None = None) -> int:
+    """
+    Asserts the red-black and BST properties below `node` and returns its black height.
+    """
+    if node is None:
+        assert tree.red[0] == 0
+        assert tree.red[tree.root] == 0
+        node = tree.root
+    if not node:
+        return 1
+    for child in (tree.left[node], tree.right[node]):
+        if child:
+            assert tree.parent[child] == node
+            assert not (tree.red[node] and tree.red[child])
+    if tree.left[node]:
+        assert tree.key[tree.left[node]] < tree.key[node]
+    if tree.right[node]:
+        assert tree.key[tree.right[node]] > tree.key[node]
+    left = check_array_rb(tree, tree.left[node])
+    right = check_array_rb(tree, tree.right[node])
+    assert left == right
+    return left + (0 if tree.red[node] else 1)
+
+
+# ===================Helper functions above===============
+
+
+def test_insert_matches_sorted_set():
+    random.seed(10)
+    values = [random.randint(-1000, 1000) for _ in range(2000)]
+    t = ArrayRBTree(values)
+    check_array_rb(t)
+    assert list(t) == sorted(set(values))
+    assert len(t) == len(set(values))
+    assert t.get_min() == min(values) and t.get_max() == max(values)
+    assert all(v in t for v in values)
+    assert 1001 not in t
+
+
+def test_sorted_input_stays_shallow():
+    t = ArrayRBTree(range(1, 2**12))
+
+    def depth(node: int) -> int:
+        if not node:
+            return 0
+        return 1 + max(depth(t.left[node]), depth(t.right[node]))
+
+    check_array_rb(t)
+    assert depth(t.root) <= 2 * 12
+
+
+def test_delete_and_free_list_reuse():
+    random.seed(3)
+    values = list(range(500))
+    random.shuffle(values)
+    t = ArrayRBTree(values)
+    slots = len(t.key)
+    random.shuffle(values)
+    for val in values[:300]:
+        assert t.delete(val)
+        check_array_rb(t)
+    assert not t.delete(values[0])
+    assert list(t) == sorted(values[300:])
+    for val in range(1000, 1300):
+        t.insert(val)
+    check_array_rb(t)
+    assert len(t.key) == slots
+    assert list(t) == sorted(values[300:]) + list(range(1000, 1300))
+    for val in list(t):
+        t.delete(val)
+    assert len(t) == 0 and t.root == 0 and t.get_min() is None
+
+
+def test_from_sorted_and_irange():
+    for n in (0, 1, 2, 3, 7, 8, 100, 1023):
+        t = ArrayRBTree.from_sorted(range(0, 2 * n, 2))
+        check_array_rb(t)
+        assert list(t) == list(range(0, 2 * n, 2)) and len(t) == n
+        assert list(t.irange(5, 41)) == [v for v in range(0, 2 * n, 2) if 5 <= v <= 41]
+        assert list(t.irange(hi=10)) == [v for v in range(0, 2 * n, 2) if v <= 10]
+        assert list(t.irange(lo=2 * n - 4)) == list(range(max(0, 2 * n - 4), 2 * n, 2))
+    t = ArrayRBTree.from_sorted(range(100))
+    t.insert(1000)
+    assert t.delete(50) and not t.delete(50)
+    check_array_rb(t)
+    # * the whole tree is a handful of arrays, so it pickles as raw bytes
+    copy = pickle.loads(pickle.dumps(t))
+    assert list(copy) == list(t) and len(copy) == len(t)
+    with pytest.raises(ValueError):
+        ArrayRBTree.from_sorted([1, 1])
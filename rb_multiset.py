@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable, Iterator
+
+from rb_order_tree import OrderStatisticRBTree, OSNode
+
+
+class MultiNode(OSNode):
+    """
+    An `OSNode` for a value that can occur many times. `count` is its multiplicity, and `size` is the sum of the
+    counts in its subtree, so `size - left.size - right.size == count`. The `nil` sentinel has a count of 0.
+    """
+
+    def __init__(
+        self: MultiNode,
+        val: int | None,
+        left: None | OSNode = None,
+        right: None | OSNode = None,
+        red: bool = False,
+    ):
+        super().__init__(val, left, right, red)
+        self.count: int = 0 if val is None else 1
+
+
+class RBMultiset(OrderStatisticRBTree):
+    """
+    - 𝗔 𝗿𝗲𝗱-𝗯𝗹𝗮𝗰𝗸 𝘁𝗿𝗲𝗲 𝘁𝗵𝗮𝘁 𝗸𝗲𝗲𝗽𝘀 𝗼𝗻𝗲 𝗻𝗼𝗱𝗲 𝗽𝗲𝗿 𝗱𝗶𝘀𝘁𝗶𝗻𝗰𝘁 𝘃𝗮𝗹𝘂𝗲, 𝘄𝗶𝘁𝗵 𝗶𝘁𝘀 𝗺𝘂𝗹𝘁𝗶𝗽𝗹𝗶𝗰𝗶𝘁𝘆.
+    - A stream with many repeats (latencies, prices, ...) costs one node per distinct value instead of one per sample,
+      and there is no separate `Counter` to keep in step.
+    - - `add(val, n)`, `discard(val, n)`, `count(val)`: O(log(n))
+    - - `len(tree)`: the total number of samples. O(1)
+    - - `rank(x)`, `bisect_right(x)`, `count_range(a, b)`, `select(k)`: the same as in `OrderStatisticRBTree`, but
+        counting every sample, e.g. "how many samples are <= x" is `bisect_right(x)`. O(log(n))
+    - Iterating yields every distinct value once. `elements()` repeats each one `count` times, `items()` yields pairs.
+    ### Keeping the sizes correct
+    `size` is `left.size + right.size + count` instead of `+ 1`, refreshed by the same `refresh`/`refresh_path` calls
+    after inserts, deletes and rotations. Changing the count of a node that is already there is one `refresh_path`.
+    - `delete`, `pop_min` and `pop_max` remove a value with all of its occurrences.
+    - `union`, `intersection` and `difference` keep the join/split algorithms and bounds of `RBTree`, and take
+      another `RBMultiset`, which they leave empty. They combine the counts of a value found in both: `union` adds
+      them, `intersection` keeps the smaller one, and `difference` subtracts, dropping the value once nothing is left.
+      The node whose count changes is then joined back in, and `_join` refreshes its size.
+    """
+
+    node_class = MultiNode
+
+    def refresh(self, node: MultiNode):  # type: ignore
+        node.size = node.left.size + node.right.size + node.count  # type: ignore
+
+    def refresh_path(self, node: MultiNode | None):  # type: ignore
+        nil = self.nil
+        while node is not None and node is not nil:
+            node.size = node.left.size + node.right.size + node.count  # type: ignore
+            node = node.parent  # type: ignore
+
+    @classmethod
+    def from_iterable(cls, iterable: Iterable[int]) -> RBMultiset:  # type: ignore
+        """
+        Counts the values and builds the distinct ones like `from_sorted`, with every node created with its count, so
+        the sizes come out right in the same O(n) pass.
+        """
+        counts = Counter(iterable)
+        keys = sorted(counts)
+        tree = cls()
+
+        def counted_node(val: int, **links) -> MultiNode:
+            node = MultiNode(val, **links)
+            node.count = counts[val]
+            return node
+
+        if keys:
+            tree.node_class = counted_node  # type: ignore
+            tree.root = tree._build_sorted(keys, 0, len(keys), 0, len(keys).bit_length() - 1)
+            tree.root.parent = None
+            del tree.node_class
+        return tree
+
+    def add(self, val: int, n: int = 1):
+        """
+        Adds `n` occurrences of `val`.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        before = len(self)
+        node: MultiNode = self.insert(val)  # type: ignore
+        if len(self) == before:
+            node.count += n
+        elif n == 1:
+            return
+        else:
+            node.count = n
+        self.refresh_path(node)
+
+    def discard(self, val: int, n: int = 1) -> int:
+        """
+        Removes up to `n` occurrences of `val` and returns how many were removed. The node goes when its count hits 0.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        node: MultiNode = self._find(val)  # type: ignore
+        if node is self.nil:
+            return 0
+        if node.count > n:
+            node.count -= n
+            self.refresh_path(node)
+            return n
+        removed = node.count
+        self.delete_node(node)
+        return removed
+
+    def count(self, val: int) -> int:
+        node: MultiNode = self._find(val)  # type: ignore
+        return node.count
+
+    def distinct(self) -> int:
+        """
+        The number of distinct values, which takes a full walk. O(n)
+        """
+        return sum(1 for _ in self._irange_nodes())
+
+    def items(self, lo: int | None = None, hi: int | None = None) -> Iterator[tuple[int, int]]:
+        """
+        Lazily yields `(value, count)` for the distinct values in `[lo, hi]`, in ascending order.
+        """
+        for node in self._irange_nodes(lo, hi):
+            yield node.val, node.count  # type: ignore
+
+    def elements(self) -> Iterator[int]:
+        """
+        Yields every sample in ascending order, each value repeated `count` times.
+        """
+        for val, count in self.items():
+            for _ in range(count):
+                yield val
+
+    def _union(self, a: MultiNode, a_bh: int, b: MultiNode, b_bh: int) -> tuple[MultiNode, int]:  # type: ignore
+        if b is self.nil:
+            return a, a_bh
+        if a is self.nil:
+            return b, b_bh
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, found, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        if found is not None:
+            b.count += found.count  # type: ignore
+        left, left_bh = self._union(a_less, a_less_bh, b_left, child_bh)  # type: ignore
+        right, right_bh = self._union(a_greater, a_greater_bh, b_right, child_bh)  # type: ignore
+        return self._join(left, left_bh, b, right, right_bh)  # type: ignore
+
+    def _intersection(self, a: MultiNode, a_bh: int, b: MultiNode, b_bh: int) -> tuple[MultiNode, int]:  # type: ignore
+        if a is self.nil or b is self.nil:
+            return self.nil, 0  # type: ignore
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, found, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        left, left_bh = self._intersection(a_less, a_less_bh, b_left, child_bh)  # type: ignore
+        right, right_bh = self._intersection(a_greater, a_greater_bh, b_right, child_bh)  # type: ignore
+        if found is not None:
+            found.count = min(found.count, b.count)  # type: ignore
+            return self._join(left, left_bh, found, right, right_bh)  # type: ignore
+        return self._join2(left, left_bh, right, right_bh)  # type: ignore
+
+    def _difference(self, a: MultiNode, a_bh: int, b: MultiNode, b_bh: int) -> tuple[MultiNode, int]:  # type: ignore
+        if a is self.nil:
+            return self.nil, 0  # type: ignore
+        if b is self.nil:
+            return a, a_bh
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, found, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        left, left_bh = self._difference(a_less, a_less_bh, b_left, child_bh)  # type: ignore
+        right, right_bh = self._difference(a_greater, a_greater_bh, b_right, child_bh)  # type: ignore
+        if found is not None and found.count > b.count:  # type: ignore
+            found.count -= b.count  # type: ignore
+            return self._join(left, left_bh, found, right, right_bh)  # type: ignore
+        return self._join2(left, left_bh, right, right_bh)  # type: ignore
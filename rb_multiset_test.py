@@ -0,0 +1,87 @@
+from __future__ import annotations
+from collections import Counter
+from rb_multiset import RBMultiset
+from rb_tree_test import check_rb
+import random
+import pytest
+
+
+def check_counts(tree: RBMultiset) -> int:
+    stack = [tree.root]
+    total = 0
+    while stack:
+        node = stack.pop()
+        if node is tree.nil:
+            continue
+        assert node.count >= 1  # type: ignore
+        assert node.size == node.left.size + node.right.size + node.count  # type: ignore
+        total += node.count  # type: ignore
+        stack += [node.left, node.right]
+    assert total == len(tree)
+    return total
+
+
+# ===================Helper functions above===============
+
+
+def test_multiset_matches_counter():
+    rng = random.Random(20)
+    tree = RBMultiset()
+    expected: Counter[int] = Counter()
+    for _ in range(6000):
+        val = int(rng.expovariate(0.05))
+        if rng.random() < 0.7:
+            n = rng.choice((1, 1, 3))
+            tree.add(val, n)
+            expected[val] += n
+        else:
+            n = rng.choice((1, 2, 100))
+            removed = min(n, expected[val])
+            assert tree.discard(val, n) == removed
+            expected[val] -= removed
+            expected += Counter()
+    check_rb(tree)
+    check_counts(tree)
+    samples = sorted(expected.elements())
+    assert len(tree) == len(samples) and tree.distinct() == len(expected)
+    assert list(tree) == sorted(expected) and list(tree.elements()) == samples
+    for val in range(0, 120, 7):
+        assert tree.count(val) == expected[val]
+        assert tree.bisect_right(val) == sum(1 for s in samples if s <= val)
+        assert tree.rank(val) == sum(1 for s in samples if s < val)
+        assert tree.count_range(val, val + 10) == sum(1 for s in samples if val <= s <= val + 10)
+    for k in (0, 1, len(samples) // 2, -1):
+        assert tree.select(k) == samples[k]
+    assert list(tree.items(10, 12)) == [(v, expected[v]) for v in (10, 11, 12) if expected[v]]
+
+
+def test_multiset_from_iterable():
+    values = [5, 1, 5, 5, 3, 1] * 50
+    tree = RBMultiset.from_iterable(values)
+    check_rb(tree)
+    check_counts(tree)
+    assert list(tree.items()) == [(1, 100), (3, 50), (5, 150)]
+    assert tree.select(100) == 3 and tree.select(150) == 5
+    tree.delete(5)
+    assert len(tree) == 150 and tree.count(5) == 0
+    with pytest.raises(ValueError):
+        tree.add(1, 0)
+
+
+def test_multiset_set_operations():
+    rng = random.Random(21)
+    for _ in range(20):
+        a_vals = [rng.randrange(60) for _ in range(rng.randrange(300))]
+        b_vals = [rng.randrange(40, 100) for _ in range(rng.randrange(100))]
+        a_count, b_count = Counter(a_vals), Counter(b_vals)
+        for op, expected in (
+            ("union", a_count + b_count),
+            ("intersection", a_count & b_count),
+            ("difference", a_count - b_count),
+        ):
+            a, b = RBMultiset.from_iterable(a_vals), RBMultiset.from_iterable(b_vals)
+            getattr(a, op)(b)
+            check_rb(a)
+            check_counts(a)
+            assert list(a.items()) == sorted(expected.items())
+            assert len(a) == sum(expected.values()) and len(b) == 0
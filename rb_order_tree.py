@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from rb_tree import RBNode, RBTree
+
+
+class OSNode(RBNode):
+    """
+    An `RBNode` that also stores `size`, the number of nodes in its subtree (itself included).
+    The `nil` sentinel has a size of 0.
+    """
+
+    def __init__(
+        self: OSNode,
+        val: int | None,
+        left: None | RBNode = None,
+        right: None | RBNode = None,
+        red: bool = False,
+    ):
+        super().__init__(val, left, right, red)
+        self.size: int = 0 if val is None else 1
+
+
+class OrderStatisticRBTree(RBTree):
+    """
+    - 𝗔 𝗿𝗲𝗱-𝗯𝗹𝗮𝗰𝗸 𝘁𝗿𝗲𝗲 𝘁𝗵𝗮𝘁 𝗸𝗻𝗼𝘄𝘀 𝘁𝗵𝗲 𝘀𝗶𝘇𝗲 𝗼𝗳 𝗲𝘃𝗲𝗿𝘆 𝘀𝘂𝗯𝘁𝗿𝗲𝗲.
+    - Every node stores `size = left.size + right.size + 1`, so positional questions can be answered on the way down
+      from the root instead of with a full traversal:
+    - - `rank(x)`: how many values are less than `x`. O(log(n))
+    - - `select(k)`: the value at index `k` in sorted order. O(log(n))
+    - - `count_range(a, b)`: how many values are in `[a, b]`. O(log(n))
+    - - `len(tree)`: the size of the root. O(1)
+    ### Keeping the sizes correct
+    1. `insert` and `delete_node` call `refresh_path` on the lowest node whose children changed, which recomputes the
+       size of it and every ancestor. That is one pass up a path of O(log(n)) nodes.
+    2. A rotation only changes the subtrees of the two nodes it rotates, so `rotate_left`/`rotate_right` recompute the
+       lower node first and then the node that replaced it. Recoloring doesn't change any size.
+    """
+
+    node_class = OSNode
+
+    def __len__(self) -> int:
+        return self.root.size  # type: ignore
+
+    def refresh(self, node: OSNode):  # type: ignore
+        node.size = node.left.size + node.right.size + 1  # type: ignore
+
+    def refresh_path(self, node: OSNode | None):  # type: ignore
+        nil = self.nil
+        while node is not None and node is not nil:
+            node.size = node.left.size + node.right.size + 1  # type: ignore
+            node = node.parent  # type: ignore
+
+    def rotate_left(self, x: OSNode | None):  # type: ignore
+        y = x.right  # type: ignore
+        super().rotate_left(x)
+        if x.parent is y:  # type: ignore
+            self.refresh(x)  # type: ignore
+            self.refresh(y)  # type: ignore
+
+    def rotate_right(self, x: OSNode | None):  # type: ignore
+        y = x.left  # type: ignore
+        super().rotate_right(x)
+        if x.parent is y:  # type: ignore
+            self.refresh(x)  # type: ignore
+            self.refresh(y)  # type: ignore
+
+    def rank(self, val: int) -> int:
+        """
+        Returns the number of values in the tree that are less than `val`. `val` doesn't have to be in the tree.
+        - Every time we go right, the current node and its whole left subtree are smaller than `val`, so add them up.
+        """
+        count = 0
+        current = self.root
+        while current != self.nil:
+            if val <= current.val:  # type: ignore
+                current = current.left  # type: ignore
+            else:
+                # * the left subtree and the node itself: everything in `size` that isn't on the right
+                count += current.size - current.right.size  # type: ignore
+                current = current.right  # type: ignore
+        return count
+
+    def bisect_left(self, val: int) -> int:
+        """
+        The index where `val` is, or would be inserted, in the sorted values. The same as `rank`.
+        """
+        return self.rank(val)
+
+    def bisect_right(self, val: int) -> int:
+        """
+        The number of values in the tree that are less than or equal to `val`.
+        """
+        count = 0
+        current = self.root
+        while current != self.nil:
+            if val < current.val:  # type: ignore
+                current = current.left  # type: ignore
+            else:
+                count += current.size - current.right.size  # type: ignore
+                current = current.right  # type: ignore
+        return count
+
+    def select(self, k: int) -> int:
+        """
+        Returns the value at index `k` of the sorted values. Negative indexes count from the end, like a list.
+        Raises `IndexError` if there is no such index.
+        - If `k` is smaller than the size of the left subtree, the answer is down the left side. If it is equal, it's
+          the current node. Otherwise skip the left subtree and the current node, and look for the rest on the right.
+        - A node counts for `size - left.size - right.size` positions (1 here, its multiplicity in `RBMultiset`).
+        """
+        size = len(self)
+        if k < 0:
+            k += size
+        if not 0 <= k < size:
+            raise IndexError("select index out of range")
+        current: OSNode = self.root  # type: ignore
+        while True:
+            left_size = current.left.size  # type: ignore
+            if k < left_size:
+                current = current.left  # type: ignore
+                continue
+            k -= left_size
+            own = current.size - left_size - current.right.size  # type: ignore
+            if k < own:
+                return current.val  # type: ignore
+            k -= own
+            current = current.right  # type: ignore
+
+    def count_range(self, lower_bound: int, upper_bound: int) -> int:
+        """
+        Returns how many values are between `lower_bound` and `upper_bound`, both included, without visiting them.
+        """
+        if upper_bound < lower_bound:
+            return 0
+        return self.bisect_right(upper_bound) - self.bisect_left(lower_bound)
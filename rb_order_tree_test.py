@@ -0,0 +1,127 @@
+from __future__ import annotations
+from rb_order_tree import OrderStatisticRBTree, OSNode
+from rb_tree import RBTree
+from rb_tree_test import check_rb
+import bisect
+import random
+
+
+def check_sizes(tree: OrderStatisticRBTree, node: OSNode | None = None) -> int:
+    if node is None:
+        node = tree.root  # type: ignore
+    if node == tree.nil:
+        assert node.size == 0  # type: ignore
+        return 0
+    size = check_sizes(tree, node.left) + check_sizes(tree, node.right) + 1  # type: ignore
+    assert node.size == size  # type: ignore
+    return size
+
+
+# ===================Helper functions above===============
+
+
+def test_sizes_survive_inserts_and_deletes():
+    random.seed(10)
+    values = list(range(1500))
+    random.shuffle(values)
+    t = OrderStatisticRBTree()
+    for i in values:
+        t.insert(i)
+    t.insert(values[0])
+    check_rb(t)
+    check_sizes(t)
+    assert len(t) == 1500
+    random.shuffle(values)
+    for i in values[:1000]:
+        t.delete(i)
+    t.pop_min()
+    t.pop_max()
+    check_rb(t)
+    check_sizes(t)
+    assert len(t) == 498
+
+
+def test_rank_select_count_range():
+    random.seed(2)
+    values = sorted(random.sample(range(5000), 700))
+    t = OrderStatisticRBTree()
+    for i in random.sample(values, len(values)):
+        t.insert(i)
+    for k, val in enumerate(values):
+        assert t.select(k) == val
+        assert t.rank(val) == k
+    assert t.select(-1) == values[-1]
+    for probe in random.sample(range(-10, 5010), 300):
+        assert t.bisect_left(probe) == bisect.bisect_left(values, probe)
+        assert t.bisect_right(probe) == bisect.bisect_right(values, probe)
+        hi = probe + random.randint(-5, 400)
+        expected = bisect.bisect_right(values, hi) - bisect.bisect_left(values, probe)
+        assert t.count_range(probe, hi) == max(expected, 0)
+    for bad in (700, -701):
+        try:
+            t.select(bad)
+        except IndexError:
+            continue
+        assert False
+
+
+def test_from_sorted_sets_sizes():
+    t = OrderStatisticRBTree.from_sorted(range(100))
+    check_sizes(t)
+    assert len(t) == 100 and t.select(37) == 37 and len(OrderStatisticRBTree()) == 0
+
+
+def test_sizes_survive_join_split_and_union():
+    random.seed(4)
+    a = OrderStatisticRBTree.from_iterable(random.sample(range(10_000), 3000))
+    b = OrderStatisticRBTree()
+    for i in random.sample(range(10_000), 40):
+        b.insert(i)
+    moved = b.root
+    expected = sorted(set(a) | set(b))
+    a.union(b)
+    check_rb(a)
+    check_sizes(a)
+    assert list(a) == expected and len(a) == len(expected)
+    assert any(node is moved for node in _nodes(a))
+    less, rest = a.split(5000)
+    check_sizes(less)
+    check_sizes(rest)
+    assert len(less) + len(rest) == len(expected)
+    pivot = rest.pop_min()
+    joined = OrderStatisticRBTree.join(less, pivot, rest)
+    check_rb(joined)
+    check_sizes(joined)
+    assert list(joined) == expected and joined.select(100) == expected[100]
+
+
+def _nodes(tree: OrderStatisticRBTree) -> list[OSNode]:
+    found: list[OSNode] = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        if node != tree.nil:
+            found.append(node)  # type: ignore
+            stack += [node.left, node.right]  # type: ignore
+    return found
+
+
+def test_insert_sorted_stream_keeps_sizes():
+    tree = OrderStatisticRBTree()
+    stream = [i * 3 + (i % 7) for i in range(3000)]
+    tree.insert_sorted_stream(stream)
+    check_rb(tree)
+    check_sizes(tree)
+    assert len(tree) == len(set(stream)) and tree.select(10) == sorted(set(stream))[10]
+
+
+def test_refresh_hooks_are_instance_methods():
+    # * the hooks are called as `self.refresh(node)` and augmented trees read per-tree state (`self.nil`) from `self`
+    plain, counted = RBTree(), OrderStatisticRBTree()
+    for tree in (plain, counted):
+        assert tree.refresh.__self__ is tree
+        assert tree.refresh_path.__self__ is tree
+    node = counted.insert(5)
+    node.size = 0
+    counted.refresh(node)
+    assert node.size == 1
@@ -1,5 +1,14 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ContextManager, Iterable, Iterator, Sequence
+
+from tree_file import dump
+from tree_stats import TreeStats, instrument
+
+if TYPE_CHECKING:
+    from frozen_tree import FrozenTree
+
 # from typing import Any
 
 
@@ -38,6 +47,49 @@ class RBNode:
         return left + 1, right + 1
 
 
+_SENTINELS: dict[type[RBNode], RBNode] = {}
+
+
+def _sentinel(node_class: type[RBNode]) -> RBNode:
+    """
+    Returns the shared `nil` leaf for trees built from `node_class`. Nothing ever changes it: it stays black, and its
+    `parent`, `left` and `right` stay `None`.
+    """
+    nil = _SENTINELS.get(node_class)
+    if nil is None:
+        nil = _SENTINELS[node_class] = node_class(None)
+    return nil
+
+
+@dataclass
+class RBReport:
+    """
+    The result of `RBTree.validate`. Each `*_violations` field counts the nodes that broke that rule, and `errors`
+    describes the first few of them. `black_height` is the number of black nodes on every path from the root to a
+    `nil` leaf (counting the `nil` leaf), which is only meaningful if there are no `black_height_violations`.
+    """
+
+    node_count: int = 0
+    height: int = 0
+    black_height: int = 0
+    root_violations: int = 0
+    order_violations: int = 0
+    red_violations: int = 0
+    link_violations: int = 0
+    black_height_violations: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not (
+            self.root_violations
+            or self.order_violations
+            or self.red_violations
+            or self.link_violations
+            or self.black_height_violations
+        )
+
+
 # @dataclass
 class RBTree:
     """
@@ -56,55 +108,210 @@ class RBTree:
 
     # ? [assignments/binary_tree/redblackexample.png]
 
+    node_class: type[RBNode] = RBNode
+    _stats: TreeStats | None = None
+
     def __init__(self, root: None | RBNode = None):
-        self.nil = RBNode(None)
+        # * one black `nil` per node class, shared by every tree, so nodes can move between trees (see `join`)
+        self.nil = _sentinel(self.node_class)
         # self.nil.red = False
         # self.nil.left = None
         # self.nil.right = None
         self.root = root or self.nil
 
-    def insert(self, val: int):
+    def instrument(self) -> ContextManager[TreeStats]:
+        """
+        Returns a context manager that counts descents, comparisons, rotations, recolors and fix-up iterations while
+        it is active. See `tree_stats.py`; outside of it the tree runs its normal, uninstrumented methods.
+        """
+        return instrument(self)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        A snapshot of the counters from the current or most recent `instrument()` block (all zero if there was none).
+        """
+        return (self._stats or TreeStats()).snapshot()
+
+    def refresh(self, node: RBNode):
+        """
+        ### Augmentation hook.
+        Recomputes whatever a node caches about its subtree (a size, a maximum, ...) from its own value and its two
+        children. A plain `RBTree` caches nothing, so this does nothing.
+        - Augmented trees override it together with `refresh_path`, `rotate_left` and `rotate_right`.
+        """
+
+    def refresh_path(self, node: RBNode | None):
+        """
+        Augmentation hook, called once after every structural change by `insert` and `delete_node`, before any fix-up
+        rotations. Augmented trees refresh `node` and every ancestor above it. A plain `RBTree` does nothing.
+        """
+
+    @classmethod
+    def from_sorted(cls, iterable: Iterable[int]) -> RBTree:
         """
-        ### An RBTree method to insert a new node.
-        Instantiate a new RBNode with the given value.
-        1. A new node will be a leafnode, so set its `left` and `right` children to nil.
-        2. A node with black children must be red, so assign the new node to red.
-        3. Initialize a `parent` variable as `None` (because we dont know it yet) and `current` variable as the root of the tree (*See step 5)
-        4. While current is not a `nil` node, set parent to be current.
+        ### Build a tree from values that are already in strictly ascending order, in O(n).
+        Instead of calling `insert` once per value (O(n log(n)) with rotations), the middle value of every slice becomes
+        the root of that slice's subtree, so the tree comes out perfectly balanced and needs no rotations at all.
+        1. Every level except the deepest one is full, so every path to a `nil` leaf passes through the same number of
+           nodes above the deepest level. Those nodes are all colored black.
+        2. The nodes on the deepest level are colored red (unless the deepest level is the root), which keeps rule 5
+           for the paths that end one level higher. Their children are always `nil`, so rule 4 holds as well.
+        - Raises `ValueError` if the values are not strictly ascending. Use `from_iterable` for unsorted input.
+        """
+        keys: list[int] = list(iterable)
+        for i in range(1, len(keys)):
+            if not keys[i - 1] < keys[i]:
+                raise ValueError("from_sorted() requires strictly ascending values")
+        tree = cls()
+        if keys:
+            red_depth = len(keys).bit_length() - 1
+            tree.root = tree._build_sorted(keys, 0, len(keys), 0, red_depth)
+            tree.root.parent = None
+        return tree
+
+    @classmethod
+    def from_iterable(cls, iterable: Iterable[int]) -> RBTree:
+        """
+        Sorts the values, drops duplicates, and builds the tree with `from_sorted`.
+        """
+        keys: list[int] = []
+        for val in sorted(iterable):
+            if not keys or keys[-1] != val:
+                keys.append(val)
+        return cls.from_sorted(keys)
+
+    def _build_sorted(
+        self, keys: Sequence[int], lo: int, hi: int, depth: int, red_depth: int
+    ) -> RBNode:
+        """
+        Builds the subtree for `keys[lo:hi]` around its middle value and returns its root.
+        The recursion only goes as deep as the finished tree, so O(log(n)).
+        """
+        mid = (lo + hi) // 2
+        node = self.node_class(
+            keys[mid], left=self.nil, right=self.nil, red=0 < depth == red_depth
+        )
+        if lo < mid:
+            node.left = self._build_sorted(keys, lo, mid, depth + 1, red_depth)
+            node.left.parent = node
+        if mid + 1 < hi:
+            node.right = self._build_sorted(keys, mid + 1, hi, depth + 1, red_depth)
+            node.right.parent = node
+        self.refresh(node)
+        return node
+
+    def insert(self, val: int) -> RBNode:
+        """
+        ### An RBTree method to insert a new node, returning the node that holds `val`.
+        1. Initialize a `parent` variable as `None` (because we dont know it yet) and `current` variable as the root of the tree (*See step 3)
+        2. While current is not a `nil` node, set parent to be current (in `_descend`, which `insert_near` shares).
         - - Traverse the entire tree using comparisons,
           and set current to be its own child, until `current` is a `nil` node to find the node that has the closest value
-          to our new node. (Duplicates are not allowed, so an equal comparison returns)
-        5. If the parent is still `None`, the tree must be empty, so set the tree's root to the new node.
-        - - Otherwise, assign the new node to be the parent's left or right child, depending on comparisons.
-        """
-        new_node = RBNode(val)
-        new_node.left = self.nil  # type: ignore
-        new_node.right = self.nil  # type: ignore
-        new_node.red = True
+          to our new node. (Duplicates are not inserted again: the existing node is returned, so callers such as
+          `RBMap` can update what it holds)
+        3. `_link` instantiates a new node with the given value. A new node will be a leafnode, so its `left` and `right`
+           children are nil, and a node with black children must be red, so it starts out red.
+        - - If the parent is still `None`, the tree must be empty, so set the tree's root to the new node.
+        - - Otherwise, assign the new node to be the parent's left or right child, on the side the descent ended on.
+        """
+        parent, current, left = self._descend(self.root, val)
+        if current is not self.nil:
+            # * duplicate, hand back the existing node
+            return current
+        return self._link(parent, val, left)
+
+    def _descend(self, current: RBNode, val: int) -> tuple[RBNode | None, RBNode, bool]:
+        """
+        Walks down from `current` to `val`. Returns `(parent, node, left)`: `node` holds `val`, or is `self.nil` when
+        there is none, and then `parent` is the node a new leaf for `val` hangs from (`None` in an empty tree), on its
+        left side if `left`.
+        """
+        nil = self.nil
         parent = None
-        current = self.root
-        while current != self.nil:
+        left = False
+        while current is not nil:
             parent = current
-            if new_node.val < current.val:  # type: ignore
+            if val < current.val:  # type: ignore
                 current = current.left  # type: ignore
-            elif new_node.val > current.val:  # type: ignore
+                left = True
+            elif val > current.val:  # type: ignore
                 current = current.right  # type: ignore
+                left = False
             else:
-                # * duplicate, just ignore
-                return
+                break
+        return parent, current, left
+
+    def insert_near(self, cursor: RBNode | None, val: int) -> RBNode:
+        """
+        ### Inserts `val` starting from `cursor` (a "finger") instead of the root, and returns the node holding `val`.
+        The returned node is the finger for the next call: nodes keep their value through rotations, so it stays valid
+        until that node is deleted.
+        1. Climb the `parent` pointers from the cursor only until we reach a subtree whose value range contains `val`.
+           For `val` above the cursor, that is the first time we come up from a left child whose parent is bigger
+           than `val` (the lower bound is the cursor itself). For `val` below the cursor it is the mirror image.
+        2. Descend from there like `insert`, link a red leaf, then `refresh_path` and `fix_insert`.
+        - If `val` is `d` positions away from the cursor, the climb and the descent cost O(log(d)), plus the
+          amortized O(1) of `fix_insert`, instead of O(log(n)). A `None` or `nil` cursor starts from the root.
+        - Duplicates are not inserted, the existing node is returned.
+        """
+        nil = self.nil
+        start = self.root if cursor is None or cursor is nil else self._climb(cursor, val)
+        parent, current, left = self._descend(start, val)
+        if current is not nil:
+            return current
+        return self._link(parent, val, left)
+
+    def _climb(self, cursor: RBNode, val: int) -> RBNode:
+        """
+        Step 1 of `insert_near`: returns the node to start the descent for `val` from, which is the node holding `val`
+        if the climb passes it.
+        """
+        if val == cursor.val:
+            return cursor
+        above = val > cursor.val  # type: ignore
+        current = cursor
+        while current.parent is not None:
+            parent = current.parent
+            if above and current is parent.left or not above and current is parent.right:
+                if val == parent.val:
+                    return parent
+                if (val < parent.val) == above:  # type: ignore
+                    break
+            current = parent
+        return current
 
-        new_node.parent = parent  # type: ignore
+    def _link(self, parent: RBNode | None, val: int, left: bool) -> RBNode:
+        """
+        Hangs a new red leaf holding `val` on the free `left` or right side of `parent` (or makes it the root), then
+        refreshes and repairs the tree like `insert`, and returns the new node.
+        """
+        new_node = self.node_class(val, left=self.nil, right=self.nil, red=True)
+        new_node.parent = parent
         if parent is None:
             self.root = new_node
-            new_node.red = False
-            return
+        elif left:
+            parent.left = new_node
         else:
-            if parent.val > new_node.val:  # type: ignore
-                parent.left = new_node  # type: ignore
-            elif parent.val < new_node.val:  # type: ignore
-                parent.right = new_node  # type: ignore
-
+            parent.right = new_node
+        self.refresh_path(new_node)
         self.fix_insert(new_node)
+        return new_node
+
+    def insert_sorted_stream(self, iterable: Iterable[int]):
+        """
+        Inserts values that arrive roughly in order (timestamps, ...) with `insert_near`, keeping the finger on the
+        last value inserted. Each value then costs O(log(d)) for its distance `d` from the previous one.
+        - A new maximum is the common case, and the one a finger handles worst: only the root can prove nothing is
+          bigger. So the stream also keeps the node holding the maximum, which always has a `nil` right child, and
+          hangs a new maximum straight under it.
+        """
+        finger: RBNode | None = None
+        maximum = self._maximum(self.root) if self.root is not self.nil else None
+        for val in iterable:
+            if maximum is None or val > maximum.val:  # type: ignore
+                finger = maximum = self._link(maximum, val, False)
+            else:
+                finger = self.insert_near(finger, val)
 
     def fix_insert(self, new_node: RBNode):
         """
@@ -124,6 +331,8 @@ class RBTree:
         4. If the parent is a left child:
         - Similar steps to above but mirrored (left/right swapped).
         5. Ensure the root is always black at the end.
+        - Returns whether that last step had to turn a red root black. Rotations and recoloring inside the loop keep
+          the number of black nodes on every path the same, so this is the only way the black height grows.
 
         #### ? [assignments/binary_tree/redblackexample.png]
         ```
@@ -180,7 +389,9 @@ class RBTree:
                     new_node.parent.red = False  # type: ignore
                     new_node.parent.parent.red = True  # type: ignore
                     self.rotate_right(new_node.parent.parent)  # type: ignore
+        grew = self.root.red
         self.root.red = False
+        return grew
 
     def rotate_left(self: RBTree, x: RBNode | None):
         # ? Example [assignments/binary_tree/rotate.png]
@@ -218,11 +429,726 @@ class RBTree:
         y.right = x  # type: ignore
         x.parent = y  # type: ignore
 
-    def black_count(self, node: RBNode, blacks: set[int] = set(), counter: int = 0):
+    def iter_preorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from the top down, keeping at most one pending right child per level on a stack.
+        """
+        if self.root == self.nil:
+            return
+        stack: list[RBNode] = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node.val  # type: ignore
+            if node.right != self.nil:
+                stack.append(node.right)  # type: ignore
+            if node.left != self.nil:
+                stack.append(node.left)  # type: ignore
+
+    def iter_inorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from lowest to highest, in O(height) memory and without recursion.
+        """
+        nil = self.nil
+        stack: list[RBNode] = []
+        node: RBNode = self.root
+        while stack or node != nil:
+            while node != nil:
+                stack.append(node)
+                node = node.left  # type: ignore
+            node = stack.pop()
+            yield node.val  # type: ignore
+            node = node.right  # type: ignore
+
+    def iter_reversed(self) -> Iterator[int]:
+        """
+        Lazily yields the values from highest to lowest, the mirror image of `iter_inorder`.
+        """
+        nil = self.nil
+        stack: list[RBNode] = []
+        node: RBNode = self.root
+        while stack or node != nil:
+            while node != nil:
+                stack.append(node)
+                node = node.right  # type: ignore
+            node = stack.pop()
+            yield node.val  # type: ignore
+            node = node.left  # type: ignore
+
+    def iter_postorder(self) -> Iterator[int]:
+        """
+        Lazily yields the values from the bottom up. A node on top of the stack is only yielded once its right
+        subtree has been finished, which is the case when that subtree's root was the last node yielded.
+        """
+        nil = self.nil
+        stack: list[RBNode] = []
+        node: RBNode = self.root
+        last: RBNode | None = None
+        while stack or node != nil:
+            if node != nil:
+                stack.append(node)
+                node = node.left  # type: ignore
+                continue
+            top = stack[-1]
+            if top.right != nil and top.right is not last:
+                node = top.right  # type: ignore
+            else:
+                yield top.val  # type: ignore
+                last = stack.pop()
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_inorder()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.iter_reversed()
+
+    def exists(self, val: int) -> bool:
+        """
+        Given a value, this method will search the tree in O(log(n)) and returns whether it exists.
+        """
+        return self._find(val) != self.nil
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def next_node(self, node: RBNode) -> RBNode:
+        """
+        Returns the node that follows `node` in sorted order, or `self.nil` if it is the last one.
+        - If there is a right subtree, the answer is its minimum.
+        - Otherwise climb the `parent` pointers until we come up from a left child; that parent is the answer.
+        - Walking the whole tree this way touches every edge twice, so each step is amortized O(1).
+        """
+        if node.right != self.nil:
+            return self._minimum(node.right)  # type: ignore
+        parent = node.parent
+        while parent is not None and node == parent.right:
+            node = parent
+            parent = parent.parent
+        return parent if parent is not None else self.nil
+
+    def prev_node(self, node: RBNode) -> RBNode:
+        """
+        Returns the node that comes before `node` in sorted order, or `self.nil` if it is the first one.
+        This is the mirror image of `next_node`.
+        """
+        if node.left != self.nil:
+            return self._maximum(node.left)  # type: ignore
+        parent = node.parent
+        while parent is not None and node == parent.left:
+            node = parent
+            parent = parent.parent
+        return parent if parent is not None else self.nil
+
+    def _lower_node(self, val: int, inclusive: bool = True) -> RBNode:
+        """
+        Returns the node with the smallest value that is `>= val` (or `> val` when not inclusive), else `self.nil`.
+        """
+        found = self.nil
+        current = self.root
+        while current != self.nil:
+            if current.val > val or (inclusive and current.val == val):  # type: ignore
+                found = current
+                current = current.left  # type: ignore
+            else:
+                current = current.right  # type: ignore
+        return found
+
+    def _upper_node(self, val: int, inclusive: bool = True) -> RBNode:
+        """
+        Returns the node with the largest value that is `<= val` (or `< val` when not inclusive), else `self.nil`.
+        """
+        found = self.nil
+        current = self.root
+        while current != self.nil:
+            if current.val < val or (inclusive and current.val == val):  # type: ignore
+                found = current
+                current = current.right  # type: ignore
+            else:
+                current = current.left  # type: ignore
+        return found
+
+    def floor(self, val: int) -> int | None:
+        """
+        The largest value in the tree that is less than or equal to `val`, or `None`.
+        """
+        return self._upper_node(val).val
+
+    def ceiling(self, val: int) -> int | None:
+        """
+        The smallest value in the tree that is greater than or equal to `val`, or `None`.
+        """
+        return self._lower_node(val).val
+
+    def successor(self, val: int) -> int | None:
+        """
+        The smallest value in the tree that is strictly greater than `val`, or `None`. `val` doesn't have to be in the tree.
+        """
+        return self._lower_node(val, inclusive=False).val
+
+    def predecessor(self, val: int) -> int | None:
+        """
+        The largest value in the tree that is strictly less than `val`, or `None`. `val` doesn't have to be in the tree.
+        """
+        return self._upper_node(val, inclusive=False).val
+
+    def irange(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        ### Lazily yields the values between `lo` and `hi` in sorted order.
+        - `None` leaves that side of the range open. `inclusive` says whether `lo` and `hi` themselves are included.
+        - With `reverse=True` the values come from highest to lowest.
+        - Finding the first value costs O(log(n)); every following value is one `next_node`/`prev_node` step, so
+          reading `k` values costs O(log(n) + k) time and O(1) extra memory.
+        - The tree must not be modified while the generator is being consumed.
+        """
+        for node in self._irange_nodes(lo, hi, inclusive, reverse):
+            yield node.val  # type: ignore
+
+    def _irange_nodes(
+        self,
+        lo: Any = None,
+        hi: Any = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[RBNode]:
+        """
+        The nodes behind `irange`, for subclasses that need more than the value (see `sorted_map.py`).
+        """
+        nil = self.nil
+        if not reverse:
+            if lo is None:
+                node = self._minimum(self.root) if self.root != nil else nil
+            else:
+                node = self._lower_node(lo, inclusive[0])
+            while node != nil:
+                if hi is not None and (node.val > hi or (node.val == hi and not inclusive[1])):  # type: ignore
+                    return
+                yield node
+                node = self.next_node(node)
+        else:
+            if hi is None:
+                node = self._maximum(self.root) if self.root != nil else nil
+            else:
+                node = self._upper_node(hi, inclusive[1])
+            while node != nil:
+                if lo is not None and (node.val < lo or (node.val == lo and not inclusive[0])):  # type: ignore
+                    return
+                yield node
+                node = self.prev_node(node)
+
+    def freeze(self) -> FrozenTree:
+        """
+        Returns an immutable NumPy snapshot of the current values for vectorized batch lookups. See `frozen_tree.py`.
+        Later changes to this tree don't affect the snapshot. Requires `numpy`.
+        """
+        from frozen_tree import FrozenTree
+
+        return FrozenTree.from_sorted(list(self.iter_inorder()))
+
+    def save(self, path: str, layout: str = "sorted"):
+        """
+        Writes the values to a versioned binary file that `tree_file.MappedTree` can open without deserializing.
+        `layout` is `"sorted"` or `"eytzinger"`. See `tree_file.py`.
+        """
+        dump(self.iter_inorder(), path, layout)
+
+    def _find(self, val: int) -> RBNode:
+        """
+        Returns the node holding `val`, or `self.nil` if there isn't one.
+        """
+        current = self.root
+        while current != self.nil:
+            if val < current.val:  # type: ignore
+                current = current.left  # type: ignore
+            elif val > current.val:  # type: ignore
+                current = current.right  # type: ignore
+            else:
+                return current
+        return current
+
+    def _minimum(self, node: RBNode) -> RBNode:
+        while node.left != self.nil:
+            node = node.left  # type: ignore
+        return node
+
+    def _maximum(self, node: RBNode) -> RBNode:
+        while node.right != self.nil:
+            node = node.right  # type: ignore
+        return node
+
+    def black_height(self, node: RBNode | None = None) -> int:
+        """
+        The number of black nodes on every path from `node` (default: the root, included if black) down to a `nil`
+        leaf, not counting the leaf. Walks the left spine, so O(log(n)).
+        """
+        if node is None:
+            node = self.root
+        height = 0
+        while node != self.nil:
+            if not node.red:
+                height += 1
+            node = node.left  # type: ignore
+        return height
+
+    def _detach(self, node: RBNode) -> tuple[RBNode, RBNode]:
+        """
+        Cuts `node` loose from its parent and children, and returns its former children as parentless subtrees.
+        """
+        left: RBNode = node.left  # type: ignore
+        right: RBNode = node.right  # type: ignore
+        if left != self.nil:
+            left.parent = None
+        if right != self.nil:
+            right.parent = None
+        node.left = node.right = self.nil
+        node.parent = None
+        return left, right
+
+    def _join(
+        self, left: RBNode, left_bh: int, node: RBNode, right: RBNode, right_bh: int
+    ) -> tuple[RBNode, int]:
+        """
+        ### Joins two parentless subtrees with a detached `node` in the middle, reusing all of them.
+        Every value in `left` must be smaller than `node.val`, and every value in `right` larger. Returns the new
+        subtree root (parentless) and its black height.
+        1. If both sides have the same black height, `node` becomes the root with `left` and `right` as children.
+           It can be red when both children are black, otherwise it must be black.
+        2. If `left` is taller, make sure `right`'s root is black (a subtree's root can always be blackened, which
+           adds one to its black height). Then walk down `left`'s right spine to the first black node `c` with the
+           same black height as `right`. `node` takes `c`'s place as a red node, with `c` on its left and `right` on its right. Every path
+           still has the same number of black nodes; the only possible problem is a red parent above `node`, which
+           is exactly what `fix_insert` repairs after an insert. `self.root` is pointed at the subtree while it runs.
+        3. If `right` is taller, do the mirror image down its left spine.
+        - The work is proportional to the difference in black heights, O(|left_bh - right_bh| + 1).
+        """
+        nil = self.nil
+        node.parent = None
+        if left_bh == right_bh:
+            node.left = left
+            node.right = right
+            if left != nil:
+                left.parent = node
+            if right != nil:
+                right.parent = node
+            node.red = not left.red and not right.red
+            self.refresh(node)
+            return node, left_bh + (0 if node.red else 1)
+
+        if left_bh > right_bh and right.red:
+            right.red = False
+            right_bh += 1
+        elif right_bh > left_bh and left.red:
+            left.red = False
+            left_bh += 1
+        if left_bh == right_bh:
+            return self._join(left, left_bh, node, right, right_bh)
+        taller, height, target = (left, left_bh, right_bh) if left_bh > right_bh else (right, right_bh, left_bh)
+        parent: RBNode = None  # type: ignore
+        current = taller
+        while current.red or height != target:
+            if not current.red:
+                height -= 1
+            parent = current
+            current = current.right if left_bh > right_bh else current.left  # type: ignore
+        if left_bh > right_bh:
+            node.left, node.right = current, right
+            parent.right = node
+        else:
+            node.left, node.right = left, current
+            parent.left = node
+        node.parent = parent
+        node.red = True
+        if node.left != nil:
+            node.left.parent = node  # type: ignore
+        if node.right != nil:
+            node.right.parent = node  # type: ignore
+
+        saved = self.root
+        self.root = taller
+        self.refresh_path(node)
+        grew = self.fix_insert(node)
+        root = self.root
+        self.root = saved
+        return root, max(left_bh, right_bh) + (1 if grew else 0)
+
+    def _split(
+        self, root: RBNode, bh: int, val: int
+    ) -> tuple[RBNode, int, RBNode | None, RBNode, int]:
+        """
+        ### Splits a parentless subtree around `val`.
+        Returns `(less, less_bh, found, greater, greater_bh)`, where `found` is the detached node holding `val`, or
+        `None`. Each node on the search path is detached, and on the way back up it is joined, with its subtree on
+        the other side of the path, onto the piece it belongs to. The joins get taller as the pieces grow, and their
+        costs add up to O(log(n)).
+        """
+        nil = self.nil
+        if root == nil:
+            return nil, 0, None, nil, 0
+        child_bh = bh - (0 if root.red else 1)
+        left, right = self._detach(root)
+        if val < root.val:  # type: ignore
+            less, less_bh, found, greater, greater_bh = self._split(left, child_bh, val)
+            greater, greater_bh = self._join(greater, greater_bh, root, right, child_bh)
+            return less, less_bh, found, greater, greater_bh
+        if val > root.val:  # type: ignore
+            less, less_bh, found, greater, greater_bh = self._split(right, child_bh, val)
+            less, less_bh = self._join(left, child_bh, root, less, less_bh)
+            return less, less_bh, found, greater, greater_bh
+        return left, child_bh, root, right, child_bh
+
+    def _join2(self, left: RBNode, left_bh: int, right: RBNode, right_bh: int) -> tuple[RBNode, int]:
+        """
+        Joins two parentless subtrees without a middle value, by splitting the largest node off of `left`.
+        """
+        if left == self.nil:
+            return right, right_bh
+        rest, rest_bh, last, _, _ = self._split(left, left_bh, self._maximum(left).val)  # type: ignore
+        return self._join(rest, rest_bh, last, right, right_bh)  # type: ignore
+
+    def _adopt(self, root: RBNode) -> RBTree:
+        """
+        Wraps a parentless subtree in a new tree of the same class, with a black root.
+        """
+        tree = type(self)()
+        tree.root = root
+        root.red = False
+        return tree
+
+    def _take(self, other: RBTree) -> tuple[RBNode, int]:
+        """
+        Empties `other` and returns its root and black height, so its nodes can be moved into this tree.
+        """
+        if other.nil is not self.nil:
+            raise ValueError("both trees must use the same node class")
+        root, bh = other.root, other.black_height()
+        other.root = other.nil
+        return root, bh
+
+    @classmethod
+    def join(cls, left: RBTree, val: int, right: RBTree) -> RBTree:
+        """
+        ### Returns a new tree holding `left`'s values, `val` and `right`'s values, in O(log(n)).
+        - Every value in `left` must be smaller than `val`, and every value in `right` larger, else `ValueError`.
+        - The nodes of `left` and `right` are moved into the result, not copied, so both are left empty.
+        """
+        if (left.root != left.nil and not left._maximum(left.root).val < val) or (  # type: ignore
+            right.root != right.nil and not val < right._minimum(right.root).val  # type: ignore
+        ):
+            raise ValueError("join() requires max(left) < val < min(right)")
+        tree = cls()
+        left_root, left_bh = tree._take(left)
+        right_root, right_bh = tree._take(right)
+        node = tree.node_class(val, left=tree.nil, right=tree.nil)
+        root, _ = tree._join(left_root, left_bh, node, right_root, right_bh)
+        tree.root = root
+        root.red = False
+        return tree
+
+    def split(self, val: int) -> tuple[RBTree, RBTree]:
+        """
+        ### Splits the tree into `(less, rest)`: the values smaller than `val`, and the values from `val` up.
+        Runs in O(log(n)) and moves the nodes into the two new trees, so this tree is left empty.
+        """
+        root, bh = self._take(self)
+        less, less_bh, found, greater, greater_bh = self._split(root, bh, val)
+        if found is not None:
+            greater, greater_bh = self._join(self.nil, 0, found, greater, greater_bh)
+        return self._adopt(less), self._adopt(greater)
+
+    def _union(self, a: RBNode, a_bh: int, b: RBNode, b_bh: int) -> tuple[RBNode, int]:
+        if b == self.nil:
+            return a, a_bh
+        if a == self.nil:
+            return b, b_bh
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, _, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        left, left_bh = self._union(a_less, a_less_bh, b_left, child_bh)
+        right, right_bh = self._union(a_greater, a_greater_bh, b_right, child_bh)
+        return self._join(left, left_bh, b, right, right_bh)
+
+    def _intersection(self, a: RBNode, a_bh: int, b: RBNode, b_bh: int) -> tuple[RBNode, int]:
+        if a == self.nil or b == self.nil:
+            return self.nil, 0
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, found, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        left, left_bh = self._intersection(a_less, a_less_bh, b_left, child_bh)
+        right, right_bh = self._intersection(a_greater, a_greater_bh, b_right, child_bh)
+        if found is not None:
+            return self._join(left, left_bh, found, right, right_bh)
+        return self._join2(left, left_bh, right, right_bh)
+
+    def _difference(self, a: RBNode, a_bh: int, b: RBNode, b_bh: int) -> tuple[RBNode, int]:
+        if a == self.nil:
+            return self.nil, 0
+        if b == self.nil:
+            return a, a_bh
+        child_bh = b_bh - (0 if b.red else 1)
+        b_left, b_right = self._detach(b)
+        a_less, a_less_bh, _, a_greater, a_greater_bh = self._split(a, a_bh, b.val)  # type: ignore
+        left, left_bh = self._difference(a_less, a_less_bh, b_left, child_bh)
+        right, right_bh = self._difference(a_greater, a_greater_bh, b_right, child_bh)
+        return self._join2(left, left_bh, right, right_bh)
+
+    def union(self, other: RBTree):
+        """
+        ### Adds every value of `other` to this tree, in place, and leaves `other` empty.
+        The classic divide and conquer on joins: take `other`'s root value, split this tree around it, combine the
+        two halves with `other`'s two subtrees, and join the results with that root in the middle.
+        - Runs in O(m log(n/m + 1)) for trees of sizes m <= n. Whole subtrees that end up on one side are moved
+          without being visited, and no node is copied. Merging a small delta into a huge tree touches O(m log(n))
+          nodes.
+        """
+        a, a_bh = self._take(self)
+        b, b_bh = self._take(other)
+        self.root, _ = self._union(a, a_bh, b, b_bh)
+        self.root.red = False
+
+    def intersection(self, other: RBTree):
+        """
+        Keeps only the values that are also in `other`, in place, and leaves `other` empty. Same bound as `union`.
+        """
+        a, a_bh = self._take(self)
+        b, b_bh = self._take(other)
+        self.root, _ = self._intersection(a, a_bh, b, b_bh)
+        self.root.red = False
+
+    def difference(self, other: RBTree):
+        """
+        Removes the values that are in `other`, in place, and leaves `other` empty. Same bound as `union`.
+        """
+        a, a_bh = self._take(self)
+        b, b_bh = self._take(other)
+        self.root, _ = self._difference(a, a_bh, b, b_bh)
+        self.root.red = False
+
+    def transplant(self, old: RBNode, new: RBNode):
+        """
+        Replaces the subtree rooted at `old` with the subtree rooted at `new`, by changing what `old`'s parent points to.
+        - `new` may be `self.nil`. The sentinel is shared, so its `parent` is never assigned.
+        """
+        if old.parent is None:
+            self.root = new
+        elif old == old.parent.left:
+            old.parent.left = new
+        else:
+            old.parent.right = new
+        if new != self.nil:
+            new.parent = old.parent
+
+    def delete(self, val: int) -> bool:
+        """
+        Removes the node holding `val` in O(log(n)) and returns whether it was found.
+        """
+        node = self._find(val)
+        if node == self.nil:
+            return False
+        self.delete_node(node)
+        return True
+
+    def pop_min(self) -> int:
+        """
+        Removes and returns the smallest value. Raises `KeyError` if the tree is empty.
+        """
+        if self.root == self.nil:
+            raise KeyError("pop from an empty RBTree")
+        node = self._minimum(self.root)
+        self.delete_node(node)
+        return node.val  # type: ignore
+
+    def pop_max(self) -> int:
+        """
+        Removes and returns the largest value. Raises `KeyError` if the tree is empty.
+        """
+        if self.root == self.nil:
+            raise KeyError("pop from an empty RBTree")
+        node = self._maximum(self.root)
+        self.delete_node(node)
+        return node.val  # type: ignore
+
+    def delete_node(self, node: RBNode):
+        """
+        ### Unlinks a node that is in the tree.
+        1. If the node has at most one child, that child (or `nil`) takes its place.
+        2. Otherwise its successor (the minimum of the right subtree) has no left child. The successor is moved into
+           the node's position and takes over its color, and the successor's right child takes the successor's old place.
+        3. The node that actually left its position is the removed node in case 1, or the successor in case 2.
+           If it was black, every path through `child` is now one black node short, so `fix_delete` repairs it.
+        - `child` may be `nil`, so its parent (`child_parent`) is tracked separately instead of being stored on it.
+        """
+        removed_red = node.red
+        if node.left == self.nil:
+            child: RBNode = node.right  # type: ignore
+            child_parent = node.parent
+            self.transplant(node, child)
+        elif node.right == self.nil:
+            child = node.left  # type: ignore
+            child_parent = node.parent
+            self.transplant(node, child)
+        else:
+            successor = self._minimum(node.right)  # type: ignore
+            removed_red = successor.red
+            child = successor.right  # type: ignore
+            if successor.parent == node:
+                child_parent = successor
+            else:
+                child_parent = successor.parent
+                self.transplant(successor, child)
+                successor.right = node.right
+                successor.right.parent = successor  # type: ignore
+            self.transplant(node, successor)
+            successor.left = node.left
+            successor.left.parent = successor  # type: ignore
+            successor.red = node.red
+        self.refresh_path(child_parent)
+        if not removed_red:
+            self.fix_delete(child, child_parent)
+        node.parent = node.left = node.right = None
+
+    def fix_delete(self, node: RBNode, parent: RBNode | None = None):
+        """
+        After a black node is removed, `node` carries an "extra" black. This method moves it up the tree until it
+        can be dropped, using at most three rotations. `parent` must be given when `node` is `nil`.
+
+        1. Loop while `node` isn't the root and is black. Look at its sibling (mirrored if `node` is a right child):
+        2. If the sibling is red, recolor it black and the parent red, and rotate the parent toward `node`.
+           The new sibling is black, so one of the next cases applies.
+        3. If both of the sibling's children are black, recolor the sibling red and move up to the parent.
+        4. If only the sibling's near child is red, swap its colors with the sibling and rotate the sibling away from
+           `node`, so the far child is red.
+        5. If the sibling's far child is red, give the sibling the parent's color, make the parent and far child
+           black, and rotate the parent toward `node`. The extra black is absorbed, so the loop ends.
+        6. Color `node` black.
+        """
+        if parent is None:
+            parent = node.parent
+        while node != self.root and node.red is False:
+            if node == parent.left:  # type: ignore
+                sibling: RBNode = parent.right  # type: ignore
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self.rotate_left(parent)
+                    sibling = parent.right  # type: ignore
+                if not sibling.left.red and not sibling.right.red:  # type: ignore
+                    sibling.red = True
+                    node = parent  # type: ignore
+                    parent = node.parent
+                else:
+                    if not sibling.right.red:  # type: ignore
+                        sibling.left.red = False  # type: ignore
+                        sibling.red = True
+                        self.rotate_right(sibling)
+                        sibling = parent.right  # type: ignore
+                    sibling.red = parent.red
+                    parent.red = False
+                    sibling.right.red = False  # type: ignore
+                    self.rotate_left(parent)
+                    node = self.root
+            else:
+                sibling = parent.left  # type: ignore
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self.rotate_right(parent)
+                    sibling = parent.left  # type: ignore
+                if not sibling.left.red and not sibling.right.red:  # type: ignore
+                    sibling.red = True
+                    node = parent  # type: ignore
+                    parent = node.parent
+                else:
+                    if not sibling.left.red:  # type: ignore
+                        sibling.right.red = False  # type: ignore
+                        sibling.red = True
+                        self.rotate_left(sibling)
+                        sibling = parent.left  # type: ignore
+                    sibling.red = parent.red
+                    parent.red = False
+                    sibling.left.red = False  # type: ignore
+                    self.rotate_right(parent)
+                    node = self.root
+        node.red = False
+
+    def validate(self, max_errors: int = 20) -> RBReport:
+        """
+        ### Checks every red-black and BST property of the tree in one O(n) pass, without recursion.
+        The nodes are visited in post-order with an explicit stack. On the way down each node is checked against
+        1. the open range `(lo, hi)` inherited from its ancestors, which is what BST ordering means for the whole subtree,
+        2. its children's `parent` pointers, and `None` children where a `nil` sentinel should be,
+        3. a red node with a red child.
+        On the way back up the black heights of its two subtrees are compared, and its own black height is passed on
+        to its parent. Finally the root must be black, have no parent, and `nil` must be black.
+        - Only the first `max_errors` problems are described in `errors`; every problem is counted.
+        """
+        report = RBReport()
+        nil = self.nil
+
+        def problem(kind: str, message: str):
+            setattr(report, kind, getattr(report, kind) + 1)
+            if len(report.errors) < max_errors:
+                report.errors.append(message)
+
+        if self.root.red:
+            problem("root_violations", "the root is red")
+        if self.root != nil and self.root.parent is not None:
+            problem("root_violations", f"the root {self.root.val} has a parent")
+        if nil.red:
+            problem("root_violations", "the nil sentinel is red")
+
+        black_heights: list[int] = []
+        stack: list[tuple[RBNode | None, int | None, int | None, int, bool]] = [
+            (self.root, None, None, 1, False)
+        ]
+        while stack:
+            node, lo, hi, depth, finished = stack.pop()
+            if node is None or node is nil:
+                black_heights.append(1)
+                continue
+            if finished:
+                right = black_heights.pop()
+                left = black_heights.pop()
+                if left != right:
+                    problem(
+                        "black_height_violations",
+                        f"{node.val} has black height {left} on the left and {right} on the right",
+                    )
+                black_heights.append(max(left, right) + (0 if node.red else 1))
+                continue
+
+            report.node_count += 1
+            report.height = max(report.height, depth)
+            if (lo is not None and not lo < node.val) or (hi is not None and not node.val < hi):  # type: ignore
+                problem("order_violations", f"{node.val} is outside of its range ({lo}, {hi})")
+            for child in (node.left, node.right):
+                if child is None:
+                    problem("link_violations", f"{node.val} has a None child instead of nil")
+                elif child is not nil:
+                    if child.parent is not node:
+                        problem("link_violations", f"{child.val}'s parent pointer doesn't point to {node.val}")
+                    if node.red and child.red:
+                        problem("red_violations", f"red {node.val} has a red child {child.val}")
+            stack.append((node, lo, hi, depth, True))
+            stack.append((node.right, node.val, hi, depth + 1, False))
+            stack.append((node.left, lo, node.val, depth + 1, False))
+
+        report.black_height = black_heights.pop()
+        return report
+
+    def black_count(
+        self, node: RBNode, blacks: set[int] | None = None, counter: int = 0
+    ):
         """
         Starting from any node in the tree, this will traverse the tree and will count the number of times it passes through a black node, including the input node.
         - If the set contains more than 1 value, your tree is invalid.
+        - This is O(n·h); use `validate` for large trees.
         """
+        if blacks is None:
+            blacks = set()
         if node.red is False:
             counter += 1
         if node.left:
@@ -238,7 +1164,7 @@ class RBTree:
         return blacks
 
     def is_leaf(self, node: RBNode):
-        if node.left == self.nil and node.right == self.root:
+        if node.left == self.nil and node.right == self.nil:
             return True
         return False
 
@@ -31,6 +31,35 @@ def n(t: RBTree, val: int, left=None, right=None, red: bool = False) -> RBNode:
     return RBNode(val, left=left or t.nil, right=right or t.nil, red=red)  # type: ignore
 
 
+def check_rb(tree: RBTree, node: RBNode | None = None) -> int:
+    """
+    Asserts the red-black and BST properties below `node` and returns its black height.
+    """
+    if node is None:
+        assert tree.root.red is False
+        node = tree.root
+    if node == tree.nil:
+        return 1
+    if node.left != tree.nil:
+        assert node.left.val < node.val  # type: ignore
+        assert node.left.parent is node
+    if node.right != tree.nil:
+        assert node.right.val > node.val  # type: ignore
+        assert node.right.parent is node
+    if node.red:
+        assert not node.left.red and not node.right.red  # type: ignore
+    left = check_rb(tree, node.left)  # type: ignore
+    right = check_rb(tree, node.right)  # type: ignore
+    assert left == right
+    return left + (0 if node.red else 1)
+
+
+def inorder_vals(node: RBNode, nil: RBNode) -> list[int]:
+    if node == nil:
+        return []
+    return inorder_vals(node.left, nil) + [node.val] + inorder_vals(node.right, nil)  # type: ignore
+
+
 # ===================Helper functions above===============
 
 
@@ -124,3 +153,229 @@ def test_15_rbtree():
 
     assert print_tree(test_tree) == print_tree(t)
     assert False
+
+
+def test_from_sorted():
+    for size in range(0, 70):
+        t = RBTree.from_sorted(range(size))
+        check_rb(t)
+        assert inorder_vals(t.root, t.nil) == list(range(size))
+    t = RBTree.from_sorted([2, 4])
+    t.insert(3)
+    t.insert(1)
+    check_rb(t)
+    assert inorder_vals(t.root, t.nil) == [1, 2, 3, 4]
+
+
+def test_from_sorted_rejects_unsorted():
+    for bad in ([2, 1], [1, 1]):
+        try:
+            RBTree.from_sorted(bad)
+        except ValueError:
+            continue
+        assert False, bad
+
+
+def test_from_iterable():
+    values = [random.randint(0, 500) for _ in range(1000)]
+    t = RBTree.from_iterable(values)
+    check_rb(t)
+    assert inorder_vals(t.root, t.nil) == sorted(set(values))
+
+
+def test_delete():
+    random.seed(7)
+    values = list(range(2000))
+    random.shuffle(values)
+    t = RBTree()
+    for i in values:
+        t.insert(i)
+    random.shuffle(values)
+    remaining = set(values)
+    for i in values[:1500]:
+        assert t.delete(i)
+        remaining.discard(i)
+        if len(remaining) % 100 == 0:
+            check_rb(t)
+    assert not t.delete(values[0])
+    check_rb(t)
+    assert inorder_vals(t.root, t.nil) == sorted(remaining)
+    for i in values[1500:]:
+        t.delete(i)
+    assert t.root == t.nil
+
+
+def test_pop_min_max():
+    t = RBTree.from_sorted(range(100))
+    assert t.pop_min() == 0
+    assert t.pop_max() == 99
+    check_rb(t)
+    popped = [t.pop_min() for _ in range(49)]
+    assert popped == list(range(1, 50))
+    assert [t.pop_max() for _ in range(49)] == list(range(98, 49, -1))
+    assert t.root == t.nil
+    try:
+        t.pop_min()
+    except KeyError:
+        return
+    assert False
+
+
+def test_traversal_generators():
+    random.seed(4)
+    values = random.sample(range(10_000), 3000)
+    t = RBTree()
+    for i in values:
+        t.insert(i)
+    assert list(t) == sorted(values)
+    assert list(reversed(t)) == sorted(values, reverse=True)
+    pre = list(t.iter_preorder())
+    post = list(t.iter_postorder())
+    assert pre[0] == post[-1] == t.root.val
+    assert sorted(pre) == sorted(post) == sorted(values)
+    assert list(RBTree()) == [] and list(RBTree().iter_postorder()) == []
+
+
+def test_neighbours():
+    t = RBTree.from_sorted(range(0, 100, 10))
+    assert t.floor(35) == 30 and t.floor(30) == 30 and t.floor(-1) is None
+    assert t.ceiling(35) == 40 and t.ceiling(40) == 40 and t.ceiling(91) is None
+    assert t.successor(40) == 50 and t.successor(41) == 50 and t.successor(90) is None
+    assert t.predecessor(40) == 30 and t.predecessor(0) is None
+    assert RBTree().floor(1) is None
+
+
+def test_irange():
+    random.seed(5)
+    values = random.sample(range(1000), 400)
+    t = RBTree()
+    for i in values:
+        t.insert(i)
+    ordered = sorted(values)
+    assert list(t.irange()) == ordered
+    assert list(t.irange(reverse=True)) == ordered[::-1]
+    for _ in range(50):
+        lo, hi = sorted(random.sample(range(-10, 1010), 2))
+        for inc in ((True, True), (False, True), (True, False), (False, False)):
+            expected = [
+                v
+                for v in ordered
+                if (lo < v or (inc[0] and v == lo)) and (v < hi or (inc[1] and v == hi))
+            ]
+            assert list(t.irange(lo, hi, inc)) == expected
+            assert list(t.irange(lo, hi, inc, reverse=True)) == expected[::-1]
+    assert list(t.irange(ordered[5], None)) == ordered[5:]
+    assert list(RBTree().irange(0, 10)) == []
+
+
+def test_validate():
+    random.seed(11)
+    t = RBTree()
+    for i in random.sample(range(100_000), 20_000):
+        t.insert(i)
+    report = t.validate()
+    assert report.valid, report.errors
+    assert report.node_count == 20_000
+    assert report.black_height == check_rb(t)
+    assert report.height <= 2 * 15
+    empty = RBTree().validate()
+    assert empty.valid and empty.node_count == 0 and empty.black_height == 1
+
+
+def test_validate_reports_problems():
+    t = RBTree.from_sorted(range(1, 8))
+    t.root.left.red = True  # type: ignore
+    report = t.validate()
+    assert not report.valid
+    # * the bottom level is already red, so node 2 now has two red children
+    assert report.red_violations == 2 and report.black_height_violations == 1
+
+    t = RBTree.from_sorted(range(1, 8))
+    t.root.left.val, t.root.right.val = t.root.right.val, t.root.left.val  # type: ignore
+    t.root.right.left.parent = t.root  # type: ignore
+    t.root.red = True
+    report = t.validate(max_errors=2)
+    assert report.order_violations > 0
+    assert report.link_violations == 1 and report.root_violations == 1
+    assert len(report.errors) == 2
+
+
+def test_black_count_does_not_leak():
+    t = RBTree.from_sorted(range(1, 8))
+    assert t.black_count(t.root) == t.black_count(t.root)
+
+
+def test_join():
+    for left_size, right_size in [(0, 0), (0, 5), (5, 0), (1, 300), (300, 1), (100, 100), (7, 1000)]:
+        left = RBTree.from_iterable(random.sample(range(0, 5000), left_size))
+        right = RBTree.from_iterable(random.sample(range(6000, 9000), right_size))
+        expected = list(left) + [5500] + list(right)
+        t = RBTree.join(left, 5500, right)
+        check_rb(t)
+        assert list(t) == expected
+        assert left.root == left.nil and right.root == right.nil
+    try:
+        RBTree.join(RBTree.from_sorted([1, 5]), 3, RBTree())
+    except ValueError:
+        return
+    assert False
+
+
+def test_split():
+    random.seed(12)
+    values = random.sample(range(10_000), 2000)
+    for pivot in [-1, 0, values[0], 5000, 5001, 10_000]:
+        t = RBTree()
+        for i in values:
+            t.insert(i)
+        less, rest = t.split(pivot)
+        check_rb(less)
+        check_rb(rest)
+        assert list(less) == sorted(v for v in values if v < pivot)
+        assert list(rest) == sorted(v for v in values if v >= pivot)
+        assert t.root == t.nil
+        less.insert(-5)
+        rest.delete(max(values))
+        check_rb(less)
+        check_rb(rest)
+
+
+def test_set_algebra():
+    random.seed(13)
+    for a_size, b_size in [(0, 50), (50, 0), (2000, 30), (30, 2000), (1000, 1000)]:
+        a_vals = set(random.sample(range(5000), a_size))
+        b_vals = set(random.sample(range(5000), b_size))
+        for op, expected in [
+            ("union", a_vals | b_vals),
+            ("intersection", a_vals & b_vals),
+            ("difference", a_vals - b_vals),
+        ]:
+            a = RBTree.from_iterable(a_vals)
+            b = RBTree()
+            for i in b_vals:
+                b.insert(i)
+            getattr(a, op)(b)
+            check_rb(a)
+            assert list(a) == sorted(expected)
+            assert b.root == b.nil
+            a.insert(-1)
+            check_rb(a)
+
+
+def test_insert_near():
+    rng = random.Random(18)
+    stream = [i * 10 + rng.randrange(-40, 40) for i in range(5000)] + [5, 5, 49_990]
+    tree = RBTree()
+    tree.insert_sorted_stream(stream)
+    check_rb(tree)
+    assert list(tree) == sorted(set(stream))
+
+    tree = RBTree.from_sorted(range(0, 1000, 2))
+    nodes = [tree._find(v) for v in range(0, 1000, 100)]
+    for val in rng.sample(range(-50, 1050), 600):
+        node = tree.insert_near(rng.choice(nodes), val)
+        assert node.val == val and tree._find(val) is node
+        nodes.append(node)
+    check_rb(tree)
+    assert list(tree) == sorted(set(range(0, 1000, 2)) | {node.val for node in nodes})
+    assert tree.insert_near(None, 3).val == 3 and RBTree().insert_near(None, 1).val == 1
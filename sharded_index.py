@@ -0,0 +1,235 @@
+"""
+### A range-partitioned index of `ArrayRBTree` shards, built in a process pool and queried shard by shard.
+```
+with ShardedIndex.build(values, shard_count=8) as index:
+    index.exists_many(probes)              # [True, False, ...] in the order of `probes`
+    index.range_many([(10, 20), (5000, 9000)])
+    list(index.irange(10, 20)), 42 in index, index.insert(42)
+```
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, repeat
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from rb_array_tree import ArrayRBTree
+
+
+def split_points(values: Sequence[int], shard_count: int, sample_size: int, seed: int = 0) -> list[int]:
+    """
+    Picks `shard_count - 1` boundaries from a random sample of `values`, at evenly spaced ranks of the sorted
+    sample, so each shard gets about the same number of keys whatever the distribution. Repeated boundaries
+    (heavily duplicated keys) are dropped, so there can be fewer shards than asked for.
+    """
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+    if not values or shard_count == 1:
+        return []
+    sample = sorted(random.Random(seed).sample(values, min(len(values), sample_size)))
+    boundaries: list[int] = []
+    for i in range(1, shard_count):
+        point = sample[i * len(sample) // shard_count]
+        if not boundaries or point > boundaries[-1]:
+            boundaries.append(point)
+    return boundaries
+
+
+def _partition_chunk(payload: bytes, boundaries: list[int]) -> list[bytes]:
+    """
+    Runs in a worker process, first pass: sorts one slice of the input and cuts it into one run per shard. The slice
+    is sorted, so the cuts take one `bisect_left` per boundary instead of one per key. Keys travel both ways as the
+    raw bytes of an `array('q')`, 8 bytes per key, instead of as a pickled list of int objects.
+    """
+    keys = array("q")
+    keys.frombytes(payload)
+    ordered = array("q", sorted(keys))
+    cuts = [0] + [bisect_left(ordered, boundary) for boundary in boundaries] + [len(ordered)]
+    return [ordered[cuts[i] : cuts[i + 1]].tobytes() for i in range(len(cuts) - 1)]
+
+
+def _build_shard(runs: list[bytes]) -> ArrayRBTree:
+    """
+    Runs in a worker process, second pass: merges one shard's sorted runs, drops duplicates and builds the shard with
+    `ArrayRBTree.from_sorted`. The finished tree is a handful of typed arrays, which pickle as raw bytes, so the parent
+    adopts it by copying memory, without touching a single key.
+    """
+    keys = array("q")
+    for run in runs:
+        keys.frombytes(run)
+    return ArrayRBTree.from_sorted(sorted(set(keys)))
+
+
+class ShardedIndex:
+    """
+    - 𝗞𝗲𝘆𝘀 𝘀𝗽𝗿𝗲𝗮𝗱 𝗼𝘃𝗲𝗿 𝘀𝗲𝘃𝗲𝗿𝗮𝗹 `𝗔𝗿𝗿𝗮𝘆𝗥𝗕𝗧𝗿𝗲𝗲` 𝘀𝗵𝗮𝗿𝗱𝘀 𝗯𝘆 𝗿𝗮𝗻𝗴𝗲.
+    - `boundaries` is sorted: shard `i` holds the keys `k` with `boundaries[i - 1] <= k < boundaries[i]`, so the
+      owner of a key is `bisect_right(boundaries, key)`, and the shards read in order give the keys in order.
+    - Keys must fit in a signed 64 bit integer, because shards are shipped between processes as `array('q')` bytes.
+
+    ### Building
+    `build` samples the values to choose the boundaries (`split_points`), then runs two passes on a
+    `ProcessPoolExecutor`. The parent only converts the input to one `array('q')` and slices it by position, so every
+    per-key step happens in the workers, in parallel:
+    1. Each worker sorts one slice of the input and cuts it at the boundaries into one sorted run per shard.
+    2. Each worker takes one shard's runs from every slice, merges them, drops duplicates, and builds the shard as an
+       `ArrayRBTree` with `from_sorted`, O(n) and without rotations.
+    - The shards come back as their node arrays, so the parent adopts them as they are instead of rebuilding them.
+
+    ### Queries
+    Batched queries (`exists_many`, `range_many`) are grouped by owning shard, and each shard's group runs as one
+    task on `executor`: by default a thread pool with one thread per shard. The shards share no nodes, so the tasks
+    need no locking. They only run on separate cores on a free-threaded CPython build; with the GIL the threads take
+    turns, and batching saves the per-key dispatch but not CPU time. A range that crosses shard boundaries is cut
+    into one piece per shard, and the pieces are concatenated in shard order, which is sorted order.
+    - Single-key `insert`, `delete` and `exists` go straight to the owning shard. Shards are not rebalanced after
+      the build.
+    """
+
+    def __init__(self, boundaries: list[int], shards: list[ArrayRBTree]):
+        if len(shards) != len(boundaries) + 1:
+            raise ValueError("there must be exactly one more shard than boundaries")
+        self.boundaries = boundaries
+        self.shards = shards
+        self.executor: Executor | None = None
+
+    @classmethod
+    def build(
+        cls,
+        values: Iterable[int],
+        shard_count: int | None = None,
+        max_workers: int | None = None,
+        sample_size: int = 10_000,
+        seed: int = 0,
+    ) -> ShardedIndex:
+        """
+        Builds the index from values in any order (duplicates are dropped). `shard_count` defaults to the number of
+        CPUs, and `max_workers` (processes used by both passes) to `shard_count`.
+        """
+        keys = values if isinstance(values, array) and values.typecode == "q" else array("q", values)
+        shard_count = shard_count or os.cpu_count() or 1
+        boundaries = split_points(keys, shard_count, sample_size, seed)
+        workers = max_workers or len(boundaries) + 1
+        step = -(-len(keys) // workers) or 1
+        slices = [keys[start : start + step].tobytes() for start in range(0, len(keys), step)] or [b""]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_partition_chunk, slices, repeat(boundaries)))
+            shards = list(pool.map(_build_shard, [list(shard_runs) for shard_runs in zip(*runs)]))
+        return cls(boundaries, shards)
+
+    def close(self):
+        """
+        Shuts down the query thread pool, if one was started.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self) -> ShardedIndex:
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+    def shard_of(self, val: int) -> int:
+        return bisect_right(self.boundaries, val)
+
+    @property
+    def sizes(self) -> list[int]:
+        return [len(shard) for shard in self.shards]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(self.shards)
+
+    def exists(self, val: int) -> bool:
+        return self.shards[self.shard_of(val)].exists(val)
+
+    def insert(self, val: int):
+        self.shards[self.shard_of(val)].insert(val)
+
+    def delete(self, val: int) -> bool:
+        return self.shards[self.shard_of(val)].delete(val)
+
+    def irange(self, lo: int | None = None, hi: int | None = None) -> Iterator[int]:
+        """
+        Lazily yields the values in `[lo, hi]` in ascending order, reading only the shards that overlap the range.
+        """
+        first = 0 if lo is None else self.shard_of(lo)
+        last = len(self.shards) - 1 if hi is None else self.shard_of(hi)
+        for i in range(first, last + 1):
+            yield from self.shards[i].irange(lo, hi)
+
+    def _run(self, task: Callable[[int, Any], Any], groups: dict[int, Any]) -> dict[int, Any]:
+        """
+        Runs `task(shard_index, group)` for every group, one task per shard, in parallel when there is more than one.
+        """
+        if len(groups) <= 1:
+            return {i: task(i, group) for i, group in groups.items()}
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=len(self.shards))
+        futures = {i: self.executor.submit(task, i, group) for i, group in groups.items()}
+        return {i: future.result() for i, future in futures.items()}
+
+    def exists_many(self, probes: Iterable[int]) -> list[bool]:
+        """
+        Looks up every probe in its owning shard, one parallel task per shard, and returns the answers in the order
+        of `probes`.
+        """
+        probes = list(probes)
+        groups: dict[int, list[int]] = {}
+        for position, val in enumerate(probes):
+            groups.setdefault(self.shard_of(val), []).append(position)
+
+        def lookup(i: int, positions: list[int]) -> list[bool]:
+            exists = self.shards[i].exists
+            return [exists(probes[position]) for position in positions]
+
+        found = [False] * len(probes)
+        for i, answers in self._run(lookup, groups).items():
+            for position, answer in zip(groups[i], answers):
+                found[position] = answer
+        return found
+
+    def range_many(self, ranges: Iterable[tuple[int, int]]) -> list[list[int]]:
+        """
+        Returns the sorted values in each inclusive range `(lo, hi)`. Every range is cut at the shard boundaries,
+        the pieces of all ranges run as one parallel task per shard, and each range's pieces are joined in order.
+        """
+        ranges = list(ranges)
+        groups: dict[int, list[int]] = {}
+        for position, (lo, hi) in enumerate(ranges):
+            if lo > hi:
+                continue
+            for i in range(self.shard_of(lo), self.shard_of(hi) + 1):
+                groups.setdefault(i, []).append(position)
+
+        def scan(i: int, positions: list[int]) -> list[list[int]]:
+            irange = self.shards[i].irange
+            return [list(irange(*ranges[position])) for position in positions]
+
+        pieces = self._run(scan, groups)
+        results: list[list[int]] = [[] for _ in ranges]
+        for i in sorted(pieces):
+            for position, piece in zip(groups[i], pieces[i]):
+                results[position].extend(piece)
+        return results
+
+    def shard_bounds(self, i: int) -> tuple[int | None, int | None]:
+        """
+        The half-open key range `[low, high)` that shard `i` owns, with `None` for an open end.
+        """
+        low = self.boundaries[i - 1] if i else None
+        high = self.boundaries[i] if i < len(self.boundaries) else None
+        return low, high
+
@@ -0,0 +1,47 @@
+from __future__ import annotations
+from sharded_index import ShardedIndex, split_points
+import random
+import pytest
+
+
+# ===================Helper functions above===============
+
+
+def test_sharded_build_and_queries():
+    rng = random.Random(17)
+    values = [rng.randrange(-(10**6), 10**6) for _ in range(20_000)] + [5] * 500
+    expected = sorted(set(values))
+    with ShardedIndex.build(values, shard_count=4, max_workers=2) as index:
+        assert len(index.shards) == 4 and len(index) == len(expected)
+        assert list(index) == expected
+        assert max(index.sizes) < 2 * min(index.sizes)
+        for i, shard in enumerate(index.shards):
+            low, high = index.shard_bounds(i)
+            assert all((low is None or v >= low) and (high is None or v < high) for v in shard)
+
+        probes = [rng.randrange(-(10**6), 10**6) for _ in range(2000)] + expected[:100]
+        present = set(expected)
+        assert index.exists_many(probes) == [p in present for p in probes]
+
+        ranges = [(-(10**6), 10**6), (0, 0), (5, 5), (10, -10)]
+        ranges += [(index.boundaries[0] - 50, index.boundaries[-1] + 50)]
+        ranges += [(lo, lo + rng.randrange(50_000)) for lo in probes[:50]]
+        want = [[v for v in expected if lo <= v <= hi] for lo, hi in ranges]
+        assert index.range_many(ranges) == want
+        assert list(index.irange(*ranges[-1])) == want[-1]
+        assert list(index.irange()) == expected
+
+        index.insert(10**7)
+        assert 10**7 in index and index.delete(10**7) and not index.delete(10**7)
+        assert len(index) == len(expected)
+
+
+def test_split_points():
+    assert split_points([], 4, 100) == []
+    assert split_points(list(range(100)), 1, 100) == []
+    assert split_points(list(range(100)), 4, 100) == [25, 50, 75]
+    assert split_points([7] * 100, 4, 100) == [7]
+    with pytest.raises(ValueError):
+        split_points([1], 0, 100)
+    with ShardedIndex.build([], shard_count=3) as index:
+        assert len(index) == 0 and len(index.shards) == 1 and index.exists_many([1]) == [False]
@@ -0,0 +1,202 @@
+"""
+### Sorted maps: the payload lives in the tree node, next to its key.
+```
+prices = RBMap()                            # or BSTMap(), on BSTNodes
+prices["b"] = 2; prices[("a", 1)] ...       # any totally ordered keys, all of the same kind
+prices.setdefault("c", 0); prices.get("z", -1)
+list(prices.items("a", "b"))                 # range iteration, in key order
+by_name = RBMap(users, key=str.lower)        # the sort key is computed once, when the key is first stored
+```
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator
+
+from binary_tree import BinarySearchTree, BSTNode
+from rb_order_tree import OrderStatisticRBTree, OSNode
+
+_MISSING: Any = object()
+
+
+class MapNode(OSNode):
+    """
+    An `OSNode` that also holds a payload. `val` is the sort key. `key` is the original key, only stored when the
+    map has a `key=` function (otherwise it is `val`). Both defaults are class attributes, so nodes that don't need
+    them take no extra memory.
+    """
+
+    key: Any = None
+    value: Any = None
+
+
+class BSTMapNode(BSTNode):
+    """
+    The `BSTNode` equivalent of `MapNode`.
+    """
+
+    key: Any = None
+    value: Any = None
+
+
+class SortedMapMixin:
+    """
+    - 𝗧𝗵𝗲 𝗺𝗮𝗽𝗽𝗶𝗻𝗴 𝗺𝗲𝘁𝗵𝗼𝗱𝘀, 𝘀𝗵𝗮𝗿𝗲𝗱 𝗯𝘆 `𝗥𝗕𝗠𝗮𝗽` 𝗮𝗻𝗱 `𝗕𝗦𝗧𝗠𝗮𝗽`.
+    - The tree underneath stores the sort key of each entry as the node's `val` and does all the ordering. Its
+      `insert` returns the node for a key whether or not it was already there, so every write here is a single
+      descent: a new node gets its payload, an existing one has it replaced (upsert).
+    - With `key=None` the sort key is the key itself. With a `key=` function, the sort key is `key(k)`, computed once
+      when `k` is first stored, and the original `k` is kept in the node for `keys()` and `items()`. Lookups compute
+      `key(k)` for the key they are given.
+    - Host classes provide `insert`, `delete`, `_find` (returning the node, or `nil`/`None` when the key is missing),
+      `_irange_nodes` and `__len__`.
+    """
+
+    key: Callable[[Any], Any] | None = None
+
+    def _sort_key(self, k: Any) -> Any:
+        return k if self.key is None else self.key(k)
+
+    def _node_key(self, node: Any) -> Any:
+        return node.val if self.key is None else node.key
+
+    def _node(self, k: Any) -> Any:
+        """
+        The node holding `k`, or `None`. `RBTree._find` reports a missing key as its `nil` sentinel and
+        `BinarySearchTree._find` as `None`, which is also what `getattr` gives for a tree without `nil`.
+        """
+        node = self._find(self._sort_key(k))  # type: ignore
+        return None if node is getattr(self, "nil", None) else node
+
+    def _store(self, k: Any) -> tuple[Any, bool]:
+        """
+        Returns the node for `k`, adding it if needed, and whether it was added.
+        """
+        before = len(self)  # type: ignore
+        node = super().insert(self._sort_key(k))  # type: ignore
+        created = len(self) != before  # type: ignore
+        if created and self.key is not None:
+            node.key = k
+        return node, created
+
+    def _load(self, items: Any):
+        for k, v in items.items() if hasattr(items, "items") else items:
+            self[k] = v
+
+    def insert(self, k: Any, value: Any = None) -> Any:
+        """
+        Sets `k` to `value`, replacing the payload if `k` is already there, and returns its node.
+        """
+        node = self._store(k)[0]
+        node.value = value
+        return node
+
+    def delete(self, k: Any) -> bool:
+        return super().delete(self._sort_key(k))  # type: ignore
+
+    def exists(self, k: Any) -> bool:
+        return self._node(k) is not None
+
+    def __contains__(self, k: Any) -> bool:
+        return self._node(k) is not None
+
+    def __getitem__(self, k: Any) -> Any:
+        node = self._node(k)
+        if node is None:
+            raise KeyError(k)
+        return node.value
+
+    def __setitem__(self, k: Any, value: Any):
+        self._store(k)[0].value = value
+
+    def __delitem__(self, k: Any):
+        if not self.delete(k):
+            raise KeyError(k)
+
+    def get(self, k: Any, default: Any = None) -> Any:
+        node = self._node(k)
+        return default if node is None else node.value
+
+    def setdefault(self, k: Any, default: Any = None) -> Any:
+        node, created = self._store(k)
+        if created:
+            node.value = default
+        return node.value
+
+    def pop(self, k: Any, default: Any = _MISSING) -> Any:
+        node = self._node(k)
+        if node is None:
+            if default is _MISSING:
+                raise KeyError(k)
+            return default
+        value = node.value
+        self.delete(k)
+        return value
+
+    def items(
+        self,
+        lo: Any = None,
+        hi: Any = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[tuple[Any, Any]]:
+        """
+        Lazily yields `(key, value)` pairs in key order, for the keys between `lo` and `hi` (`None` leaves that side
+        open), with the same arguments as `RBTree.irange`.
+        """
+        lo = None if lo is None else self._sort_key(lo)
+        hi = None if hi is None else self._sort_key(hi)
+        node_key = self._node_key
+        for node in self._irange_nodes(lo, hi, inclusive, reverse):  # type: ignore
+            yield node_key(node), node.value
+
+    def keys(self, lo: Any = None, hi: Any = None) -> Iterator[Any]:
+        return (k for k, _ in self.items(lo, hi))
+
+    def values(self, lo: Any = None, hi: Any = None) -> Iterator[Any]:
+        return (v for _, v in self.items(lo, hi))
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.keys()
+
+    def __reversed__(self) -> Iterator[Any]:
+        return (k for k, _ in self.items(reverse=True))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+class RBMap(SortedMapMixin, OrderStatisticRBTree):
+    """
+    - 𝗔 𝘀𝗼𝗿𝘁𝗲𝗱 𝗺𝗮𝗽 𝗼𝗻 𝗮 𝗿𝗲𝗱-𝗯𝗹𝗮𝗰𝗸 𝘁𝗿𝗲𝗲.
+    - Built on `OrderStatisticRBTree`, so `len` is O(1) and stays right through every operation the tree has
+      (`pop_min`, `split`, `union`, ...), and `rank`/`select` work on the sort keys.
+    """
+
+    node_class = MapNode
+
+    def __init__(self, items: Any = (), key: Callable[[Any], Any] | None = None):
+        super().__init__()
+        self.key = key
+        self._load(items)
+
+
+class BSTMap(SortedMapMixin, BinarySearchTree):
+    """
+    - 𝗔 𝘀𝗼𝗿𝘁𝗲𝗱 𝗺𝗮𝗽 𝗼𝗻 𝗕𝗦𝗧𝗡𝗼𝗱𝗲𝘀, 𝗸𝗲𝗽𝘁 𝗯𝗮𝗹𝗮𝗻𝗰𝗲𝗱 𝗯𝘆 `𝗕𝗶𝗻𝗮𝗿𝘆𝗦𝗲𝗮𝗿𝗰𝗵𝗧𝗿𝗲𝗲`.
+    - A bare `BSTNode` root has no place to keep the `key=` function or a count, so the map mode lives on the
+      `BinarySearchTree` wrapper, whose nodes are plain `BSTNode`s (`BSTMapNode`).
+    """
+
+    node_class = BSTMapNode
+
+    def __init__(self, items: Any = (), key: Callable[[Any], Any] | None = None, alpha: float = 2 / 3):
+        super().__init__(alpha=alpha)
+        self.key = key
+        self._load(items)
+
+    def _move_entry(self, node: BSTNode, source: BSTNode):
+        node.val = source.val
+        node.value = source.value  # type: ignore
+        if self.key is not None:
+            node.key = source.key  # type: ignore
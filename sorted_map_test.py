@@ -0,0 +1,87 @@
+from __future__ import annotations
+from interval_tree import IntervalTree
+from rb_tree_test import check_rb
+from sorted_map import BSTMap, RBMap
+import random
+import pytest
+
+
+# ===================Helper functions above===============
+
+
+@pytest.mark.parametrize("cls", [RBMap, BSTMap])
+def test_map_matches_dict(cls):
+    rng = random.Random(19)
+    m = cls()
+    expected: dict[tuple[str, int], int] = {}
+    for step in range(4000):
+        k = (rng.choice("abcde"), rng.randrange(300))
+        roll = rng.random()
+        if roll < 0.5:
+            m[k] = step
+            expected[k] = step
+        elif roll < 0.6:
+            assert m.setdefault(k, -step) == expected.setdefault(k, -step)
+        elif roll < 0.8:
+            assert m.pop(k, None) == expected.pop(k, None)
+        else:
+            assert m.get(k) == expected.get(k) and (k in m) == (k in expected)
+    assert len(m) == len(expected)
+    assert list(m.items()) == sorted(expected.items())
+    assert list(m) == sorted(expected) and list(reversed(m)) == sorted(expected, reverse=True)
+    lo, hi = ("b", 0), ("c", 150)
+    assert list(m.items(lo, hi)) == [(k, v) for k, v in sorted(expected.items()) if lo <= k <= hi]
+    assert list(m.keys(lo, hi)) == [k for k in sorted(expected) if lo <= k <= hi]
+    if cls is RBMap:
+        check_rb(m)
+    with pytest.raises(KeyError):
+        m[("z", 0)]
+    with pytest.raises(KeyError):
+        del m[("z", 0)]
+
+
+@pytest.mark.parametrize("cls", [RBMap, BSTMap])
+def test_map_key_function_and_upsert(cls):
+    calls: list[str] = []
+
+    def fold(name: str) -> str:
+        calls.append(name)
+        return name.lower()
+
+    m = cls({"Bob": 1, "alice": 2}, key=fold)
+    assert len(calls) == 2
+    m["ALICE"] = 3  # * same sort key: the payload is replaced, the first spelling of the key is kept
+    assert len(m) == 2 and m["Alice"] == 3
+    assert list(m.items()) == [("alice", 3), ("Bob", 1)]
+    assert list(m.items("B", "BZ")) == [("Bob", 1)]
+    node = m.insert("carol", [])
+    assert m.insert("CAROL", node.value) is node
+    assert m.pop("bob") == 1 and list(m) == ["alice", "carol"]
+    assert repr(m) == f"{cls.__name__}({{'alice': 3, 'carol': []}})"
+
+
+def test_rbtree_insert_returns_node():
+    m = RBMap({i: str(i) for i in range(100)})
+    assert m.select(10) == 10 and m.rank(50) == 50
+    while len(m) > 50:
+        m.pop_min()
+    assert list(m.items(None, 52)) == [(50, "50"), (51, "51"), (52, "52")]
+
+
+def test_instrumented_map_keeps_its_signatures():
+    m = RBMap()
+    with m.instrument() as stats:
+        for i in range(200):
+            m.insert(i, str(i))
+        m[500] = "five hundred"
+        assert m.get(7) == "7" and 7 in m and m.setdefault(3, "new") == "3"
+        assert m.pop(10) == "10"
+    check_rb(m)
+    assert len(m) == 200 and m[500] == "five hundred"
+    assert stats.descents >= 200 and stats.rotations_left > 0
+    # * the same goes for other subclasses whose insert takes more than one argument
+    intervals = IntervalTree()
+    with intervals.instrument():
+        intervals.insert(1, 5)
+        intervals.insert(3, 9)
+    assert list(intervals.stab(4)) == [(1, 5), (3, 9)]
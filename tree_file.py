@@ -0,0 +1,271 @@
+"""
+### A versioned binary file format for the values of a tree, and a read-only view that reads it through `mmap`.
+```
+tree.save("keys.rbt")                    # RBTree or BSTNode
+with MappedTree("keys.rbt") as view:     # no deserializing: pages are read on demand and shared between processes
+    view.exists(42), view.get_min(), list(view.irange(10, 20))
+RBTree.from_sorted(MappedTree("keys.rbt"))  # or rebuild a mutable tree in O(n)
+```
+### File layout
+A 32 byte header followed by `count` signed 64 bit values in the machine's byte order:
+```
+magic     4s   b"RBTK"
+version   H    FORMAT_VERSION
+layout    B    0 = sorted, 1 = eytzinger (BFS order of a complete binary search tree)
+byteorder c    b"<" or b">"
+typecode  c    b"q"
+(padding) 3x
+count     Q    number of values
+(reserved) 12x
+```
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, Iterator
+
+MAGIC = b"RBTK"
+FORMAT_VERSION = 1
+SORTED = 0
+EYTZINGER = 1
+LAYOUTS = {"sorted": SORTED, "eytzinger": EYTZINGER}
+HEADER = struct.Struct("<4sHBcc3xQ12x")
+_BYTEORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+def dump(values: Iterable[int], path: str, layout: str = "sorted"):
+    """
+    Writes strictly ascending `values` to `path`. The file is written next to `path` and then renamed over it, so
+    readers never see a half-written file.
+    - The `"eytzinger"` layout places the values with `frozen_tree.eytzinger_ranks`, the same order as a
+      `FrozenTree`, and requires `numpy`.
+    - Raises `ValueError` if the values aren't strictly ascending, and `OverflowError` if one doesn't fit in 64 bits.
+    """
+    keys = list(values)
+    for i in range(1, len(keys)):
+        if not keys[i - 1] < keys[i]:
+            raise ValueError("dump() requires strictly ascending values")
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}, expected one of {sorted(LAYOUTS)}")
+    if layout == "eytzinger":
+        from frozen_tree import eytzinger_ranks
+
+        keys = [keys[rank] for rank in eytzinger_ranks(len(keys))[1:].tolist()]
+    data = array("q", keys)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, LAYOUTS[layout], _BYTEORDER, b"q", len(data)))
+        data.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class MappedTree:
+    """
+    - 𝗔 𝗿𝗲𝗮𝗱-𝗼𝗻𝗹𝘆 𝘁𝗿𝗲𝗲 𝘃𝗶𝗲𝘄 𝗼𝘃𝗲𝗿 𝗮 𝗳𝗶𝗹𝗲 𝘄𝗿𝗶𝘁𝘁𝗲𝗻 𝗯𝘆 `dump`.
+    - Opening only reads the header. The values are a `memoryview` over the `mmap`, so every process that opens the
+      same file shares the operating system's page cache instead of holding its own copy.
+    - Offers the read side of `RBTree`: `exists`/`in`, `get_min`/`get_max`, `irange`, `floor`/`ceiling`,
+      in-order iteration and `len`.
+    - Sorted files use `bisect` on the buffer. Eytzinger files walk the implicit tree: node `k`'s children are
+      `2k` and `2k + 1`, and stepping to the next value only needs arithmetic on `k`.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < HEADER.size:
+                raise ValueError(f"{path} is too short to be a tree file")
+            magic, version, layout, byteorder, typecode, count = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a tree file")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+            if byteorder != _BYTEORDER or typecode != b"q":
+                raise ValueError(f"{path} was written with an incompatible byte order or value type")
+            if layout not in (SORTED, EYTZINGER):
+                raise ValueError(f"{path} has an unknown layout {layout}")
+            if len(self._mmap) < HEADER.size + 8 * count:
+                raise ValueError(f"{path} is truncated")
+            self.layout = layout
+            self.size: int = count
+            self._buffer = memoryview(self._mmap)
+            self.keys = self._buffer[HEADER.size : HEADER.size + 8 * count].cast("q")
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """
+        Releases the buffer and unmaps the file. Values that were already read stay valid, they are plain ints.
+        """
+        for view in ("keys", "_buffer"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+                delattr(self, view)
+        self._mmap.close()
+
+    def __enter__(self) -> MappedTree:
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, val: int) -> bool:
+        return self.exists(val)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.irange()
+
+    def __reversed__(self) -> Iterator[int]:
+        return self.irange(reverse=True)
+
+    def iter_inorder(self) -> Iterator[int]:
+        return self.irange()
+
+    # * Eytzinger helpers. `k` is a 1-based node number and `keys[k - 1]` its value, 0 means "no node".
+
+    def _first(self, k: int) -> int:
+        while 2 * k <= self.size:
+            k *= 2
+        return k
+
+    def _last(self, k: int) -> int:
+        while 2 * k + 1 <= self.size:
+            k = 2 * k + 1
+        return k
+
+    def _next(self, k: int) -> int:
+        if 2 * k + 1 <= self.size:
+            return self._first(2 * k + 1)
+        while k & 1:
+            k >>= 1
+        return k >> 1
+
+    def _prev(self, k: int) -> int:
+        if 2 * k <= self.size:
+            return self._last(2 * k)
+        while k and not k & 1:
+            k >>= 1
+        return k >> 1
+
+    def _lower(self, val: int, inclusive: bool) -> int:
+        """
+        Node of the smallest value `>= val` (`> val` if not inclusive), or 0.
+        """
+        keys = self.keys
+        found = 0
+        k = 1
+        while k <= self.size:
+            current = keys[k - 1]
+            if current > val or (inclusive and current == val):
+                found = k
+                k = 2 * k
+            else:
+                k = 2 * k + 1
+        return found
+
+    def _upper(self, val: int, inclusive: bool) -> int:
+        """
+        Node of the largest value `<= val` (`< val` if not inclusive), or 0.
+        """
+        keys = self.keys
+        found = 0
+        k = 1
+        while k <= self.size:
+            current = keys[k - 1]
+            if current < val or (inclusive and current == val):
+                found = k
+                k = 2 * k + 1
+            else:
+                k = 2 * k
+        return found
+
+    def exists(self, val: int) -> bool:
+        if self.layout == SORTED:
+            i = bisect.bisect_left(self.keys, val)
+            return i < self.size and self.keys[i] == val
+        k = self._lower(val, True)
+        return k != 0 and self.keys[k - 1] == val
+
+    def get_min(self) -> int | None:
+        if not self.size:
+            return None
+        return self.keys[0] if self.layout == SORTED else self.keys[self._first(1) - 1]
+
+    def get_max(self) -> int | None:
+        if not self.size:
+            return None
+        return self.keys[-1] if self.layout == SORTED else self.keys[self._last(1) - 1]
+
+    def floor(self, val: int) -> int | None:
+        """
+        The largest value that is less than or equal to `val`, or `None`.
+        """
+        if self.layout == SORTED:
+            i = bisect.bisect_right(self.keys, val)
+            return self.keys[i - 1] if i else None
+        k = self._upper(val, True)
+        return self.keys[k - 1] if k else None
+
+    def ceiling(self, val: int) -> int | None:
+        """
+        The smallest value that is greater than or equal to `val`, or `None`.
+        """
+        if self.layout == SORTED:
+            i = bisect.bisect_left(self.keys, val)
+            return self.keys[i] if i < self.size else None
+        k = self._lower(val, True)
+        return self.keys[k - 1] if k else None
+
+    def irange(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        inclusive: tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Lazily yields the values between `lo` and `hi`, with the same arguments as `RBTree.irange`.
+        """
+        keys = self.keys
+        if self.layout == SORTED:
+            start = 0
+            if lo is not None:
+                start = (bisect.bisect_left if inclusive[0] else bisect.bisect_right)(keys, lo)
+            stop = self.size
+            if hi is not None:
+                stop = (bisect.bisect_right if inclusive[1] else bisect.bisect_left)(keys, hi)
+            indexes = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+            for i in indexes:
+                yield keys[i]
+            return
+        if not self.size:
+            return
+        if not reverse:
+            k = self._first(1) if lo is None else self._lower(lo, inclusive[0])
+            while k:
+                val = keys[k - 1]
+                if hi is not None and (val > hi or (val == hi and not inclusive[1])):
+                    return
+                yield val
+                k = self._next(k)
+        else:
+            k = self._last(1) if hi is None else self._upper(hi, inclusive[1])
+            while k:
+                val = keys[k - 1]
+                if lo is not None and (val < lo or (val == lo and not inclusive[0])):
+                    return
+                yield val
+                k = self._prev(k)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+from binary_tree import BSTNode
+from rb_tree import RBTree
+from tree_file import MappedTree, dump
+import importlib.util
+import pytest
+import random
+
+# * writing the eytzinger layout uses `frozen_tree.eytzinger_ranks`, which needs numpy
+LAYOUTS = [
+    "sorted",
+    pytest.param(
+        "eytzinger",
+        marks=pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="requires numpy"),
+    ),
+]
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_mapped_tree_matches_rbtree(tmp_path, layout):
+    random.seed(10)
+    t = RBTree.from_iterable(random.sample(range(-5000, 5000), 1500))
+    path = str(tmp_path / "keys.rbt")
+    t.save(path, layout)
+    with MappedTree(path) as view:
+        assert len(view) == 1500
+        assert list(view) == list(t)
+        assert list(reversed(view)) == list(reversed(t))
+        assert view.get_min() == min(t) and view.get_max() == max(t)
+        for probe in random.sample(range(-5010, 5010), 300):
+            assert view.exists(probe) == t.exists(probe)
+            assert view.floor(probe) == t.floor(probe)
+            assert view.ceiling(probe) == t.ceiling(probe)
+            hi = probe + random.randint(0, 300)
+            for inc in ((True, True), (False, False)):
+                assert list(view.irange(probe, hi, inc)) == list(t.irange(probe, hi, inc))
+                assert list(view.irange(probe, hi, inc, reverse=True)) == list(
+                    t.irange(probe, hi, inc, reverse=True)
+                )
+        assert RBTree.from_sorted(view).validate().valid
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_small_and_empty_files(tmp_path, layout):
+    for size in range(0, 20):
+        path = str(tmp_path / f"{size}.rbt")
+        dump(range(size), path, layout)
+        with MappedTree(path) as view:
+            assert list(view) == list(range(size))
+            assert list(view.irange(reverse=True)) == list(range(size))[::-1]
+            assert view.get_min() == (0 if size else None)
+
+
+def test_bstnode_save_and_bad_files(tmp_path):
+    root = BSTNode()
+    for val in [5, 2, 9]:
+        root.insert(val)
+    path = tmp_path / "keys.rbt"
+    root.save(str(path))
+    with MappedTree(str(path)) as view:
+        assert list(view) == [2, 5, 9] and 9 in view and 3 not in view
+    with pytest.raises(ValueError):
+        dump([2, 1], str(path))
+    data = bytearray(path.read_bytes())
+    data[4] = 99
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        MappedTree(str(path))
+    path.write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        MappedTree(str(path))
+
+
+def test_eytzinger_file_matches_frozen_tree(tmp_path):
+    pytest.importorskip("numpy")
+    t = RBTree.from_iterable(range(0, 3000, 7))
+    path = str(tmp_path / "keys.rbt")
+    t.save(path, "eytzinger")
+    with MappedTree(path) as view:
+        assert view.keys.tolist() == t.freeze().layout[1:].tolist()
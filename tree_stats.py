@@ -0,0 +1,280 @@
+"""
+### Opt-in instrumentation for `RBTree` and `BSTNode`.
+```
+with tree.instrument() as stats:
+    for val in values:
+        tree.insert(val)
+print(tree.stats())
+```
+While the `with` block is active, counting wrappers are stored as attributes on that one tree instance (or root
+node), which shadow the methods of the class. Leaving the block deletes them again, so an uninstrumented tree runs
+exactly the same code as before: there is no flag to check anywhere.
+
+### What is wrapped
+Each wrapper calls the tree's own method from its class, so subclasses that override one (the augmented rotations)
+are counted with their own code, and subclasses that reach these methods through `super()` (`RBMap.insert(key,
+value)`, `IntervalTree.insert(start, end)`) are counted without being shadowed.
+- Searches: the value is handed to the real method wrapped in a `_Probe`, which counts every comparison the method
+  makes with it, and every node whose value it is compared with. Nothing is walked a second time.
+- - `RBTree`: `_descend` (used by `insert`), `_find` (`exists`, `delete`), `_lower_node`/`_upper_node` (`floor`,
+    `ceiling`, `successor`, `predecessor` and the start of `irange`), and `insert_near` and `insert_sorted_stream`,
+    which count their climb and descent as one search per value. `_link` unwraps the probe before it is stored.
+- - `BSTNode`: `insert` and `exists` on the root node. Their recursive calls on child nodes see the same probe.
+    `insert` puts the plain value into the new node afterwards.
+- `rotate_left`/`rotate_right` count the rotations that happen.
+- `fix_insert` notes the colors of the nodes it can change (the new node, its ancestors and their siblings) and
+  compares them afterwards. Each loop iteration either recolors an uncle black and moves up, or rotates and stops,
+  so that is what counts as an iteration. `fix_delete` isn't wrapped, but its rotations are counted.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+_NOTHING = object()
+
+
+@dataclass
+class TreeStats:
+    """
+    Counters collected while a tree is instrumented. The histograms map a length to how many times it happened:
+    - `path_lengths`: the number of nodes each search compared its value with.
+    - `comparisons_per_descent`: the number of value comparisons made by each search.
+    - `fixup_lengths`: the number of `fix_insert` loop iterations for each insert that needed a fix-up.
+    - `recolors` counts the nodes whose color a `fix_insert` changed.
+    """
+
+    descents: int = 0
+    comparisons: int = 0
+    rotations_left: int = 0
+    rotations_right: int = 0
+    recolors: int = 0
+    fixup_iterations: int = 0
+    path_lengths: Counter[int] = field(default_factory=Counter)
+    comparisons_per_descent: Counter[int] = field(default_factory=Counter)
+    fixup_lengths: Counter[int] = field(default_factory=Counter)
+
+    def record_descent(self, length: int, comparisons: int):
+        self.descents += 1
+        self.comparisons += comparisons
+        self.path_lengths[length] += 1
+        self.comparisons_per_descent[comparisons] += 1
+
+    def record_fixup(self, iterations: int, recolors: int):
+        self.recolors += recolors
+        if iterations:
+            self.fixup_iterations += iterations
+            self.fixup_lengths[iterations] += 1
+
+    def reset(self):
+        """
+        Sets every counter back to zero, without leaving the `with` block.
+        """
+        self.__init__()
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Returns a copy of the counters as plain dicts and ints, so it can be kept or serialized while counting continues.
+        """
+        return {
+            "descents": self.descents,
+            "comparisons": self.comparisons,
+            "rotations_left": self.rotations_left,
+            "rotations_right": self.rotations_right,
+            "recolors": self.recolors,
+            "fixup_iterations": self.fixup_iterations,
+            "path_lengths": dict(sorted(self.path_lengths.items())),
+            "comparisons_per_descent": dict(sorted(self.comparisons_per_descent.items())),
+            "fixup_lengths": dict(sorted(self.fixup_lengths.items())),
+        }
+
+
+class _Probe:
+    """
+    Stands in for the value a search looks for, and counts what the search does with it. Comparisons written the
+    other way around (`node.val > val`) reach it too, because Python falls back to the reflected operator.
+    """
+
+    __slots__ = ("val", "comparisons", "nodes", "last")
+
+    def __init__(self, val: Any):
+        self.val = val
+        self.comparisons = 0
+        self.nodes = 0
+        self.last: Any = _NOTHING
+
+    def _see(self, other: Any):
+        self.comparisons += 1
+        if other is not self.last:
+            # * a search compares with one node's value one or more times in a row, then moves on to another node
+            self.nodes += 1
+            self.last = other
+
+    def __lt__(self, other: Any) -> bool:
+        self._see(other)
+        return self.val < other
+
+    def __gt__(self, other: Any) -> bool:
+        self._see(other)
+        return self.val > other
+
+    def __le__(self, other: Any) -> bool:
+        self._see(other)
+        return self.val <= other
+
+    def __ge__(self, other: Any) -> bool:
+        self._see(other)
+        return self.val >= other
+
+    def __eq__(self, other: Any) -> bool:  # type: ignore
+        self._see(other)
+        return self.val == other
+
+    def __ne__(self, other: Any) -> bool:  # type: ignore
+        self._see(other)
+        return self.val != other
+
+
+def _plain(val: Any) -> Any:
+    return val.val if isinstance(val, _Probe) else val
+
+
+def _measure(stats: TreeStats, val: Any, search: Callable[[Any], Any]) -> Any:
+    """
+    Runs `search` on `val` wrapped in a probe and records it as one search. A `val` that already is a probe belongs
+    to a search an outer wrapper records (`insert_near` calls `_climb` and `_descend`).
+    """
+    if isinstance(val, _Probe):
+        return search(val)
+    probe = _Probe(val)
+    result = search(probe)
+    stats.record_descent(probe.nodes, probe.comparisons)
+    return result
+
+
+@contextmanager
+def instrument(tree: Any) -> Iterator[TreeStats]:
+    """
+    Installs the counting wrappers on `tree` (an `RBTree` or a root `BSTNode`) and yields its `TreeStats`.
+    - The counters start at zero. Nesting `instrument` on the same tree reuses the same counters, and only the
+      outermost block removes the wrappers.
+    - The counters stay on the tree after the block ends, so `tree.stats()` can still read them.
+    """
+    if tree.__dict__.get("_instrumented"):
+        yield tree._stats
+        return
+    tree._stats = TreeStats()
+    wrappers = _rb_wrappers(tree, tree._stats) if hasattr(tree, "nil") else _bst_wrappers(tree, tree._stats)
+    tree.__dict__.update(wrappers)
+    tree._instrumented = True
+    try:
+        yield tree._stats
+    finally:
+        for name in wrappers:
+            delattr(tree, name)
+        del tree._instrumented
+
+
+def _rb_wrappers(tree: Any, stats: TreeStats) -> dict[str, Callable[..., Any]]:
+    cls = type(tree)
+
+    def _descend(current: Any, val: Any) -> Any:
+        return _measure(stats, val, lambda probe: cls._descend(tree, current, probe))
+
+    def _climb(cursor: Any, val: Any) -> Any:
+        return _measure(stats, val, lambda probe: cls._climb(tree, cursor, probe))
+
+    def _find(val: Any) -> Any:
+        return _measure(stats, val, lambda probe: cls._find(tree, probe))
+
+    def _lower_node(val: Any, inclusive: bool = True) -> Any:
+        return _measure(stats, val, lambda probe: cls._lower_node(tree, probe, inclusive))
+
+    def _upper_node(val: Any, inclusive: bool = True) -> Any:
+        return _measure(stats, val, lambda probe: cls._upper_node(tree, probe, inclusive))
+
+    def insert_near(cursor: Any, val: Any) -> Any:
+        return _measure(stats, val, lambda probe: cls.insert_near(tree, cursor, probe))
+
+    def insert_sorted_stream(iterable: Iterable[Any]):
+        def probes() -> Iterator[_Probe]:
+            for val in iterable:
+                probe = _Probe(val)
+                yield probe
+                stats.record_descent(probe.nodes, probe.comparisons)
+
+        cls.insert_sorted_stream(tree, probes())
+
+    def _link(parent: Any, val: Any, left: bool) -> Any:
+        return cls._link(tree, parent, _plain(val), left)
+
+    def rotate_left(x: Any):
+        y = x.right if x is not None else None
+        cls.rotate_left(tree, x)
+        if y is not None and y is not tree.nil and x.parent is y:
+            stats.rotations_left += 1
+
+    def rotate_right(x: Any):
+        y = x.left if x is not None else None
+        cls.rotate_right(tree, x)
+        if y is not None and y is not tree.nil and x.parent is y:
+            stats.rotations_right += 1
+
+    def fix_insert(node: Any) -> Any:
+        nil = tree.nil
+        ancestors: list[tuple[Any, bool]] = []
+        uncles: list[tuple[Any, bool]] = []
+        current = node
+        while current is not None and current is not nil:
+            ancestors.append((current, current.red))
+            parent = current.parent
+            if parent is not None:
+                uncle = parent.left if current is parent.right else parent.right
+                if uncle is not nil:
+                    uncles.append((uncle, uncle.red))
+            current = parent
+        rotations = stats.rotations_left + stats.rotations_right
+        grew = cls.fix_insert(tree, node)
+        recolors = sum(1 for watched, red in ancestors + uncles if watched.red != red)
+        climbed = sum(1 for uncle, red in uncles if red and not uncle.red)
+        rotated = stats.rotations_left + stats.rotations_right > rotations
+        stats.record_fixup(climbed + rotated, recolors)
+        return grew
+
+    return {
+        "_descend": _descend,
+        "_climb": _climb,
+        "_find": _find,
+        "_lower_node": _lower_node,
+        "_upper_node": _upper_node,
+        "insert_near": insert_near,
+        "insert_sorted_stream": insert_sorted_stream,
+        "_link": _link,
+        "rotate_left": rotate_left,
+        "rotate_right": rotate_right,
+        "fix_insert": fix_insert,
+    }
+
+
+def _bst_wrappers(root: Any, stats: TreeStats) -> dict[str, Callable[..., Any]]:
+    cls = type(root)
+
+    def insert(val: Any):
+        probe = _Probe(val)
+        cls.insert(root, probe)
+        stats.record_descent(probe.nodes, probe.comparisons)
+        # * unless `val` was already there, the probe was stored in the new node (or the empty root): walk down to it
+        # * and put the value in its place
+        node = root
+        while node is not None and node.val is not probe:
+            node = node.left if val < node.val else node.right
+        if node is not None:
+            node.val = val
+
+    def exists(val: Any) -> bool:
+        return _measure(stats, val, lambda probe: cls.exists(root, probe))
+
+    return {"insert": insert, "exists": exists}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from binary_tree import BSTNode
+from rb_order_tree import OrderStatisticRBTree
+from rb_tree import RBTree
+from rb_tree_test import check_rb
+import random
+
+
+def test_rbtree_counters():
+    t = RBTree()
+    with t.instrument() as stats:
+        for i in range(1, 1025):
+            t.insert(i)
+        assert t.exists(512) and not t.exists(0)
+        snap = t.stats()
+    check_rb(t)
+    assert snap["descents"] == 1026
+    assert snap["rotations_left"] > 0 and snap["rotations_right"] == 0
+    assert snap["recolors"] > 0 and snap["fixup_iterations"] > 0
+    assert sum(snap["path_lengths"].values()) == 1026
+    assert max(snap["path_lengths"]) <= 2 * 11
+    assert sum(k * v for k, v in snap["comparisons_per_descent"].items()) == snap["comparisons"]
+    # * the counting wrappers are gone again, but the last counters are kept
+    assert not {"_descend", "_find", "fix_insert", "rotate_left", "_instrumented"} & t.__dict__.keys()
+    t.insert(0)
+    assert t.stats() == snap
+
+
+def test_counts_match_uninstrumented_tree():
+    random.seed(6)
+    values = random.sample(range(10_000), 2000)
+    plain, counted = OrderStatisticRBTree(), OrderStatisticRBTree()
+    for i in values:
+        plain.insert(i)
+    with counted.instrument() as stats:
+        for i in values:
+            counted.insert(i)
+        stats.reset()
+        assert counted.stats()["descents"] == 0
+        for i in values[:500]:
+            counted.delete(i)
+            plain.delete(i)
+        with counted.instrument() as inner:
+            assert inner is stats
+        assert "_descend" in counted.__dict__
+    assert list(plain.iter_preorder()) == list(counted.iter_preorder())
+    assert len(counted) == 1500
+    assert stats.descents == 500
+
+
+def test_every_search_is_counted_by_the_real_method():
+    t = RBTree.from_sorted([10, 20, 30])
+    with t.instrument() as stats:
+        # * 20 < 25 goes right, then 30 < 25 and 30 == 25 are both false: two nodes, three comparisons
+        assert t.floor(25) == 20
+        assert (stats.descents, stats.comparisons, dict(stats.path_lengths)) == (1, 3, {2: 1})
+        assert t.ceiling(25) == 30 and list(t.irange(15, 30)) == [20, 30]
+        assert stats.descents == 3
+        stats.reset()
+        # * a new maximum only compares with the previous one, and linking the new leaf takes no further comparison.
+        # * 45 is compared with 50, climbs to 40 (two comparisons each) and descends from 50 again
+        t.insert_sorted_stream([40, 50, 45])
+        assert stats.path_lengths == {1: 2, 3: 1} and stats.comparisons_per_descent == {1: 2, 6: 1}
+        node = t.insert_near(t._find(45), 46)
+        assert node.val == 46 and stats.descents == 5
+    check_rb(t)
+    assert list(t) == [10, 20, 30, 40, 45, 46, 50]
+    assert all(type(val) is int for val in t)
+
+
+def test_bstnode_counters():
+    root = BSTNode()
+    with root.instrument():
+        for i in [5, 3, 8, 1, 4, 5]:
+            root.insert(i)
+        assert root.exists(4) and not root.exists(7)
+    snap = root.stats()
+    assert root.inorder() == [1, 3, 4, 5, 8]
+    assert snap["descents"] == 8
+    assert snap["path_lengths"] == {0: 1, 1: 3, 2: 3, 3: 1}
+    assert BSTNode().stats()["descents"] == 0
+
+
+def test_set_operations_under_instrument():
+    random.seed(12)
+    a_vals = set(random.sample(range(5000), 1500))
+    b_vals = set(random.sample(range(5000), 200))
+    for op, expected in (
+        ("union", a_vals | b_vals),
+        ("intersection", a_vals & b_vals),
+        ("difference", a_vals - b_vals),
+    ):
+        a, b = RBTree.from_iterable(a_vals), RBTree.from_iterable(b_vals)
+        with a.instrument() as stats:
+            getattr(a, op)(b)
+        check_rb(a)
+        assert list(a) == sorted(expected)
+        assert stats.rotations_left + stats.rotations_right + stats.recolors > 0
+    a = RBTree.from_iterable(a_vals)
+    with a.instrument():
+        less, rest = a.split(2500)
+        joined = RBTree.join(less, 2500, rest)
+        joined.insert(2500)
+    check_rb(joined)
+    assert list(joined) == sorted(a_vals | {2500})